@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory benchmark for XMLBuilder
+
+Builds synthetic farms (see farm.py) of 10 to 1M records in each builder
+mode and reports wall time, records per second and the tracemalloc peak of
+the build. Run from the repository root:
+
+    python benchmarks/bench_builder.py [--sizes N ...] [--output FILE]
+    python benchmarks/bench_builder.py --compare baseline.json [--threshold 0.2]
+
+With ``--compare`` the results are checked against a JSON baseline written
+by ``--output`` and the script exits with status 1 if any metric regressed
+by more than the threshold.
+"""
+
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from farm import count_records, make_farm
+
+from persephone.fragment_cache import FragmentCache
+from persephone.validation import Validator
+from persephone.xml_builder import Request, XMLBuilder
+
+SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+Results = Dict[str, Dict[str, float]]
+# Metric name -> True when a higher value is better
+METRICS = {"seconds": False, "records_per_s": True, "peak_bytes": False}
+
+
+class _NullSink(io.RawIOBase):
+    """Binary file that discards everything written to it"""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        return len(data)
+
+
+def _pretty(request: Request) -> Callable[[], object]:
+    builder = XMLBuilder()
+    return lambda: builder.build_request_xml(request)
+
+
+def _compact(request: Request) -> Callable[[], object]:
+    builder = XMLBuilder(pretty=False)
+    return lambda: builder.build_request_bytes(request)
+
+
+def _stream(request: Request) -> Callable[[], object]:
+    builder = XMLBuilder()
+    return lambda: builder.write_request(request, _NullSink())
+
+
+def _cached(request: Request) -> Callable[[], object]:
+    # Rebuild of an unchanged request with a warm fragment cache
+    builder = XMLBuilder(cache=FragmentCache(max_bytes=1 << 40))
+    builder.build_request_xml(request)
+    return lambda: builder.build_request_xml(request)
+
+
+def _estimate(request: Request) -> Callable[[], object]:
+    # Size of the compact document without building it
+    builder = XMLBuilder(pretty=False)
+    return lambda: builder.estimate_size(request)
+
+
+def _validate(request: Request) -> Callable[[], object]:
+    # Compact build checking every record as it is serialized
+    builder = XMLBuilder(pretty=False, validator=Validator())
+    return lambda: builder.build_request_bytes(request)
+
+
+MODES: Dict[str, Callable[[Request], Callable[[], object]]] = {
+    "pretty": _pretty,
+    "compact": _compact,
+    "stream": _stream,
+    "cached": _cached,
+    "estimate": _estimate,
+    "validate": _validate,
+}
+
+
+def measure(build: Callable[[], object], records: int, repeat: int) -> Dict[str, float]:
+    """Return the best wall time, throughput and peak memory of build()"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+
+    # Memory is traced in a separate run, tracing slows the build down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        build()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "records": records,
+        "seconds": seconds,
+        "records_per_s": records / seconds if seconds else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def run(sizes: List[int], modes: List[str], repeat: int) -> Results:
+    results: Results = {}
+    for size in sizes:
+        request = make_farm(size)
+        records = count_records(request)
+        # Large farms take seconds per build, a single timed run is enough
+        runs = repeat if records < 100_000 else 1
+        for mode in modes:
+            key = f"{mode}/{size}"
+            results[key] = measure(MODES[mode](request), records, runs)
+            report(key, results[key])
+        del request
+    return results
+
+
+def report(key: str, metrics: Dict[str, float]) -> None:
+    print(
+        f"{key:<18} {metrics['records']:>9.0f} rec {metrics['seconds']:>9.4f} s"
+        f" {metrics['records_per_s']:>11.0f} rec/s"
+        f" {metrics['peak_bytes'] / 2**20:>9.1f} MiB"
+    )
+
+
+def compare(
+    results: Results, baseline: Results, threshold: float, min_seconds: float
+) -> List[str]:
+    """Return a description of every metric worse than baseline by threshold
+
+    Timings of builds faster than min_seconds are too noisy to compare and
+    only their peak memory is checked. Metrics missing on either side, such
+    as the throughput of import timings, are skipped.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in metrics or metric not in previous:
+                continue
+            old, new = previous[metric], metrics[metric]
+            if not old or (
+                metric != "peak_bytes" and previous["seconds"] < min_seconds
+            ):
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{key} {metric}: {old:.6g} -> {new:.6g}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to check results against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed relative regression per metric (default 0.2)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.005,
+        help="do not compare timings of faster builds (default 0.005)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.modes, args.repeat)
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(document, fp, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
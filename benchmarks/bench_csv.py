@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+CSV import throughput benchmark
+
+Writes the Aplikace records of a synthetic farm (see farm.py) to a CSV file
+and reads them back with persephone.csv_import.CSVImporter, alone and
+streamed into XMLBuilder.write_request, and through csv.DictReader and the
+dataclass constructor for comparison. Reports wall time and records per
+second. Run from the repository root:
+
+    python benchmarks/bench_csv.py [--rows N] [--output FILE]
+    python benchmarks/bench_csv.py --compare baseline.json [--threshold 0.2]
+
+Results use the same JSON layout as bench_builder.py.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from bench_builder import _NullSink, compare
+from farm import make_farm
+
+from persephone.csv_import import CSVImporter
+from persephone.inputs import _record_from_dict
+from persephone.xml_builder import (
+    _FORMATTERS,
+    APLIKACE_SPEC,
+    Request,
+    TypRequest,
+    XMLBuilder,
+)
+
+
+def write_csv(path: str, rows: int) -> int:
+    """Write about rows Aplikace records to path and return their number"""
+    records: List[Any] = []
+    size = rows
+    while len(records) < rows:
+        records = list(make_farm(size).aplikace)
+        size *= 2
+    del records[rows:]
+    names = [spec.name for spec in APLIKACE_SPEC.fields]
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(names)
+        for record in records:
+            writer.writerow(
+                [
+                    "" if value is None else _FORMATTERS[spec.kind](value)
+                    for spec, value in (
+                        (spec, getattr(record, spec.name))
+                        for spec in APLIKACE_SPEC.fields
+                    )
+                ]
+            )
+    return len(records)
+
+
+def _importer(path: str) -> None:
+    deque(CSVImporter(APLIKACE_SPEC, pause_gc=True).iter_records(path), maxlen=0)
+
+
+def _build(path: str) -> None:
+    records = CSVImporter(APLIKACE_SPEC, pause_gc=True).iter_records(path)
+    request = Request(typ=TypRequest.S, osevy=[], aplikace=records)
+    XMLBuilder(pretty=False).write_request(request, _NullSink())
+
+
+def _dataclass(path: str) -> None:
+    # How rows were read before CSVImporter: one constructor call per row
+    with open(path, encoding="utf-8", newline="") as fp:
+        rows = csv.DictReader(fp)
+        deque(
+            (
+                _record_from_dict(
+                    APLIKACE_SPEC, {k: v for k, v in row.items() if v}, ""
+                )
+                for row in rows
+            ),
+            maxlen=0,
+        )
+
+
+MODES: Dict[str, Callable[[str], None]] = {
+    "import": _importer,
+    "build": _build,
+    "dataclass": _dataclass,
+}
+
+
+def run(rows: int, modes: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "aplikace.csv")
+        records = write_csv(path, rows)
+        for mode in modes:
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                MODES[mode](path)
+                best = min(best, time.perf_counter() - started)
+            key = f"csv/{mode}/{records}"
+            results[key] = {"seconds": best, "records_per_s": records / best}
+            print(f"{key:<24} {best:>9.3f} s {records / best:>11.0f} rec/s")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to check results against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.modes, args.repeat)
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(document, fp, indent=2, sort_keys=True)
+
+    regressions: List[str] = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)["results"]
+        regressions = compare(results, baseline, args.threshold, min_seconds=0.05)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
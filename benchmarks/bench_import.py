@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the persephone modules
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+and reports the cumulative import time of the module, the best of several
+runs. Fails when a headless module pulls in the GUI. Run from the
+repository root:
+
+    python benchmarks/bench_import.py [--runs N] [--output FILE]
+    python benchmarks/bench_import.py --compare baseline.json [--threshold 0.2]
+
+Results use the same JSON layout as bench_builder.py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from bench_builder import compare
+
+SRC = Path(__file__).parent.parent / "src"
+
+MODULES = (
+    "persephone",
+    "persephone.xml_builder",
+    "persephone.xml_parser",
+    "persephone.batch",
+    "persephone.cli",
+    "persephone.app",
+)
+# Modules that must not be imported by anything but persephone.app
+GUI_MODULES = {"toga", "persephone.app"}
+
+
+def import_time(module: str) -> Tuple[float, Set[str]]:
+    """Return the cumulative import time of module and every module loaded"""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set()
+    cumulative = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if cumulative_us.strip().isdigit():
+            loaded.add(name.strip())
+            if name.strip() == module:
+                cumulative = int(cumulative_us)
+    return cumulative / 1e6, loaded
+
+
+def run(modules: List[str], runs: int) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    results = {}
+    problems = []
+    for module in modules:
+        timings = []
+        for _ in range(runs):
+            seconds, loaded = import_time(module)
+            timings.append(seconds)
+        results[f"import/{module}"] = {"seconds": min(timings)}
+        print(f"{module:<24} {min(timings) * 1000:>8.1f} ms")
+        gui = sorted(loaded & GUI_MODULES - {module})
+        if gui and module != "persephone.app":
+            problems.append(f"{module} imports {', '.join(gui)}")
+    return results, problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to check results against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results, problems = run(args.modules, args.runs)
+    for problem in problems:
+        print(f"GUI IMPORT {problem}")
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(document, fp, indent=2, sort_keys=True)
+
+    regressions: List[str] = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)["results"]
+        regressions = compare(results, baseline, args.threshold, min_seconds=0)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    return 1 if problems or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the model dataclasses and their compact variants
+
+Prints the bytes per record taken by regular and slotted records, including
+the values they hold. Run from the repository root:
+
+    python benchmarks/bench_memory.py [--count N]
+"""
+
+import argparse
+import sys
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from persephone import compact, xml_builder  # noqa: E402
+from persephone.xml_builder import (  # noqa: E402
+    MernaJednotka,
+    TypAplikace,
+    TypPlodiny,
+)
+
+
+def make_vymera(module: Any, i: int) -> Any:
+    return module.Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))
+
+
+def make_pestovani(module: Any, i: int) -> Any:
+    return module.Pestovani(
+        id_pestovani=f"PEST{i:07d}",
+        id_plodina=100 + i % 50,
+        viceleta=False,
+        zahajeni_pestovani=date(2025, 3, 15),
+        platnost_od=date(2025, 3, 15),
+        typ_plodiny=TypPlodiny.HLA,
+    )
+
+
+def make_osev(module: Any, i: int) -> Any:
+    return module.Osev(
+        zkod=f"Z{i:07d}",
+        ctverec="A1",
+        id_pozemek=f"POZ{i:07d}",
+        platnost_od=date(2025, 1, 1),
+        vymery=[],
+    )
+
+
+def make_aplikace(module: Any, i: int) -> Any:
+    return module.Aplikace(
+        typ=TypAplikace.H,
+        dat_aplikace_zahajeni=date(2025, 4, 1),
+        id_plodina=100 + i % 50,
+        vymera_plodiny=Decimal("15.75"),
+        vymera_aplikace=Decimal("15.75"),
+        id_pestovani=f"PEST{i:07d}",
+        mnozstvi_celkem=Decimal("1500.500"),
+        merna_jednotka=MernaJednotka.KG,
+        privod_n=Decimal("12.50"),
+    )
+
+
+def make_sklizen(module: Any, i: int) -> Any:
+    return module.Sklizen(
+        id_pestovani=f"PEST{i:07d}",
+        id_produkt=111,
+        hosp_rok=2025,
+        vymera_sklizne=Decimal("15.750"),
+        merna_jednotka=MernaJednotka.T,
+    )
+
+
+def make_pastva(module: Any, i: int) -> Any:
+    return module.Pastva(
+        id_pozemek=f"POZ{i:07d}",
+        id_druh_zvirat="CATTLE",
+        pocet_ks=Decimal("25.000"),
+        pocet_dj=Decimal("20.500"),
+        pastva_od=date(2025, 5, 1),
+        pastva_do=date(2025, 9, 30),
+    )
+
+
+FACTORIES: Dict[str, Callable[[Any, int], Any]] = {
+    "Vymera": make_vymera,
+    "Pestovani": make_pestovani,
+    "Osev": make_osev,
+    "Aplikace": make_aplikace,
+    "Sklizen": make_sklizen,
+    "Pastva": make_pastva,
+}
+
+
+def bytes_per_record(
+    module: Any, factory: Callable[[Any, int], Any], count: int
+) -> float:
+    """Return the memory allocated per record while building count records"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        records: List[Any] = [factory(module, i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del records
+    return (after - before) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'record':<10} {'dataclass':>10} {'slotted':>10} {'saved':>7}")
+    for name, factory in FACTORIES.items():
+        regular = bytes_per_record(xml_builder, factory, args.count)
+        slotted = bytes_per_record(compact, factory, args.count)
+        saved = 1 - slotted / regular
+        print(f"{name:<10} {regular:>10.0f} {slotted:>10.0f} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
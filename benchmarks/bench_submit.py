@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Submission throughput benchmark against the local stub service
+
+Starts persephone.stub_server in process with a simulated latency and
+error rate, submits synthetic farms (see farm.py) with SubmissionClient at
+several concurrency limits and reports wall time, submissions per second
+and the attempts needed. Run from the repository root:
+
+    python benchmarks/bench_submit.py [--count N] [--concurrency N ...]
+    python benchmarks/bench_submit.py --compare baseline.json [--threshold 0.2]
+
+Results use the same JSON layout as bench_builder.py.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+from bench_builder import compare
+from farm import count_records, make_farm
+
+from persephone.stub_server import StubServer
+from persephone.submission import SubmissionClient
+
+CONCURRENCY = (1, 4, 16, 64)
+
+
+async def measure(
+    payloads: List[bytes],
+    records: int,
+    concurrency: int,
+    options: argparse.Namespace,
+) -> Dict[str, float]:
+    async with StubServer(
+        latency=options.latency,
+        jitter=options.latency / 4,
+        error_rate=options.error_rate,
+        seed=0,
+    ) as server:
+        async with SubmissionClient(
+            server.url, concurrency=concurrency, rate=options.rate, backoff=0.01
+        ) as client:
+            started = time.perf_counter()
+            results = await client.submit_payloads(payloads)
+            seconds = time.perf_counter() - started
+            connections = client.connections_opened
+    return {
+        "seconds": seconds,
+        "records_per_s": records * len(payloads) / seconds,
+        "requests_per_s": len(payloads) / seconds,
+        "attempts": sum(result.attempts for result in results) / len(results),
+        "failed": sum(not result.ok for result in results),
+        "connections": connections,
+    }
+
+
+def run(options: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    request = make_farm(options.size)
+    records = count_records(request)
+    # The payload is built once; the benchmark measures the transport
+    payload = SubmissionClient("http://localhost/").builder.build_request_bytes(request)
+    payloads = [payload] * options.count
+    results = {}
+    for concurrency in options.concurrency:
+        key = f"submit/c{concurrency}"
+        metrics = asyncio.run(measure(payloads, records, concurrency, options))
+        results[key] = metrics
+        print(
+            f"{key:<14} {metrics['seconds']:>8.3f} s"
+            f" {metrics['requests_per_s']:>9.1f} req/s"
+            f" {metrics['attempts']:>5.2f} attempts"
+            f" {metrics['failed']:>4.0f} failed"
+            f" {metrics['connections']:>4.0f} conn"
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=200, help="submissions")
+    parser.add_argument("--size", type=int, default=100, help="records each")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY))
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, help="submissions per second")
+    parser.add_argument("--output", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to check results against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(args)
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(document, fp, indent=2, sort_keys=True)
+
+    regressions: List[str] = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)["results"]
+        regressions = compare(results, baseline, args.threshold, min_seconds=0)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
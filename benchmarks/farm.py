@@ -0,0 +1,172 @@
+"""
+Deterministic synthetic farms for the benchmarks
+
+``make_farm(size)`` returns a Request of about ``size`` records across all
+sections, counting nested Vymera and Pestovani records. The same size and
+seed always give the same request. Each field (Osev) has one or two area
+measurements and crops; crops get fertilizer applications and harvests that
+reference them, and some fields are grazed.
+"""
+
+import random
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from persephone.xml_builder import (  # noqa: E402
+    Aplikace,
+    DobaZapraveni,
+    MernaJednotka,
+    MetodaZivin,
+    Osev,
+    Pastva,
+    Pestovani,
+    Request,
+    Sklizen,
+    TypAplikace,
+    TypPlodiny,
+    TypProduktu,
+    TypRequest,
+    Vymera,
+)
+
+HOSP_ROK = 2025
+YEAR_START = date(HOSP_ROK, 1, 1)
+
+
+def _decimal(rng: random.Random, low: float, high: float, places: int) -> Decimal:
+    return round(Decimal(str(rng.uniform(low, high))), places)
+
+
+def _day(rng: random.Random, first: int, last: int) -> date:
+    return YEAR_START + timedelta(days=rng.randint(first, last))
+
+
+def count_records(request: Request) -> int:
+    """Return the number of records in a request, nested records included"""
+    osevy = list(request.osevy)
+    nested = sum(len(osev.vymery) + len(osev.pestovani) for osev in osevy)
+    return (
+        len(osevy)
+        + nested
+        + len(list(request.aplikace))
+        + len(list(request.sklizne))
+        + len(list(request.pastvy))
+    )
+
+
+def make_farm(size: int, seed: int = 0) -> Request:
+    """Create a statistics request with about size records"""
+    rng = random.Random(seed)
+    osevy: List[Osev] = []
+    aplikace: List[Aplikace] = []
+    sklizne: List[Sklizen] = []
+    pastvy: List[Pastva] = []
+    nested = records = 0
+
+    while records < size:
+        n = len(osevy)
+        id_pozemek = f"POZ{n:07d}"
+        area = _decimal(rng, 0.5, 40.0, 2)
+        vymery = [Vymera(vymera=area, platnost_od=YEAR_START)]
+        if rng.random() < 0.2:
+            vymery[0].platnost_do = date(HOSP_ROK, 6, 30)
+            vymery.append(
+                Vymera(
+                    vymera=_decimal(rng, 0.5, 40.0, 2), platnost_od=date(HOSP_ROK, 7, 1)
+                )
+            )
+
+        pestovani = []
+        for crop in range(1 if rng.random() < 0.7 else 2):
+            id_pestovani = f"PEST{n:07d}{crop}"
+            id_plodina = rng.randint(100, 180)
+            start = _day(rng, 40, 120) if crop == 0 else _day(rng, 230, 260)
+            end = start + timedelta(days=rng.randint(60, 150))
+            pestovani.append(
+                Pestovani(
+                    id_pestovani=id_pestovani,
+                    id_plodina=id_plodina,
+                    viceleta=rng.random() < 0.1,
+                    zahajeni_pestovani=start,
+                    platnost_od=start,
+                    hosp_rok=HOSP_ROK,
+                    typ_plodiny=TypPlodiny.HLA if crop == 0 else TypPlodiny.KRY,
+                    ukonceni_pestovani=end,
+                    platnost_do=end,
+                )
+            )
+            for _ in range(rng.randint(0, 3)):
+                mineral = rng.random() < 0.6
+                aplikace.append(
+                    Aplikace(
+                        typ=TypAplikace.H,
+                        dat_aplikace_zahajeni=start
+                        + timedelta(days=rng.randint(0, 30)),
+                        id_plodina=id_plodina,
+                        vymera_plodiny=area,
+                        vymera_aplikace=area,
+                        doba_zapraveni=None if mineral else DobaZapraveni.H24,
+                        id_pestovani=id_pestovani,
+                        mnozstvi_celkem=_decimal(rng, 50, 5000, 3),
+                        merna_jednotka=MernaJednotka.KG,
+                        id_hnojivo=rng.randint(1000, 1100) if mineral else None,
+                        nazev_hnojivo=None if mineral else "Hnůj skotu",
+                        metoda_zivin=MetodaZivin.PRVKOVA,
+                        privod_n=_decimal(rng, 5, 150, 2),
+                        privod_p=_decimal(rng, 0, 40, 2) if mineral else None,
+                        privod_k=_decimal(rng, 0, 60, 2) if mineral else None,
+                    )
+                )
+            if crop == 0:
+                sklizne.append(
+                    Sklizen(
+                        id_pestovani=id_pestovani,
+                        id_produkt=id_plodina * 10 + 1,
+                        hosp_rok=HOSP_ROK,
+                        vymera_sklizne=area,
+                        merna_jednotka=MernaJednotka.T,
+                        typ_produktu=TypProduktu.H,
+                        mnozstvi_celkem=_decimal(rng, 1, 400, 3),
+                        susina=rng.randint(80, 90),
+                    )
+                )
+
+        nested += len(vymery) + len(pestovani)
+        osevy.append(
+            Osev(
+                zkod=f"Z{n:07d}",
+                ctverec=f"{chr(65 + n % 26)}{n % 9 + 1}",
+                id_pozemek=id_pozemek,
+                nazev_pozemek=f"Pole {n}",
+                platnost_od=YEAR_START,
+                vymery=vymery,
+                pestovani=pestovani,
+            )
+        )
+        if rng.random() < 0.1:
+            pastvy.append(
+                Pastva(
+                    id_pozemek=id_pozemek,
+                    id_druh_zvirat="SKOT",
+                    pocet_ks=_decimal(rng, 5, 80, 3),
+                    pocet_dj=_decimal(rng, 4, 60, 3),
+                    pastva_od=date(HOSP_ROK, 5, 1),
+                    pastva_do=date(HOSP_ROK, 9, 30),
+                    vymera_pastvy=area,
+                )
+            )
+        records = len(osevy) + nested + len(aplikace) + len(sklizne) + len(pastvy)
+
+    return Request(
+        typ=TypRequest.S,
+        hosp_rok=HOSP_ROK,
+        osevy=osevy,
+        aplikace=aplikace,
+        sklizne=sklizne,
+        pastvy=pastvy,
+    )
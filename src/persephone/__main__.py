@@ -1,9 +1,19 @@
 """
 Persephone application entry point
+
+Without arguments the GUI is started; with arguments the headless command
+line interface in persephone.cli runs instead.
 """
 
-from persephone import main
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from persephone.cli import main as cli_main
+
+        sys.exit(cli_main())
+
+    from persephone.app import main
+
     app = main()
     app.main_loop()
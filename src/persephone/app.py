@@ -0,0 +1,376 @@
+"""
+Persephone GUI application built with Toga
+
+Falls back to mock widgets when Toga is not installed, so the application
+can be created and tested without a GUI.
+"""
+
+import os
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .background import BackgroundBuild, BuildCancelled
+from .preview import RecordPager, XMLPreview, temporary_path
+from .xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    Osev,
+    Pestovani,
+    Request,
+    TypPlodiny,
+    TypRequest,
+    Vymera,
+)
+
+if TYPE_CHECKING:
+    try:
+        import toga  # type: ignore
+        from toga.style import Pack  # type: ignore
+        from toga.style.pack import COLUMN, ROW  # type: ignore
+    except ImportError:
+        # For type checking when toga is not available
+        toga = Any  # type: ignore
+        Pack = Any  # type: ignore
+        COLUMN = Any  # type: ignore
+        ROW = Any  # type: ignore
+
+try:
+    import toga
+    from toga.style import Pack
+    from toga.style.pack import COLUMN, ROW
+
+    TOGA_AVAILABLE = True
+except ImportError:
+    TOGA_AVAILABLE = False
+
+    # Create mock classes for testing without Toga
+    class MockApp:
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            self.formal_name = "Persephone"
+            self.main_window: Optional[Any] = None
+            self.crop_input: Optional[Any] = None
+            self.result_label: Optional[Any] = None
+            self.progress_bar: Optional[Any] = None
+
+        def startup(self) -> None:
+            pass
+
+        def main_loop(self) -> None:
+            pass
+
+    class MockWidget:
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            self.text = ""
+            self.value = ""
+
+    toga = type(
+        "toga",
+        (),
+        {
+            "App": MockApp,
+            "MainWindow": MockWidget,
+            "Box": MockWidget,
+            "Label": MockWidget,
+            "TextInput": MockWidget,
+            "Button": MockWidget,
+            "ProgressBar": MockWidget,
+            "MultilineTextInput": MockWidget,
+            "Table": MockWidget,
+        },
+    )()  # type: ignore
+
+    Pack = type("Pack", (), {})  # type: ignore
+    COLUMN = "column"
+    ROW = "row"
+
+
+def create_example_request(crop_code: str) -> Request:
+    """Create the example request generated by the GUI"""
+    vymera = Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))
+
+    pestovani = Pestovani(
+        id_pestovani=f"PEST_{crop_code}",
+        id_plodina=123,
+        viceleta=False,
+        zahajeni_pestovani=date(2025, 3, 15),
+        platnost_od=date(2025, 3, 15),
+        typ_plodiny=TypPlodiny.HLA,
+    )
+
+    osev = Osev(
+        zkod=crop_code,
+        ctverec="A1",
+        id_pozemek="POZEMEK001",
+        nazev_pozemek=f"Field for {crop_code}",
+        platnost_od=date(2025, 1, 1),
+        vymery=[vymera],
+        pestovani=[pestovani],
+    )
+
+    return Request(typ=TypRequest.S, hosp_rok=2025, osevy=[osev])
+
+
+# Record tables shown below the XML preview: (view name, Request field, schema)
+RECORD_VIEWS = (("Osevy", "osevy", OSEV_SPEC), ("Aplikace", "aplikace", APLIKACE_SPEC))
+
+
+class Persephone(toga.App):  # type: ignore
+    """Main application class for Persephone"""
+
+    # Build running in the background, if any
+    current_build: Optional[BackgroundBuild] = None
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Paged views by name: the XML preview ("xml") and the record tables.
+        # Each pager has page_count and page(number); only the page on
+        # screen is decoded or formatted. They are created first, as Toga
+        # calls startup from App.__init__.
+        self.pagers: Dict[str, Any] = {}
+        self.page_numbers: Dict[str, int] = {}
+        self.page_widgets: Dict[str, Any] = {}
+        self.page_labels: Dict[str, Any] = {}
+        super().__init__(*args, **kwargs)
+
+    def startup(self) -> None:
+        """Initialize the application UI"""
+        if not TOGA_AVAILABLE:
+            print("Toga not available - running in mock mode")
+            return
+
+        # Create the main box container
+        main_box = toga.Box(style=Pack(direction=COLUMN, padding=10))  # type: ignore
+
+        # Create welcome label for XML Builder demo
+        welcome_label = toga.Label(  # type: ignore
+            "Persephone XML Builder for EH_PEH02A",
+            style=Pack(  # type: ignore
+                padding=(0, 0, 10, 0),
+                text_align="center",
+                font_size=20,
+                font_weight="bold",
+            ),
+        )
+
+        # Create description label
+        description_label = toga.Label(  # type: ignore
+            "Agricultural Data Service XML Builder - Generate XML for Czech Ministry",
+            style=Pack(padding=(0, 0, 20, 0), text_align="center"),  # type: ignore
+        )
+
+        # Create input field for crop code
+        self.crop_input = toga.TextInput(  # type: ignore
+            placeholder="Enter crop code (e.g., WHEAT01)",
+            style=Pack(padding=(0, 0, 10, 0)),  # type: ignore
+        )
+
+        # Create buttons to generate XML and cancel a running generation
+        self.generate_button = toga.Button(  # type: ignore
+            "Generate XML Example",
+            on_press=self.generate_xml_example,
+            style=Pack(padding=(0, 0, 10, 0)),  # type: ignore
+        )
+        self.cancel_button = toga.Button(  # type: ignore
+            "Cancel",
+            on_press=self.cancel_generation,
+            enabled=False,
+            style=Pack(padding=(0, 0, 10, 0)),  # type: ignore
+        )
+
+        # Create progress bar showing records serialized
+        self.progress_bar = toga.ProgressBar(  # type: ignore
+            max=1, value=0, style=Pack(padding=(0, 0, 10, 0))  # type: ignore
+        )
+
+        # Create result label
+        self.result_label = toga.Label(  # type: ignore
+            "",
+            style=Pack(
+                padding=(0, 0, 10, 0), text_align="center", font_size=16
+            ),  # type: ignore
+        )
+
+        # Create the paged XML preview
+        self.page_widgets["xml"] = toga.MultilineTextInput(  # type: ignore
+            readonly=True, style=Pack(flex=1, padding=(0, 0, 10, 0))  # type: ignore
+        )
+
+        # Add all components to the main box
+        main_box.add(welcome_label)  # type: ignore
+        main_box.add(description_label)  # type: ignore
+        main_box.add(self.crop_input)  # type: ignore
+        main_box.add(self.generate_button)  # type: ignore
+        main_box.add(self.cancel_button)  # type: ignore
+        main_box.add(self.progress_bar)  # type: ignore
+        main_box.add(self.result_label)  # type: ignore
+        main_box.add(self.page_widgets["xml"])  # type: ignore
+        main_box.add(self._page_controls("xml"))  # type: ignore
+
+        # Create one paged table per record type
+        for title, view, spec in RECORD_VIEWS:
+            self.page_widgets[view] = toga.Table(  # type: ignore
+                headings=RecordPager(spec, []).headings,
+                data=[],
+                style=Pack(flex=1, padding=(10, 0, 0, 0)),  # type: ignore
+            )
+            main_box.add(toga.Label(title))  # type: ignore
+            main_box.add(self.page_widgets[view])  # type: ignore
+            main_box.add(self._page_controls(view))  # type: ignore
+
+        # Create the main window
+        self.main_window = toga.MainWindow(title=self.formal_name)  # type: ignore
+        self.main_window.content = main_box  # type: ignore
+        self.main_window.show()  # type: ignore
+
+    def _page_controls(self, view: str) -> Any:
+        """Create the Previous/Next buttons and page label of a paged view"""
+        row = toga.Box(style=Pack(direction=ROW))  # type: ignore
+        self.page_labels[view] = toga.Label(  # type: ignore
+            "", style=Pack(padding=(0, 10))  # type: ignore
+        )
+        row.add(
+            toga.Button(  # type: ignore
+                "Previous", on_press=lambda widget: self.turn_page(view, -1)
+            )
+        )
+        row.add(self.page_labels[view])  # type: ignore
+        row.add(
+            toga.Button(  # type: ignore
+                "Next", on_press=lambda widget: self.turn_page(view, 1)
+            )
+        )
+        return row
+
+    def show_page(self, view: str, number: int) -> None:
+        """Show one page of the XML preview or of a record table"""
+        pager = self.pagers.get(view)
+        if pager is None:
+            return
+        number = max(0, min(number, pager.page_count - 1))
+        self.page_numbers[view] = number
+        widget = self.page_widgets.get(view)
+        if widget is not None:
+            if view == "xml":
+                widget.value = pager.page(number)
+            else:
+                widget.data = pager.page(number)
+        label = self.page_labels.get(view)
+        if label is not None:
+            label.text = f"Page {number + 1} / {pager.page_count}"
+
+    def turn_page(self, view: str, step: int) -> None:
+        """Move a paged view forward or back"""
+        self.show_page(view, self.page_numbers.get(view, 0) + step)
+
+    def show_result(self, request: Request, preview: XMLPreview) -> None:
+        """Replace the paged views with a newly generated request"""
+        self.close_preview()
+        self.pagers["xml"] = preview
+        for _, view, spec in RECORD_VIEWS:
+            records = getattr(request, view)
+            if not hasattr(records, "__getitem__"):
+                records = list(records)
+            self.pagers[view] = RecordPager(spec, records)
+        for view in self.pagers:
+            self.show_page(view, 0)
+
+    def close_preview(self) -> None:
+        """Close the XML preview and remove its temporary file"""
+        preview = self.pagers.pop("xml", None)
+        if preview is not None:
+            preview.close()
+
+    def _set_running(self, running: bool) -> None:
+        """Enable the buttons that apply while a build is or is not running"""
+        for name, enabled in (
+            ("generate_button", not running),
+            ("cancel_button", running),
+        ):
+            button = getattr(self, name, None)
+            if button is not None:
+                button.enabled = enabled
+
+    def show_progress(self, done: int, total: Optional[int]) -> None:
+        """Show the number of records serialized so far"""
+        progress_bar = getattr(self, "progress_bar", None)
+        if progress_bar is not None and total:
+            progress_bar.max = total
+            progress_bar.value = done
+        if getattr(self, "result_label", None) is not None:
+            count = f"{done} / {total}" if total is not None else str(done)
+            self.result_label.text = f"Serialized {count} records..."
+
+    def cancel_generation(self, widget: object = None) -> None:
+        """Cancel the XML generation in progress"""
+        if self.current_build is not None:
+            self.current_build.cancel()
+
+    async def generate_xml_example(self, widget: object = None) -> None:
+        """Generate XML example using the XML builder
+
+        The XML is built on a worker thread so the window stays responsive;
+        progress is shown as records are serialized and the build can be
+        cancelled with the Cancel button. The document is streamed to a
+        temporary file and shown a page at a time from a memory map.
+        """
+        if not TOGA_AVAILABLE:
+            # Mock behavior for testing
+            if not hasattr(self, "result_label") or self.result_label is None:
+                self.result_label = MockWidget()
+            if not hasattr(self, "crop_input") or self.crop_input is None:
+                self.crop_input = MockWidget()
+
+        crop_code = getattr(self.crop_input, "value", "").strip()
+        if not crop_code:
+            crop_code = "WHEAT01"
+
+        if self.current_build is not None:
+            # A build is already running; the handler is not re-entrant
+            return
+
+        self._set_running(True)
+        path = temporary_path()
+        try:
+            request = create_example_request(crop_code)
+            self.current_build = BackgroundBuild(
+                request, on_progress=self.show_progress
+            )
+            await self.current_build.write(path)
+            preview = XMLPreview(path, delete=True)
+            self.show_result(request, preview)
+
+            message = (
+                f"XML generated successfully for crop: {crop_code}\n\n"
+                f"First 200 characters:\n{preview.page(0)[:200]}..."
+            )
+
+        except BuildCancelled:
+            message = "XML generation cancelled"
+        except Exception as e:
+            message = f"Error generating XML: {e}"
+        finally:
+            self.current_build = None
+            self._set_running(False)
+            if self.pagers.get("xml") is None or self.pagers["xml"].path != path:
+                # The build failed before the preview took over the file
+                os.remove(path)
+
+        if hasattr(self, "result_label") and self.result_label:
+            self.result_label.text = message
+        if not TOGA_AVAILABLE:
+            print(f"Mock mode: {message}")
+
+
+def main() -> Persephone:
+    """Entry point for the application"""
+    return Persephone()
+
+
+if __name__ == "__main__":
+    app = main()
+    if TOGA_AVAILABLE:
+        app.main_loop()
+    else:
+        print("Starting Persephone in mock mode...")
+        app.startup()
+        print("Persephone application created successfully!")
@@ -0,0 +1,87 @@
+"""
+Background request builds for event-loop driven code such as the GUI
+
+BackgroundBuild serializes a request on a worker thread so the asyncio
+event loop stays responsive. Progress from the builder is forwarded to the
+loop thread, and a build can be cancelled from the loop at any time.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Optional
+
+from .xml_builder import Request, XMLBuilder
+
+
+class BuildCancelled(Exception):
+    """Raised by BackgroundBuild.run when the build was cancelled"""
+
+
+class BackgroundBuild:
+    """Build request XML on a worker thread without blocking the event loop
+
+    ``on_progress`` is called on the event loop thread with the number of
+    records serialized and the total, so it may update widgets directly.
+    ``cancel()`` stops the build at the next progress report, at most
+    PROGRESS_INTERVAL records later.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        pretty: bool = True,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> None:
+        self.request = request
+        self.pretty = pretty
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Ask the running build to stop"""
+        self._cancelled.set()
+
+    def _builder(self, loop: asyncio.AbstractEventLoop) -> XMLBuilder:
+        """Create a builder reporting progress to loop and honouring cancel()"""
+        on_progress = self.on_progress
+
+        def progress(done: int, total: Optional[int]) -> None:
+            # Runs on the worker thread
+            if self._cancelled.is_set():
+                raise BuildCancelled()
+            if on_progress is not None:
+                loop.call_soon_threadsafe(on_progress, done, total)
+
+        return XMLBuilder(pretty=self.pretty, on_progress=progress)
+
+    async def run(self) -> str:
+        """Build the request on a worker thread and return its XML
+
+        Raises BuildCancelled if ``cancel()`` was called before the build
+        finished.
+        """
+        loop = asyncio.get_running_loop()
+        builder = self._builder(loop)
+        xml: str = await loop.run_in_executor(
+            None, builder.build_request_xml, self.request
+        )
+        return xml
+
+    async def write(self, path: str) -> None:
+        """Stream the request to a file on a worker thread
+
+        Like ``run()``, but the document is written to ``path`` record by
+        record instead of being held in memory.
+        """
+        loop = asyncio.get_running_loop()
+        builder = self._builder(loop)
+
+        def write() -> None:
+            with open(path, "wb") as fp:
+                builder.write_request(self.request, fp)
+
+        await loop.run_in_executor(None, write)
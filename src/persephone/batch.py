@@ -0,0 +1,108 @@
+"""
+Parallel batch building of EH_PEH02A requests
+"""
+
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Iterable, List, Optional, Tuple, Union
+
+from .xml_builder import Request, XMLBuilder
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+@dataclass
+class BuildResult:
+    """Outcome of building one request of a batch
+
+    Exactly one of ``path`` (when an output directory was given), ``data``
+    (encoded XML otherwise) and ``error`` is set.
+    """
+
+    index: int
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@lru_cache(maxsize=None)
+def _get_builder(pretty: bool) -> XMLBuilder:
+    return XMLBuilder(pretty=pretty)
+
+
+def output_path(output_dir: PathType, index: int) -> str:
+    """Return the file a batch writes the request at index to"""
+    return os.path.join(os.fspath(output_dir), f"request-{index:06d}.xml")
+
+
+def _build_one(
+    index: int, request: Request, output_dir: Optional[str], pretty: bool
+) -> BuildResult:
+    """Build a single request inside a worker process"""
+    builder = _get_builder(pretty)
+    try:
+        if output_dir is None:
+            return BuildResult(index, data=builder.build_request_bytes(request))
+        path = output_path(output_dir, index)
+        with open(path, "wb") as fp:
+            builder.write_request(request, fp)
+        return BuildResult(index, path=path)
+    except Exception as e:
+        return BuildResult(index, error=f"{type(e).__name__}: {e}")
+
+
+def _collect(index: int, future: "Future[BuildResult]") -> BuildResult:
+    try:
+        return future.result()
+    except Exception as e:
+        # Failures outside the builder, e.g. a request that cannot be pickled
+        return BuildResult(index, error=f"{type(e).__name__}: {e}")
+
+
+def build_many(
+    requests: Iterable[Request],
+    workers: Optional[int] = None,
+    output_dir: Optional[PathType] = None,
+    pretty: bool = True,
+) -> List[BuildResult]:
+    """Build many requests in parallel across a process pool
+
+    With ``output_dir`` each worker streams its XML to a file there and only
+    the path is sent back; otherwise the encoded XML is returned as bytes.
+    Results are returned in input order, and a request that fails to build is
+    reported in its result instead of aborting the batch.
+
+    Requests are pickled to the workers, so their sections must be lists
+    rather than generators. At most a few requests per worker are in flight
+    at a time, so ``requests`` may itself be a generator.
+    """
+    # Imported here so worker processes, which import this module to run
+    # _build_one, do not load the executor machinery
+    from concurrent.futures import ProcessPoolExecutor
+
+    directory = None if output_dir is None else os.fspath(output_dir)
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    window = 4 * workers
+    results: List[BuildResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Tuple[int, "Future[BuildResult]"]] = deque()
+        for index, request in enumerate(requests):
+            future = executor.submit(_build_one, index, request, directory, pretty)
+            pending.append((index, future))
+            if len(pending) >= window:
+                results.append(_collect(*pending.popleft()))
+        while pending:
+            results.append(_collect(*pending.popleft()))
+    return results
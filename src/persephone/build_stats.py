@@ -0,0 +1,104 @@
+"""
+Build statistics for XMLBuilder
+
+An XMLBuilder created with an ``on_build`` hook measures every build and
+passes a BuildStats to the hook when the document is complete: wall time,
+record and element counts and output bytes for each section, and the time
+spent in each phase. Without a hook the builder skips all measurement.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TextIO
+
+
+@dataclass
+class SectionStats:
+    """Measurements of one part of a request document
+
+    The ``header`` section covers the XML declaration, the Request element
+    and its scalar fields; the others are named after the Request field
+    they serialize (``osevy``, ``aplikace``, ``sklizne``, ``pastvy``).
+    """
+
+    name: str
+    seconds: float = 0.0
+    records: int = 0
+    elements: int = 0
+    bytes: int = 0
+
+    def count(self, text: str, encoding: str = "utf-8") -> None:
+        """Add a piece of serialized output to the element and byte counts"""
+        self.elements += text.count("<") - text.count("</") - text.count("<?")
+        self.bytes += len(text) if text.isascii() else len(text.encode(encoding))
+
+    def count_records(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Yield records while counting them"""
+        for record in records:
+            self.records += 1
+            yield record
+
+
+@dataclass
+class BuildStats:
+    """Measurements of one build
+
+    ``mode`` is ``xml``, ``bytes`` or ``stream`` for build_request_xml,
+    build_request_bytes and write_request. ``phases`` holds the time spent
+    serializing the request and, for the first two, joining or encoding the
+    result.
+    """
+
+    mode: str
+    pretty: bool
+    timestamp: float = field(default_factory=time.time)
+    phases: Dict[str, float] = field(default_factory=dict)
+    sections: List[SectionStats] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.phases.values())
+
+    @property
+    def records(self) -> int:
+        return sum(section.records for section in self.sections)
+
+    @property
+    def bytes(self) -> int:
+        return sum(section.bytes for section in self.sections)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serializable dictionary"""
+        return {
+            "timestamp": self.timestamp,
+            "mode": self.mode,
+            "pretty": self.pretty,
+            "seconds": self.seconds,
+            "records": self.records,
+            "bytes": self.bytes,
+            "phases": dict(self.phases),
+            "sections": {
+                section.name: {k: v for k, v in asdict(section).items() if k != "name"}
+                for section in self.sections
+            },
+        }
+
+
+BuildHook = Callable[[BuildStats], None]
+
+
+class JsonLinesExporter:
+    """Build hook writing one JSON object per build to a text file
+
+    ::
+
+        with open("builds.jsonl", "a") as fp:
+            builder = XMLBuilder(on_build=JsonLinesExporter(fp))
+    """
+
+    def __init__(self, fp: TextIO) -> None:
+        self.fp = fp
+
+    def __call__(self, stats: BuildStats) -> None:
+        self.fp.write(json.dumps(stats.to_dict(), sort_keys=True) + "\n")
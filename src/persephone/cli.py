@@ -0,0 +1,227 @@
+"""
+Headless command line interface
+
+    python -m persephone build --input DIR --output DIR [--jobs N] [--compact]
+    python -m persephone submit --outbox FILE --url URL [--input DIR]
+
+``build`` converts every ``*.json`` and ``*.csv`` request definition in the
+input directory (see persephone.inputs for the formats) to XML in the output
+directory. A file defining one request is written to ``<name>.xml``, a file
+defining several to ``<name>-001.xml``, ``<name>-002.xml`` and so on. Files
+are converted in parallel, one file per task, and a file that fails is
+reported at the end without stopping the others.
+
+``submit`` adds the requests defined in the input directory to a durable
+outbox (see persephone.outbox) and submits every pending document to the
+service. Running it again after an interruption only submits the documents
+that were not accepted yet. This module never imports the GUI.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from .inputs import LOADERS
+from .xml_builder import REQUEST_SECTIONS, XMLBuilder
+
+
+@dataclass
+class FileResult:
+    """Outcome of converting one input file"""
+
+    path: str
+    outputs: List[str] = field(default_factory=list)
+    records: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_inputs(input_dir: str) -> List[str]:
+    """Return the request definition files of a directory in name order"""
+    return sorted(
+        entry.path
+        for entry in os.scandir(input_dir)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in LOADERS
+    )
+
+
+def convert_file(path: str, output_dir: str, pretty: bool = True) -> FileResult:
+    """Convert the requests defined in one file to XML files"""
+    result = FileResult(path)
+    stem, extension = os.path.splitext(os.path.basename(path))
+    output = None
+    try:
+        requests = LOADERS[extension.lower()](path)
+        builder = XMLBuilder(pretty=pretty)
+        for number, request in enumerate(requests, start=1):
+            name = f"{stem}.xml" if len(requests) == 1 else f"{stem}-{number:03d}.xml"
+            output = os.path.join(output_dir, name)
+            with open(output, "wb") as fp:
+                builder.write_request(request, fp)
+            result.outputs.append(output)
+            result.records += sum(
+                len(getattr(request, spec.name)) for spec in REQUEST_SECTIONS
+            )
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        if output is not None and output not in result.outputs:
+            # Do not leave a truncated document behind
+            try:
+                os.remove(output)
+            except OSError:
+                pass
+    return result
+
+
+def convert_files(
+    paths: Sequence[str], output_dir: str, jobs: int = 1, pretty: bool = True
+) -> Iterator[FileResult]:
+    """Convert files, in a process pool when jobs > 1, yielding in input order"""
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield convert_file(path, output_dir, pretty)
+        return
+
+    # Imported here so single-process runs start faster
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(
+            convert_file,
+            paths,
+            [output_dir] * len(paths),
+            [pretty] * len(paths),
+            chunksize=max(1, len(paths) // (jobs * 4)),
+        )
+
+
+def report(results: Iterable[FileResult], seconds: float) -> int:
+    """Print a summary of a build and return the number of failed files"""
+    results = list(results)
+    failed = [result for result in results if not result.ok]
+    requests = sum(len(result.outputs) for result in results)
+    records = sum(result.records for result in results)
+    rate = records / seconds if seconds else 0.0
+    for result in failed:
+        print(f"FAILED {result.path}: {result.error}", file=sys.stderr)
+    print(
+        f"Converted {len(results) - len(failed)} of {len(results)} files: "
+        f"{requests} requests, {records} records in {seconds:.2f} s "
+        f"({rate:.0f} records/s)"
+    )
+    return len(failed)
+
+
+def build(args: argparse.Namespace) -> int:
+    if not os.path.isdir(args.input):
+        print(f"Input directory not found: {args.input}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    paths = find_inputs(args.input)
+    start = time.perf_counter()
+    results = list(convert_files(paths, args.output, args.jobs, not args.compact))
+    failed = report(results, time.perf_counter() - start)
+    return 1 if failed else 0
+
+
+def submit(args: argparse.Namespace) -> int:
+    # Imported here so the build command does not load asyncio and sqlite3
+    import asyncio
+
+    from .outbox import Outbox, OutboxState
+    from .submission import SubmissionClient
+
+    if args.input is not None and not os.path.isdir(args.input):
+        print(f"Input directory not found: {args.input}", file=sys.stderr)
+        return 2
+
+    with Outbox(args.outbox) as outbox:
+        if args.input is not None:
+            for path in find_inputs(args.input):
+                extension = os.path.splitext(path)[1].lower()
+                try:
+                    outbox.add_requests(LOADERS[extension](path))
+                except Exception as e:
+                    print(f"FAILED {path}: {type(e).__name__}: {e}", file=sys.stderr)
+                    return 1
+        if args.retry_failed:
+            outbox.retry_failed()
+
+        async def drain() -> None:
+            async with SubmissionClient(
+                args.url,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                retries=args.retries,
+            ) as client:
+                await outbox.drain(client)
+
+        start = time.perf_counter()
+        asyncio.run(drain())
+        seconds = time.perf_counter() - start
+        counts = outbox.counts()
+
+    print(
+        f"{counts[OutboxState.ACCEPTED]} accepted, {counts[OutboxState.PENDING]} "
+        f"pending, {counts[OutboxState.FAILED]} failed in {seconds:.2f} s"
+    )
+    return 0 if counts[OutboxState.ACCEPTED] == sum(counts.values()) else 1
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m persephone",
+        description="Persephone XML builder for the EH_PEH02A service",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser(
+        "build", help="convert JSON/CSV request definitions to XML"
+    )
+    build_parser.add_argument("--input", required=True, help="input directory")
+    build_parser.add_argument("--output", required=True, help="output directory")
+    build_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes (default 1, 0 for one per CPU)",
+    )
+    build_parser.add_argument(
+        "--compact", action="store_true", help="write XML without indentation"
+    )
+    build_parser.set_defaults(handler=build)
+
+    submit_parser = commands.add_parser(
+        "submit", help="submit requests to the service through a durable outbox"
+    )
+    submit_parser.add_argument("--outbox", required=True, help="outbox database")
+    submit_parser.add_argument("--url", required=True, help="service URL")
+    submit_parser.add_argument(
+        "--input", help="directory of JSON/CSV request definitions to add"
+    )
+    submit_parser.add_argument(
+        "--concurrency", type=int, default=8, help="submissions in flight"
+    )
+    submit_parser.add_argument("--rate", type=float, help="submissions per second")
+    submit_parser.add_argument("--retries", type=int, default=3)
+    submit_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="submit documents the service rejected before again",
+    )
+    submit_parser.set_defaults(handler=submit)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface and return the exit status"""
+    args = create_parser().parse_args(argv)
+    if getattr(args, "jobs", 1) == 0:
+        args.jobs = os.cpu_count() or 1
+    status: int = args.handler(args)
+    return status
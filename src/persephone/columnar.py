@@ -0,0 +1,316 @@
+"""
+Columnar storage for Aplikace records
+
+AplikaceTable keeps every Aplikace field as one typed column instead of one
+object per record. Optional fields carry a presence mask, decimals are stored
+as scaled integers rounded once per column, and XMLBuilder serializes the
+table directly, a chunk of rows at a time, without creating Aplikace objects.
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import MISSING, fields
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from itertools import compress, islice, repeat
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .xml_builder import (
+    APLIKACE_SPEC,
+    Aplikace,
+    FieldKind,
+    FieldSpec,
+    RecordSpec,
+    escape_text,
+)
+
+# Typecode of the array backing INT and BOOL columns. DECIMAL and ENUM
+# columns are arrays too, DATE columns hold ordinals and TEXT columns are
+# plain lists. Missing values are stored as a placeholder hidden by the mask.
+_TYPECODES = {FieldKind.INT: "q", FieldKind.BOOL: "b"}
+
+
+def _int_column(values: List[int], typecode: str = "q") -> Sequence[int]:
+    """Store integers in an array, or keep the list if one does not fit"""
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        return values
+
+
+def scale_column(values: Iterable[Any], places: int) -> Tuple[Sequence[int], List[int]]:
+    """Round decimal values to places and store them as scaled integers
+
+    ``Decimal("15.755")`` with two places becomes ``1576``. Rounding is
+    half-even, the same as ``round()`` on a Decimal. Values may be Decimal,
+    int or str; ints are scaled with integer arithmetic and only the others
+    go through Decimal. None is stored as zero and must be masked by the
+    caller.
+
+    Returns the scaled integers and the rows whose value rounds to negative
+    zero, such as ``Decimal("-0.001")``, which str() writes as ``-0.00``.
+    """
+    factor = 10**places
+    scaled: List[int] = []
+    negative_zeros: List[int] = []
+    append = scaled.append
+    for row, value in enumerate(values):
+        if value is None:
+            append(0)
+        elif type(value) is int:
+            append(value * factor)
+        else:
+            number = value if type(value) is Decimal else Decimal(value)
+            result = round(number * factor)
+            if not result and number.is_signed():
+                negative_zeros.append(row)
+            append(result)
+    return _int_column(scaled), negative_zeros
+
+
+def format_scaled(value: int, places: int, negative: bool = False) -> str:
+    """Format a scaled integer the way str() formats the rounded Decimal
+
+    ``negative`` marks a zero that was rounded from a negative value.
+    """
+    sign = "-" if value < 0 or negative else ""
+    whole, fraction = divmod(abs(value), 10**places)
+    return f"{sign}{whole}.{fraction:0{places}d}"
+
+
+@lru_cache(maxsize=4096)
+def _format_ordinal(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+class _Column:
+    """One field of a table: typed values plus an optional presence mask"""
+
+    def __init__(self, spec: FieldSpec, optional: bool) -> None:
+        self.spec = spec
+        self.optional = optional
+        self.values: Any = []
+        self.mask: Optional[bytearray] = None
+        # Sorted rows of a DECIMAL column holding negative zero
+        self.negative_zeros: List[int] = []
+        if spec.enum is not None:
+            members = list(spec.enum)
+            self._members = members
+            self._codes: Dict[Any, int] = {m: i for i, m in enumerate(members)}
+            self._codes.update((m.value, i) for i, m in enumerate(members))
+            self._texts = [m.value for m in members]
+
+    def load(self, values: Sequence[Any]) -> None:
+        """Encode a whole column of Python values"""
+        spec = self.spec
+        kind = spec.kind
+        present = bytearray(value is not None for value in values)
+        if not self.optional and not all(present):
+            raise ValueError(f"Column {spec.name!r} is required but has None values")
+        self.mask = present if self.optional else None
+
+        if kind is FieldKind.TEXT:
+            self.values = [None if v is None else str(v) for v in values]
+        elif kind is FieldKind.DECIMAL:
+            assert spec.places is not None
+            self.values, self.negative_zeros = scale_column(values, spec.places)
+        elif kind is FieldKind.ENUM:
+            codes = self._codes
+            self.values = array("b", [0 if v is None else codes[v] for v in values])
+        elif kind is FieldKind.DATE:
+            self.values = array(
+                "l", [1 if v is None else v.toordinal() for v in values]
+            )
+        else:
+            self.values = _int_column(
+                [0 if v is None else int(v) for v in values], _TYPECODES[kind]
+            )
+
+    def decode(self, index: int) -> Any:
+        """Return the Python value of one row"""
+        if self.mask is not None and not self.mask[index]:
+            return None
+        value = self.values[index]
+        kind = self.spec.kind
+        if kind is FieldKind.DECIMAL:
+            number = Decimal(value).scaleb(-(self.spec.places or 0))
+            return number.copy_negate() if self._negative_zero(index) else number
+        if kind is FieldKind.ENUM:
+            return self._members[value]
+        if kind is FieldKind.DATE:
+            return date.fromordinal(value)
+        if kind is FieldKind.BOOL:
+            return bool(value)
+        return value
+
+    def _negative_zero(self, index: int) -> bool:
+        rows = self.negative_zeros
+        position = bisect_left(rows, index)
+        return position < len(rows) and rows[position] == index
+
+    def format(self, values: Iterable[Any]) -> List[str]:
+        """Format the text of stored values, a whole column slice at a time"""
+        kind = self.spec.kind
+        if kind is FieldKind.TEXT:
+            return list(map(escape_text, values))
+        if kind is FieldKind.DECIMAL:
+            places = self.spec.places or 0
+            divisor = 10**places
+            pattern = f"%d.%0{places}d"
+            return [
+                pattern % divmod(v, divisor) if v >= 0 else format_scaled(v, places)
+                for v in values
+            ]
+        if kind is FieldKind.ENUM:
+            return list(map(self._texts.__getitem__, values))
+        if kind is FieldKind.DATE:
+            return list(map(_format_ordinal, values))
+        if kind is FieldKind.BOOL:
+            return list(map(("false", "true").__getitem__, values))
+        return list(map(str, values))
+
+    def render(
+        self, start: int, stop: int, indent: str, newline: str
+    ) -> Optional[List[str]]:
+        """Render the elements of rows start..stop
+
+        Rows without a value get an empty string. Returns None when no row
+        in the range has a value, so the column can be skipped entirely.
+        Only present values are formatted.
+        """
+        tag = self.spec.tag
+        open_tag = f"{indent}<{tag}>"
+        close_tag = f"</{tag}>{newline}"
+        empty_tag = f"{indent}<{tag}/>{newline}"
+        values = self.values[start:stop]
+        mask = None if self.mask is None else self.mask[start:stop]
+        if mask is None or 0 not in mask:
+            texts = self.format(values)
+        elif 1 in mask:
+            texts = self.format(compress(values, mask))
+        else:
+            return None
+
+        elements = [open_tag + t + close_tag if t else empty_tag for t in texts]
+        if mask is not None and len(elements) != len(mask):
+            present = iter(elements)
+            elements = [next(present) if flag else "" for flag in mask]
+        # Zeros rounded from negative values keep their sign, as in str()
+        rows = self.negative_zeros
+        first = bisect_left(rows, start)
+        if first < len(rows) and rows[first] < stop:
+            zero = format_scaled(0, self.spec.places or 0, negative=True)
+            for row in islice(rows, first, bisect_left(rows, stop, first)):
+                elements[row - start] = open_tag + zero + close_tag
+        return elements
+
+
+class AplikaceTable:
+    """Columnar container of Aplikace records
+
+    Build it with ``from_columns`` (one sequence per field) or
+    ``from_records``. Decimal columns are rounded to the precision the
+    Aplikace dataclass uses. Assign the table to ``Request.aplikace`` to
+    serialize it without materializing records.
+    """
+
+    spec: RecordSpec = APLIKACE_SPEC
+
+    def __init__(self) -> None:
+        record_fields = {f.name: f for f in fields(self.spec.cls)}
+        self._length = 0
+        self._columns = [
+            _Column(
+                field_spec,
+                record_fields[field_spec.name].default is not MISSING
+                or record_fields[field_spec.name].default_factory is not MISSING,
+            )
+            for field_spec in self.spec.fields
+        ]
+        self._by_name = {column.spec.name: column for column in self._columns}
+
+    @classmethod
+    def from_columns(cls, **columns: Sequence[Any]) -> "AplikaceTable":
+        """Create a table from one sequence of values per field
+
+        Omitted optional fields are treated as all None.
+        """
+        table = cls()
+        unknown = set(columns) - set(table._by_name)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns have different lengths")
+        length = lengths.pop() if lengths else 0
+
+        for column in table._columns:
+            values = columns.get(column.spec.name)
+            column.load([None] * length if values is None else values)
+        table._length = length
+        return table
+
+    @classmethod
+    def from_records(cls, records: Iterable[Aplikace]) -> "AplikaceTable":
+        """Create a table from Aplikace records"""
+        rows = list(records)
+        return cls.from_columns(
+            **{
+                field_spec.name: [getattr(row, field_spec.name) for row in rows]
+                for field_spec in cls.spec.fields
+            }
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Aplikace:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("AplikaceTable index out of range")
+        values = {column.spec.name: column.decode(index) for column in self._columns}
+        record: Aplikace = self.spec.cls(**values)
+        return record
+
+    def __iter__(self) -> Iterator[Aplikace]:
+        for index in range(self._length):
+            yield self[index]
+
+    def column(self, name: str) -> List[Any]:
+        """Return the decoded values of one column"""
+        column = self._by_name[name]
+        return [column.decode(index) for index in range(self._length)]
+
+    def iter_xml(
+        self, indent: str, step: str, newline: str, chunk_size: int = 4096
+    ) -> Iterator[str]:
+        """Yield the serialized records in chunks of rows
+
+        Each chunk is rendered one column at a time and then stitched into
+        rows, matching the output of XMLBuilder for the same records.
+        """
+        tag = self.spec.tag
+        open_record = f"{indent}<{tag}>{newline}"
+        close_record = f"{indent}</{tag}>{newline}"
+        field_indent = indent + step
+        for start in range(0, self._length, chunk_size):
+            stop = min(start + chunk_size, self._length)
+            count = stop - start
+            rendered: List[Iterable[str]] = [repeat(open_record, count)]
+            for column in self._columns:
+                elements = column.render(start, stop, field_indent, newline)
+                if elements is not None:
+                    rendered.append(elements)
+            rendered.append(repeat(close_record, count))
+            yield "".join(map("".join, zip(*rendered)))
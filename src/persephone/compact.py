@@ -0,0 +1,45 @@
+"""
+Compact record classes for large in-memory datasets
+
+The classes here are drop-in replacements for the model dataclasses of
+persephone.xml_builder with the same constructor, attributes, defaults and
+rounding. They declare ``__slots__`` instead of carrying a per-instance
+``__dict__``; benchmarks/bench_memory.py reports the bytes saved per record.
+Everything that reads records by attribute, such as XMLBuilder, accepts
+them as is. Note that a compact record never compares equal to the
+corresponding regular dataclass instance.
+"""
+
+from dataclasses import fields
+from typing import Any, Dict, Type, TypeVar
+
+from . import xml_builder
+
+_T = TypeVar("_T")
+
+
+def _with_slots(cls: Type[_T]) -> Type[_T]:
+    """Recreate a dataclass with ``__slots__`` for its fields
+
+    The generated ``__init__`` already holds the field defaults, so the class
+    attributes that store them are dropped to make room for the slots.
+    """
+    names = tuple(f.name for f in fields(cls))  # type: ignore[arg-type]
+    namespace: Dict[str, Any] = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    namespace["__module__"] = __name__
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+Vymera = _with_slots(xml_builder.Vymera)
+Pestovani = _with_slots(xml_builder.Pestovani)
+Osev = _with_slots(xml_builder.Osev)
+Aplikace = _with_slots(xml_builder.Aplikace)
+Sklizen = _with_slots(xml_builder.Sklizen)
+Pastva = _with_slots(xml_builder.Pastva)
+
+__all__ = ["Aplikace", "Osev", "Pastva", "Pestovani", "Sklizen", "Vymera"]
@@ -0,0 +1,140 @@
+"""
+Canonical content hashes of requests and records
+
+The hashes are computed from the dataclass fields through the field schema,
+without building XML, and are stable across processes, platforms and
+Python versions. Each record is encoded as the values of its fields in
+schema order, formatted as for serialization, so records with equal field
+values hash alike however the document is laid out (pretty or compact). Use
+them to skip rebuilding or resubmitting a request that was already handled.
+"""
+
+import hashlib
+from datetime import date
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, List
+
+from .xml_builder import (
+    REQUEST_HEADER,
+    REQUEST_SECTIONS,
+    FieldKind,
+    FieldSpec,
+    RecordSpec,
+    Request,
+)
+
+# Part of every digest; change it whenever the encoding below changes
+HASH_VERSION = b"persephone-1"
+
+# Separators of the canonical encoding. Text is encoded with ascii(), which
+# escapes control characters, and no other formatted value contains one.
+_FIELD = "\x1f"
+_LIST = "\x1e"
+_ITEM = "\x1d"
+_RECORD = "\x1c"
+
+# Records encoded before each update of a request digest
+_BATCH = 1024
+
+_HEADER = RecordSpec("Request", Request, REQUEST_HEADER)
+
+Encoder = Callable[[Any], str]
+
+
+def _value_encoder(spec: FieldSpec) -> Encoder:
+    """Return the function formatting a non-None value of a field"""
+    if spec.item is not None:
+        encode_item = record_encoder(spec.item)
+
+        def encode_items(items: Any) -> str:
+            return _LIST + _ITEM.join(map(encode_item, items)) + _LIST
+
+        return encode_items
+    if spec.kind is FieldKind.TEXT:
+        return ascii
+    if spec.kind is FieldKind.ENUM:
+        assert spec.enum is not None
+        # A dict lookup is much cheaper than the Enum.value property
+        return {member: member.value for member in spec.enum}.__getitem__
+    if spec.kind is FieldKind.DATE:
+        return date.isoformat
+    if spec.kind is FieldKind.BOOL:
+        return {True: "true", False: "false"}.__getitem__
+    return str
+
+
+@lru_cache(maxsize=None)
+def record_encoder(spec: RecordSpec) -> Encoder:
+    """Return a function encoding a record of spec as canonical text
+
+    A missing value encodes as an empty string and a list as its items
+    between _LIST markers, so None, an empty list and empty text stay
+    distinct. Nested records are encoded inside their parent.
+    """
+    encoders = tuple(_value_encoder(field_spec) for field_spec in spec.fields)
+    get_values = attrgetter(*(field_spec.name for field_spec in spec.fields))
+    if len(encoders) == 1:
+        (encode_value,) = encoders
+
+        def encode_single(record: Any) -> str:
+            value = get_values(record)
+            return "" if value is None else encode_value(value)
+
+        return encode_single
+
+    def encode(record: Any) -> str:
+        return _FIELD.join(
+            [
+                "" if value is None else encode_value(value)
+                for encode_value, value in zip(encoders, get_values(record))
+            ]
+        )
+
+    return encode
+
+
+@lru_cache(maxsize=None)
+def record_hasher(spec: RecordSpec) -> Callable[[Any], bytes]:
+    """Return a function computing the 16-byte digest of a record of spec"""
+    encode = record_encoder(spec)
+    blake2b = hashlib.blake2b
+    prefix = HASH_VERSION + spec.tag.encode("ascii") + b"\0"
+
+    def digest(record: Any) -> bytes:
+        return blake2b(prefix + encode(record).encode("utf-8"), digest_size=16).digest()
+
+    return digest
+
+
+def hash_record(spec: RecordSpec, record: Any) -> str:
+    """Return the hex digest of a record of spec"""
+    return record_hasher(spec)(record).hex()
+
+
+def hash_request(request: Request) -> str:
+    """Return the hex digest of a request
+
+    Records are encoded section by section and fed to a single digest in
+    batches, which is cheaper than combining per-record digests. Sections
+    that are generators are consumed.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    update = digest.update
+    update(HASH_VERSION + b"Request\0")
+    update(record_encoder(_HEADER)(request).encode("utf-8"))
+    for spec in REQUEST_SECTIONS:
+        assert spec.item is not None
+        encode = record_encoder(spec.item)
+        # Each section starts with \x00 and each record with _RECORD, so
+        # records cannot move between sections unnoticed
+        update(b"\0")
+        batch: List[str] = [""]
+        for record in getattr(request, spec.name) or ():
+            batch.append(encode(record))
+            if len(batch) > _BATCH:
+                update(_RECORD.join(batch).encode("utf-8"))
+                batch = [""]
+        if len(batch) > 1:
+            update(_RECORD.join(batch).encode("utf-8"))
+    return digest.hexdigest()
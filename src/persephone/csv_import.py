@@ -0,0 +1,329 @@
+"""
+Streaming import of large CSV exports of Aplikace, Sklizen and Pastva records
+
+Farm-management systems export applications, harvests and grazing as one
+record per row. CSVImporter reads such a file row by row, maps its columns
+to the fields of one record type and yields the records in chunks, so a
+file of millions of rows never has to be held in memory and can be passed
+straight to XMLBuilder.write_request::
+
+    importer = CSVImporter(APLIKACE_SPEC, {"typ": "Type", "id_plodina": "Crop"})
+    request = Request(typ=TypRequest.S, osevy=osevy,
+                      aplikace=importer.iter_records("applications.csv"))
+    XMLBuilder().write_request(request, fp)
+    for error in importer.errors:
+        print(error)
+
+Values use the forms they take in the XML, as in persephone.inputs. Rows
+with an invalid or missing value are skipped and reported in ``errors``
+instead of stopping the import.
+"""
+
+import csv
+from dataclasses import MISSING, dataclass, fields
+from decimal import Decimal
+from itertools import islice
+from os import PathLike
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .gc_pause import paused_gc
+from .xml_builder import FieldKind, FieldSpec, RecordSpec
+from .xml_parser import enum_members, value_parser
+
+Source = Union[str, "PathLike[str]", IO[str]]
+
+# Distinct values remembered per field
+MEMO_SIZE = 65536
+
+Parser = Callable[[str], Any]
+
+
+@dataclass
+class RowError:
+    """A row that could not be imported"""
+
+    line: int
+    message: str
+    field: Optional[str] = None
+    value: Optional[str] = None
+
+    def __str__(self) -> str:
+        text = f"line {self.line}: {self.message}"
+        if self.field is not None:
+            text = f"line {self.line}: {self.field}: {self.message}"
+        if self.value is not None:
+            text += f" {self.value!r}"
+        return text
+
+
+class _Memo(Dict[str, Any]):
+    """Parsed values by their text, forgotten when MEMO_SIZE is reached
+
+    Lookups of known text stay in C; only a miss calls ``__missing__``.
+    Empty text is always None.
+    """
+
+    def __init__(self, parse: Callable[[str], Any]) -> None:
+        super().__init__({"": None})
+        self.parse = parse
+
+    def __missing__(self, text: str) -> Any:
+        value = self.parse(text)
+        if len(self) >= MEMO_SIZE:
+            self.clear()
+            self[""] = None
+        self[text] = value
+        return value
+
+
+def _text(text: str) -> Optional[str]:
+    return text or None
+
+
+def _value_parser(spec: FieldSpec) -> Callable[[str], Any]:
+    """Return the parser of the text of a field, giving None for empty text
+
+    Every parser but that of text is the lookup of a dict, so converting a
+    column is a ``map`` that only leaves C for text not seen recently.
+    """
+    if spec.enum is not None:
+        return {"": None, **enum_members(spec.enum)}.__getitem__
+    if spec.kind is FieldKind.BOOL:
+        return {"": None, "true": True, "false": False}.__getitem__
+    if spec.kind is FieldKind.DECIMAL and spec.places is not None:
+        places = spec.places
+        # Rounded once per distinct text, as the dataclass __post_init__ would
+        return _Memo(lambda text: round(Decimal(text), places)).__getitem__
+    if spec.kind is FieldKind.TEXT:
+        return _text
+    return _Memo(value_parser(spec)).__getitem__
+
+
+def _record_factory(cls: Type[Any], names: List[str]) -> Callable[[Sequence[Any]], Any]:
+    """Return a function creating a record from its values in field order
+
+    Values are already converted and rounded, so the dataclass ``__init__``
+    and ``__post_init__`` are bypassed. Slotted classes such as those of
+    persephone.compact get their slots set one by one.
+    """
+    new = object.__new__
+    if hasattr(cls, "__slots__"):
+
+        def create_slotted(values: Sequence[Any]) -> Any:
+            record = new(cls)
+            for name, value in zip(names, values):
+                setattr(record, name, value)
+            return record
+
+        return create_slotted
+
+    def create(values: Sequence[Any]) -> Any:
+        record = new(cls)
+        record.__dict__.update(zip(names, values))
+        return record
+
+    return create
+
+
+class CSVImporter:
+    """Reads records of one type from CSV files with a column mapping
+
+    ``columns`` maps field names of ``spec`` to CSV column headers, which
+    must all be present; by default every field is read from the column of
+    the same name, if any. Fields without a column are None.
+    ``record_class`` replaces the dataclass of ``spec``, e.g. with a
+    slotted class from persephone.compact.
+
+    Import errors of the last file read are collected in ``errors``;
+    ``rows`` counts its data rows. With ``pause_gc`` the cyclic garbage
+    collector is paused while each chunk is converted (see gc_pause), which
+    is faster but affects the whole process.
+    """
+
+    def __init__(
+        self,
+        spec: RecordSpec,
+        columns: Optional[Mapping[str, str]] = None,
+        record_class: Optional[Type[Any]] = None,
+        chunk_size: int = 4096,
+        delimiter: str = ",",
+        encoding: str = "utf-8",
+        pause_gc: bool = False,
+    ) -> None:
+        if any(field_spec.item is not None for field_spec in spec.fields):
+            raise ValueError(f"{spec.tag} has nested records and cannot be imported")
+        names = [field_spec.name for field_spec in spec.fields]
+        unknown = set(columns or ()) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        record_fields = {f.name: f for f in fields(spec.cls)}
+        self.spec = spec
+        self.columns = None if columns is None else dict(columns)
+        self.chunk_size = chunk_size
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.pause_gc = pause_gc
+        self.errors: List[RowError] = []
+        self.rows = 0
+        self._parsers = [_value_parser(field_spec) for field_spec in spec.fields]
+        self._required = [
+            position
+            for position, name in enumerate(names)
+            if record_fields[name].default is MISSING
+            and record_fields[name].default_factory is MISSING
+        ]
+        self._create = _record_factory(record_class or spec.cls, names)
+
+    def _steps(self, header: List[str]) -> List[Tuple[Optional[int], Parser]]:
+        """Return the column index, or None, and parser of every field"""
+        positions = {name: index for index, name in enumerate(header)}
+        columns = self.columns
+        if columns is None:
+            columns = {name: name for name in positions}
+        else:
+            missing = sorted(
+                column for column in columns.values() if column not in positions
+            )
+            if missing:
+                raise ValueError(f"Missing columns: {', '.join(missing)}")
+        return [
+            (
+                (
+                    positions[columns[field_spec.name]]
+                    if field_spec.name in columns
+                    else None
+                ),
+                parse,
+            )
+            for field_spec, parse in zip(self.spec.fields, self._parsers)
+        ]
+
+    def _convert_chunk(
+        self, rows: Sequence[List[str]], steps: List[Tuple[Optional[int], Parser]]
+    ) -> Optional[List[Any]]:
+        """Convert rows one column at a time, or return None if any is invalid"""
+        try:
+            with paused_gc(self.pause_gc):
+                columns = list(zip(*rows))
+                nothing = [None] * len(rows)
+                values: List[List[Any]] = []
+                for index, parse in steps:
+                    if index is None:
+                        values.append(nothing)
+                    elif parse is _text:
+                        values.append([text or None for text in columns[index]])
+                    else:
+                        values.append(list(map(parse, columns[index])))
+                for position in self._required:
+                    if None in values[position]:
+                        return None
+                return list(map(self._create, zip(*values)))
+        except (KeyError, ValueError, ArithmeticError):
+            return None
+
+    def _convert_rows(
+        self,
+        rows: Sequence[List[str]],
+        steps: List[Tuple[Optional[int], Parser]],
+        width: int,
+        lines: Sequence[int],
+    ) -> List[Any]:
+        """Convert rows one at a time, recording the errors of invalid rows
+
+        ``lines`` holds the line on which each row starts.
+        """
+        records = []
+        names = [field_spec.name for field_spec in self.spec.fields]
+        for line, row in zip(lines, rows):
+            if len(row) != width:
+                if any(row):
+                    self.errors.append(
+                        RowError(line, f"expected {width} columns, found {len(row)}")
+                    )
+                continue
+            values: List[Any] = []
+            for name, (index, parse) in zip(names, steps):
+                if index is None:
+                    values.append(None)
+                    continue
+                try:
+                    values.append(parse(row[index]))
+                except (KeyError, ValueError, ArithmeticError):
+                    self.errors.append(
+                        RowError(line, "invalid value", name, row[index])
+                    )
+                    break
+            else:
+                for position in self._required:
+                    if values[position] is None:
+                        self.errors.append(
+                            RowError(line, "missing value", names[position])
+                        )
+                        break
+                else:
+                    records.append(self._create(values))
+        return records
+
+    def iter_chunks(self, source: Source) -> Iterator[List[Any]]:
+        """Yield the records of a CSV file or text stream in lists
+
+        Each list holds up to ``chunk_size`` records. A path is opened and
+        closed here; a stream is read from its current position.
+        """
+        if hasattr(source, "read"):
+            yield from self._read(source)  # type: ignore[arg-type]
+            return
+        with open(
+            source, encoding=self.encoding, newline=""  # type: ignore[arg-type]
+        ) as fp:
+            yield from self._read(fp)
+
+    def iter_records(self, source: Source) -> Iterator[Any]:
+        """Yield the records of a CSV file or text stream one at a time"""
+        for chunk in self.iter_chunks(source):
+            yield from chunk
+
+    def _read(self, fp: IO[str]) -> Iterator[List[Any]]:
+        self.errors = []
+        self.rows = 0
+        reader = csv.reader(fp, delimiter=self.delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        steps = self._steps(header)
+        width = len(header)
+        # Rows with the line they end on, which differs from their number
+        # once a quoted value spans several lines
+        numbered = ((row, reader.line_num) for row in reader)
+        last = reader.line_num
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                return
+            rows, ends = zip(*chunk)
+            records = None
+            if set(map(len, rows)) == {width}:
+                records = self._convert_chunk(rows, steps)
+            if records is None:
+                # Only chunks with a bad row pay for converting row by row
+                starts = [last + 1, *(end + 1 for end in ends[:-1])]
+                records = self._convert_rows(rows, steps, width, starts)
+                self.rows += sum(1 for row in rows if any(row))
+            else:
+                self.rows += len(rows)
+            last = ends[-1]
+            if records:
+                yield records
@@ -0,0 +1,90 @@
+"""
+Cache of serialized record fragments for incremental rebuilds
+
+Successive submissions for the same farm usually differ in a handful of
+records. A FragmentCache passed to XMLBuilder keeps the serialized XML of
+each Osev (including its Vymery and Pestovani) and each Aplikace, Sklizen
+and Pastva keyed by the record's content, so unchanged records are copied
+from the cache instead of being serialized again.
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from .content_hash import record_hasher
+from .xml_builder import RecordSpec, Writer
+
+CacheKey = Tuple[Writer, bytes]
+
+# Memory held by an entry besides its fragment: the ordered dict node and
+# the key tuple with its 16-byte digest, measured on CPython 3.11
+_ENTRY_OVERHEAD = 200
+
+
+class FragmentCache:
+    """LRU cache of serialized records bounded by a memory budget
+
+    Records are keyed by the 16-byte digest of their canonical encoding
+    (see content_hash), so a key is small whatever the record holds and two
+    records share a key only when they serialize the same. The size of an
+    entry is the in-memory size of its fragment plus a fixed overhead for
+    the key, so max_bytes bounds the memory the cache holds, give or take
+    the interpreter's allocator. A cache may be shared by several builders;
+    fragments are keyed by layout as well as content.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[CacheKey, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def clear(self) -> None:
+        self._fragments.clear()
+        self.size = 0
+
+    def _store(self, key: CacheKey, fragment: str) -> None:
+        size = sys.getsizeof(fragment) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        fragments = self._fragments
+        fragments[key] = fragment
+        self.size += size
+        getsizeof = sys.getsizeof
+        while self.size > self.max_bytes:
+            _, evicted = fragments.popitem(last=False)
+            self.size -= getsizeof(evicted) + _ENTRY_OVERHEAD
+
+    def render_records(
+        self, spec: RecordSpec, records: Iterable[Any], write_record: Writer
+    ) -> Iterator[str]:
+        """Yield the serialized records, serializing only cache misses"""
+        digest = record_hasher(spec)
+        fragments = self._fragments
+        parts: List[str] = []
+        for record in records:
+            try:
+                key = (write_record, digest(record))
+                fragment = fragments.get(key)
+                cacheable = True
+            except (TypeError, AttributeError, KeyError):
+                # Values the builder cannot write either, let it report them
+                fragment = None
+                cacheable = False
+
+            if fragment is not None:
+                self.hits += 1
+                fragments.move_to_end(key)
+            else:
+                self.misses += 1
+                write_record(record, parts.append)
+                fragment = "".join(parts)
+                parts.clear()
+                if cacheable:
+                    self._store(key, fragment)
+            yield fragment
@@ -0,0 +1,165 @@
+"""
+Request definitions from JSON and CSV files
+
+Both formats use the dataclass field names of persephone.xml_builder and are
+converted with the same field schema the builder uses. Values may be given
+as strings in the form they take in the XML (``2025-03-15``, ``10.50``,
+``true``, enum values such as ``HLA``) or, in JSON, as native numbers and
+booleans. Missing keys and empty values are treated as None.
+
+A JSON file holds one request object or a list of them; nested records are
+nested objects and lists. A CSV file holds one record per row with a
+``record`` column naming its type (``Request``, ``RozsahDat``, ``Osev``,
+``Vymera``, ``Pestovani``, ``Aplikace``, ``Sklizen`` or ``Pastva``). Every
+``Request`` row starts a new request; ``Vymera`` and ``Pestovani`` rows
+belong to the preceding ``Osev``.
+"""
+
+import csv
+import json
+from decimal import Decimal
+from functools import lru_cache
+from os import PathLike
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from .xml_builder import REQUEST_SPEC, FieldKind, FieldSpec, RecordSpec, Request
+from .xml_parser import value_parser
+
+PathType = Union[str, "PathLike[str]"]
+
+
+def _convert_value(spec: FieldSpec, value: Any) -> Any:
+    """Convert a scalar JSON or CSV value to the type of a field"""
+    if spec.enum is not None:
+        if isinstance(value, spec.enum):
+            return value
+        return value_parser(spec)(value)
+    if isinstance(value, str):
+        return value_parser(spec)(value)
+    kind = spec.kind
+    if kind is FieldKind.DECIMAL and isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if kind is FieldKind.INT and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is FieldKind.BOOL and isinstance(value, bool):
+        return value
+    raise ValueError(f"unexpected {type(value).__name__}")
+
+
+def _record_from_dict(spec: RecordSpec, data: Mapping[str, Any], path: str) -> Any:
+    """Convert a mapping of field names to values into a record of spec"""
+    if not isinstance(data, Mapping):
+        raise ValueError(f"{path}: expected an object, found {data!r}")
+    fields = _fields_by_name(spec)
+    values: Dict[str, Any] = {}
+    for name, value in data.items():
+        field_spec = fields.get(name)
+        if field_spec is None:
+            raise ValueError(f"{path}: unknown field {name!r} of {spec.tag}")
+        if value is None or value == "":
+            continue
+        field_path = f"{path}.{name}" if path else name
+        item = field_spec.item
+        if item is None:
+            try:
+                values[name] = _convert_value(field_spec, value)
+            except (KeyError, ValueError, ArithmeticError):
+                raise ValueError(f"{field_path}: invalid value {value!r}") from None
+        else:
+            if isinstance(value, (str, Mapping)) or not hasattr(value, "__iter__"):
+                raise ValueError(f"{field_path}: expected a list, found {value!r}")
+            if len(item.fields) == 1:
+                # Single-field items such as RozsahDat may be given as bare values
+                only = item.fields[0].name
+                value = [v if isinstance(v, Mapping) else {only: v} for v in value]
+            values[name] = [
+                _record_from_dict(item, entry, f"{field_path}[{i}]")
+                for i, entry in enumerate(value)
+            ]
+    try:
+        return spec.cls(**values)
+    except TypeError as e:
+        raise ValueError(f"{path or spec.tag}: incomplete {spec.tag}: {e}") from None
+
+
+@lru_cache(maxsize=None)
+def _fields_by_name(spec: RecordSpec) -> Dict[str, FieldSpec]:
+    return {field_spec.name: field_spec for field_spec in spec.fields}
+
+
+def request_from_dict(data: Mapping[str, Any]) -> Request:
+    """Create a Request from a mapping such as a decoded JSON object
+
+    Raises ValueError naming the path of the first invalid value, for example
+    ``osevy[0].vymery[1].vymera: invalid value 'x'``.
+    """
+    request: Request = _record_from_dict(REQUEST_SPEC, data, "")
+    return request
+
+
+def load_json(path: PathType) -> List[Request]:
+    """Load the requests defined in a JSON file"""
+    with open(path, encoding="utf-8") as fp:
+        data = json.load(fp)
+    if isinstance(data, list):
+        return [
+            _record_from_dict(REQUEST_SPEC, entry, f"[{i}]")
+            for i, entry in enumerate(data)
+        ]
+    return [request_from_dict(data)]
+
+
+def _csv_records() -> Dict[str, Tuple[RecordSpec, str, bool]]:
+    """Map CSV record names to (schema, holding field, nested in an Osev)"""
+    records = {REQUEST_SPEC.tag: (REQUEST_SPEC, "", False)}
+    for section in REQUEST_SPEC.fields:
+        if section.item is None:
+            continue
+        records[section.item.tag] = (section.item, section.name, False)
+        for nested in section.item.fields:
+            if nested.item is not None:
+                records[nested.item.tag] = (nested.item, nested.name, True)
+    return records
+
+
+_CSV_RECORDS = _csv_records()
+
+
+def load_csv(path: PathType) -> List[Request]:
+    """Load the requests defined in a CSV file"""
+    requests: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    owner: Optional[Dict[str, Any]] = None
+    with open(path, encoding="utf-8", newline="") as fp:
+        for line, row in enumerate(csv.DictReader(fp), start=2):
+            record = (row.pop("record", None) or "").strip()
+            values = {k: v for k, v in row.items() if k and v not in (None, "")}
+            try:
+                spec, name, nested = _CSV_RECORDS[record]
+            except KeyError:
+                raise ValueError(
+                    f"line {line}: unknown record type {record!r}"
+                ) from None
+
+            if spec is REQUEST_SPEC:
+                current = values
+                owner = None
+                requests.append(current)
+            elif current is None:
+                raise ValueError(f"line {line}: {record} before the first Request")
+            elif nested:
+                if owner is None:
+                    raise ValueError(f"line {line}: {record} outside of an Osev")
+                owner.setdefault(name, []).append(values)
+            else:
+                current.setdefault(name, []).append(values)
+                if any(field_spec.item for field_spec in spec.fields):
+                    owner = values
+
+    return [
+        _record_from_dict(REQUEST_SPEC, data, f"request {i}")
+        for i, data in enumerate(requests, start=1)
+    ]
+
+
+LOADERS = {".json": load_json, ".csv": load_csv}
@@ -0,0 +1,333 @@
+"""
+Durable outbox of request documents awaiting submission
+
+Outbox keeps encoded request documents in a SQLite database in WAL mode,
+keyed by the SHA-256 hash of their content, together with their submission
+state and the GUID returned by the service. Adding a document that is
+already in the outbox is a no-op, so regenerating a batch never submits an
+accepted document twice, and ``drain`` after a restart only submits what is
+still pending. Requests are also recorded by their content hash (see
+persephone.content_hash), so a request added again is not even rebuilt.
+Submission is at least once: a document whose response was lost in a crash
+is submitted again.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from enum import Enum
+from types import TracebackType
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .content_hash import hash_request
+from .submission import RETRY_STATUSES, SubmissionClient
+from .xml_builder import REQUEST_SECTIONS, Request, XMLBuilder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    hash TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    state TEXT NOT NULL,
+    guid TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    request_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS submissions_state ON submissions (state);
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS submissions_request ON submissions (request_hash);
+"""
+
+
+class OutboxState(Enum):
+    """Submission state of an outbox entry"""
+
+    PENDING = "pending"  # Not yet accepted; submitted by the next drain
+    ACCEPTED = "accepted"  # Accepted by the service, guid is set
+    FAILED = "failed"  # Rejected by the service; see error
+
+
+@dataclass
+class OutboxEntry:
+    """State of one document in the outbox"""
+
+    hash: str
+    state: OutboxState
+    guid: Optional[str]
+    attempts: int
+    error: Optional[str]
+
+
+@dataclass
+class DrainReport:
+    """Counts of documents submitted by one Outbox.drain"""
+
+    accepted: int = 0
+    failed: int = 0
+    pending: int = 0
+
+    @property
+    def submitted(self) -> int:
+        return self.accepted + self.failed + self.pending
+
+
+# (state, guid, attempts, error, updated, hash) parameters of an update
+_Update = Tuple[str, Optional[str], int, Optional[str], float, str]
+
+
+def payload_hash(payload: bytes) -> str:
+    """Return the content hash identifying a document in the outbox"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class Outbox:
+    """SQLite-backed queue of documents and their submission state
+
+    Use it as a context manager, or call ``close()``::
+
+        with Outbox("outbox.sqlite") as outbox:
+            outbox.add_requests(requests)
+            async with SubmissionClient(url) as client:
+                report = await outbox.drain(client)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a power loss may only lose the latest transactions
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        columns = {
+            row[1] for row in self._connection.execute("PRAGMA table_info(submissions)")
+        }
+        if "request_hash" not in columns:
+            # Outbox created before requests were recorded by content hash
+            self._connection.execute(
+                "ALTER TABLE submissions ADD COLUMN request_hash TEXT"
+            )
+        self._connection.executescript(_INDEXES)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "Outbox":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def add_payloads(self, payloads: Iterable[bytes]) -> List[str]:
+        """Add encoded documents in one transaction and return their hashes
+
+        Documents already in the outbox keep their state.
+        """
+        rows = [(payload, None) for payload in payloads]
+        return self._insert(rows)
+
+    def _insert(self, rows: Sequence[Tuple[bytes, Optional[str]]]) -> List[str]:
+        """Insert (payload, request hash) rows and return the payload hashes"""
+        now = time.time()
+        keys = [payload_hash(payload) for payload, _ in rows]
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO submissions (hash, payload, state, updated, request_hash)"
+                " VALUES (?, ?, ?, ?, ?) ON CONFLICT (hash) DO UPDATE SET"
+                " request_hash = COALESCE(request_hash, excluded.request_hash)",
+                [
+                    (key, payload, OutboxState.PENDING.value, now, request_key)
+                    for key, (payload, request_key) in zip(keys, rows)
+                ],
+            )
+        return keys
+
+    def add_requests(
+        self, requests: Iterable[Request], builder: Optional[XMLBuilder] = None
+    ) -> List[str]:
+        """Build requests and add their documents, returning their hashes
+
+        A request whose content hash is already recorded is not built again.
+        Requests with generator sections cannot be hashed without consuming
+        them and are always built.
+        """
+        builder = builder or XMLBuilder(pretty=False)
+        # Payload hash of each request, or the index of its row to insert
+        keys: List[Union[str, int]] = []
+        rows: List[Tuple[bytes, Optional[str]]] = []
+        building: Dict[str, int] = {}
+        for request in requests:
+            request_key = None
+            if all(
+                hasattr(getattr(request, spec.name), "__len__")
+                for spec in REQUEST_SECTIONS
+            ):
+                request_key = hash_request(request)
+                if request_key in building:
+                    keys.append(building[request_key])
+                    continue
+                row = self._connection.execute(
+                    "SELECT hash FROM submissions WHERE request_hash = ? LIMIT 1",
+                    (request_key,),
+                ).fetchone()
+                if row is not None:
+                    keys.append(row[0])
+                    continue
+                building[request_key] = len(rows)
+            keys.append(len(rows))
+            rows.append((builder.build_request_bytes(request), request_key))
+        added = self._insert(rows)
+        return [added[key] if isinstance(key, int) else key for key in keys]
+
+    def get(self, key: str) -> Optional[OutboxEntry]:
+        """Return the entry of a document hash, or None"""
+        row = self._connection.execute(
+            "SELECT hash, state, guid, attempts, error FROM submissions"
+            " WHERE hash = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return OutboxEntry(row[0], OutboxState(row[1]), row[2], row[3], row[4])
+
+    def payload(self, key: str) -> Optional[bytes]:
+        row = self._connection.execute(
+            "SELECT payload FROM submissions WHERE hash = ?", (key,)
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def counts(self) -> Dict[OutboxState, int]:
+        """Return the number of entries in each state"""
+        counts = dict.fromkeys(OutboxState, 0)
+        for state, count in self._connection.execute(
+            "SELECT state, COUNT(*) FROM submissions GROUP BY state"
+        ):
+            counts[OutboxState(state)] = count
+        return counts
+
+    def retry_failed(self) -> int:
+        """Return failed entries to pending and return how many there were"""
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE submissions SET state = ?, updated = ? WHERE state = ?",
+                (OutboxState.PENDING.value, time.time(), OutboxState.FAILED.value),
+            )
+        return cursor.rowcount
+
+    def _pending(self, batch_size: int) -> Iterator[Tuple[str, bytes]]:
+        """Yield the pending entries present when iteration started
+
+        Entries are read batch_size at a time, after the last one yielded,
+        so an entry left pending by a failed submission is not revisited.
+        """
+        last = 0
+        while True:
+            rows = self._connection.execute(
+                "SELECT rowid, hash, payload FROM submissions"
+                " WHERE state = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (OutboxState.PENDING.value, last, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for rowid, key, payload in rows:
+                yield key, bytes(payload)
+            last = rows[-1][0]
+
+    def _flush(self, updates: List[_Update]) -> None:
+        """Record submission outcomes in one transaction"""
+        if not updates:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE submissions SET state = ?, guid = ?,"
+                " attempts = attempts + ?, error = ?, updated = ? WHERE hash = ?",
+                updates,
+            )
+        updates.clear()
+
+    async def drain(
+        self, client: SubmissionClient, batch_size: int = 500, flush_size: int = 100
+    ) -> DrainReport:
+        """Submit every pending document once and record the outcomes
+
+        ``client.concurrency`` workers submit documents read from the
+        database ``batch_size`` at a time. Outcomes are written in bulk every
+        ``flush_size`` submissions and when the drain ends, even if it is
+        cancelled. Documents the service rejects are marked failed; those
+        that ran out of retries on transient errors stay pending for the
+        next drain.
+        """
+        report = DrainReport()
+        updates: List[_Update] = []
+        queue: "asyncio.Queue[Optional[Tuple[str, bytes]]]" = asyncio.Queue(
+            maxsize=batch_size
+        )
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                key, payload = item
+                try:
+                    response, attempts = await client.submit_payload(payload)
+                except Exception as e:
+                    # Any error but a rejection leaves the document pending
+                    status = getattr(e, "status", None)
+                    if status is not None and status not in RETRY_STATUSES:
+                        state = OutboxState.FAILED
+                        report.failed += 1
+                    else:
+                        state = OutboxState.PENDING
+                        report.pending += 1
+                    error = str(e) or type(e).__name__
+                    attempts = getattr(e, "attempts", 1)
+                    updates.append(
+                        (state.value, None, attempts, error, time.time(), key)
+                    )
+                else:
+                    report.accepted += 1
+                    updates.append(
+                        (
+                            OutboxState.ACCEPTED.value,
+                            response.guid_podani,
+                            attempts,
+                            None,
+                            time.time(),
+                            key,
+                        )
+                    )
+                if len(updates) >= flush_size:
+                    self._flush(updates)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(client.concurrency)]
+        try:
+            for item in self._pending(batch_size):
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._flush(updates)
+        return report
@@ -0,0 +1,280 @@
+"""
+Validity periods of Osev, Vymera and Pestovani records
+
+Control (K) requests cover a period, ``obdobi_od`` to ``obdobi_do``, and
+should hold only the Osevy, Vymery and Pestovani valid at some time within
+it. ValidityIndex keeps an interval tree per record type over the
+``platnost_od``/``platnost_do`` of a farm's records, so each period is
+answered in logarithmic time plus the size of the answer instead of a scan
+of the whole farm, and builds the request of every period from one index:
+
+    index = ValidityIndex(farm.osevy)
+    for request in index.requests(periods, template=farm):
+        builder.write_request(request, ...)
+
+A record without ``platnost_do`` is valid from ``platnost_od`` on; both
+ends of a period and of a validity are inclusive.
+"""
+
+import copy
+import dataclasses
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .gc_pause import paused_gc
+from .xml_builder import Osev, Pestovani, Request, TypRequest, Vymera
+
+# Ordinal of the end of records valid indefinitely
+_OPEN_END = date.max.toordinal()
+
+_new = object.__new__
+
+
+class _Node:
+    """Intervals of an interval tree containing the center of the node
+
+    ``starts`` holds the start of each interval in ascending order with
+    ``by_start`` the matching ids; ``ends`` the negated ends in ascending
+    order, i.e. ends descending, with ``by_end`` the ids. Intervals wholly
+    before the center are in ``left``, wholly after it in ``right``.
+    """
+
+    __slots__ = ("center", "starts", "by_start", "ends", "by_end", "left", "right")
+
+    def __init__(self, center: int) -> None:
+        self.center = center
+        self.starts: List[int] = []
+        self.by_start: List[int] = []
+        self.ends: List[int] = []
+        self.by_end: List[int] = []
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+
+def _build(intervals: List[Tuple[int, int, int]]) -> Optional[_Node]:
+    """Build a tree over (start, end, id) intervals sorted by start
+
+    The center of each node is the median start, so neither subtree holds
+    more than half of the intervals and the depth is logarithmic.
+    """
+    if not intervals:
+        return None
+    center = intervals[len(intervals) // 2][0]
+    node = _Node(center)
+    left = []
+    right = []
+    here = []
+    for interval in intervals:
+        if interval[1] < center:
+            left.append(interval)
+        elif interval[0] > center:
+            right.append(interval)
+        else:
+            here.append(interval)
+    node.starts = [start for start, _, _ in here]
+    node.by_start = [ident for _, _, ident in here]
+    here.sort(key=lambda interval: -interval[1])
+    node.ends = [-end for _, end, _ in here]
+    node.by_end = [ident for _, _, ident in here]
+    node.left = _build(left)
+    node.right = _build(right)
+    return node
+
+
+class _IntervalTree:
+    """Static centered interval tree over closed integer intervals"""
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, int]]) -> None:
+        self.root = _build(sorted(intervals))
+
+    def overlapping(self, low: int, high: int) -> List[int]:
+        """Return the ids of the intervals overlapping [low, high], unordered"""
+        found: List[int] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if high < node.center:
+                # Every interval here ends at or after the center
+                found.extend(node.by_start[: bisect_right(node.starts, high)])
+                stack.append(node.left)
+            elif low > node.center:
+                # Every interval here starts at or before the center
+                found.extend(node.by_end[: bisect_right(node.ends, -low)])
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return found
+
+
+def _validity(record: Any, ident: int) -> Tuple[int, int, int]:
+    end = record.platnost_do
+    return (
+        record.platnost_od.toordinal(),
+        _OPEN_END if end is None else end.toordinal(),
+        ident,
+    )
+
+
+def _with_records(
+    osev: Osev, vymery: Optional[List[Vymera]], pestovani: Optional[List[Pestovani]]
+) -> Osev:
+    """Return a shallow copy of osev holding vymery and pestovani
+
+    The dataclass ``__init__`` and ``__post_init__`` are bypassed, as the
+    values were already converted when osev was created; slotted Osevy of
+    persephone.compact are copied with copy.copy.
+    """
+    if hasattr(osev, "__dict__"):
+        record = _new(type(osev))
+        record.__dict__.update(osev.__dict__)
+    else:
+        record = copy.copy(osev)
+    record.vymery = vymery or []
+    record.pestovani = pestovani or []
+    return record
+
+
+class ValidityIndex:
+    """Interval trees over the validity of a farm's Osev, Vymera and Pestovani
+
+    Records are kept, not copied; queries return them in the order of the
+    Osevy the index was built from. With ``pause_gc`` the cyclic garbage
+    collector is paused while indexing and selecting (see gc_pause).
+    """
+
+    def __init__(self, osevy: Iterable[Osev], pause_gc: bool = False) -> None:
+        self.pause_gc = pause_gc
+        with paused_gc(pause_gc):
+            self._osevy: List[Osev] = list(osevy)
+            # Nested records and the position of their Osev, in request order
+            self._vymery: List[Vymera] = []
+            self._vymera_owners: List[int] = []
+            self._pestovani: List[Pestovani] = []
+            self._pestovani_owners: List[int] = []
+            for index, osev in enumerate(self._osevy):
+                for vymera in osev.vymery or ():
+                    self._vymery.append(vymera)
+                    self._vymera_owners.append(index)
+                for pestovani in osev.pestovani or ():
+                    self._pestovani.append(pestovani)
+                    self._pestovani_owners.append(index)
+            self._osev_tree = _IntervalTree(self._intervals(self._osevy))
+            self._vymera_tree = _IntervalTree(
+                self._intervals(self._vymery, self._vymera_owners, "vymery")
+            )
+            self._pestovani_tree = _IntervalTree(
+                self._intervals(self._pestovani, self._pestovani_owners, "pestovani")
+            )
+
+    def _intervals(
+        self,
+        records: List[Any],
+        owners: Optional[List[int]] = None,
+        section: str = "",
+    ) -> List[Tuple[int, int, int]]:
+        """Return the validity of records, rejecting any ending before it starts
+
+        Such a record is valid at no time, and its interval could be placed
+        on neither side of a center.
+        """
+        intervals = list(map(_validity, records, range(len(records))))
+        for start, end, ident in intervals:
+            if end < start:
+                record = records[ident]
+                if owners is None:
+                    path = f"osevy[{ident}]"
+                else:
+                    owner = owners[ident]
+                    nested = getattr(self._osevy[owner], section)
+                    position = next(
+                        position
+                        for position, item in enumerate(nested)
+                        if item is record
+                    )
+                    path = f"osevy[{owner}].{section}[{position}]"
+                raise ValueError(
+                    f"{path}.platnost_do: {record.platnost_do} "
+                    f"is before platnost_od {record.platnost_od}"
+                )
+        return intervals
+
+    @staticmethod
+    def _bounds(od: date, do: date) -> Tuple[int, int]:
+        if do < od:
+            raise ValueError(f"Period ends before it starts: {od} to {do}")
+        return od.toordinal(), do.toordinal()
+
+    def osevy(self, od: date, do: date) -> List[Osev]:
+        """Return the Osevy valid at some time from od to do"""
+        found = sorted(self._osev_tree.overlapping(*self._bounds(od, do)))
+        return [self._osevy[index] for index in found]
+
+    def vymery(self, od: date, do: date) -> List[Vymera]:
+        """Return the Vymery valid at some time from od to do"""
+        found = sorted(self._vymera_tree.overlapping(*self._bounds(od, do)))
+        return [self._vymery[index] for index in found]
+
+    def pestovani(self, od: date, do: date) -> List[Pestovani]:
+        """Return the Pestovani valid at some time from od to do"""
+        found = sorted(self._pestovani_tree.overlapping(*self._bounds(od, do)))
+        return [self._pestovani[index] for index in found]
+
+    def select(self, od: date, do: date) -> List[Osev]:
+        """Return the Osevy valid from od to do with only their valid records
+
+        Each Osev valid in the period is copied with the Vymery and
+        Pestovani valid in it; records of Osevy outside the period are left
+        out even when valid themselves.
+        """
+        low, high = self._bounds(od, do)
+        osevy = self._osevy
+        with paused_gc(self.pause_gc):
+            vymery: Dict[int, List[Vymera]] = {}
+            owners = self._vymera_owners
+            for index in sorted(self._vymera_tree.overlapping(low, high)):
+                vymery.setdefault(owners[index], []).append(self._vymery[index])
+            pestovani: Dict[int, List[Pestovani]] = {}
+            owners = self._pestovani_owners
+            for index in sorted(self._pestovani_tree.overlapping(low, high)):
+                pestovani.setdefault(owners[index], []).append(self._pestovani[index])
+            return [
+                _with_records(osevy[index], vymery.get(index), pestovani.get(index))
+                for index in sorted(self._osev_tree.overlapping(low, high))
+            ]
+
+    def request(
+        self, od: date, do: date, template: Optional[Request] = None
+    ) -> Request:
+        """Return the K request of the period od to do
+
+        The header, such as ``rezim_volani`` and ``rozsah_dat``, is taken
+        from template; its sections are not indexed and are left out.
+        """
+        base = template or Request(typ=TypRequest.K, osevy=[])
+        return dataclasses.replace(
+            base,
+            typ=TypRequest.K,
+            obdobi_od=od,
+            obdobi_do=do,
+            rozsah_dat=list(base.rozsah_dat),
+            osevy=self.select(od, do),
+            aplikace=[],
+            sklizne=[],
+            pastvy=[],
+        )
+
+    def requests(
+        self, periods: Iterable[Tuple[date, date]], template: Optional[Request] = None
+    ) -> Iterator[Request]:
+        """Yield the K request of each (od, do) period, see request
+
+        Requests are created as they are consumed, so the generator can be
+        passed to build_many directly.
+        """
+        for od, do in periods:
+            yield self.request(od, do, template)
@@ -0,0 +1,161 @@
+"""
+Paged views of large requests for the GUI
+
+XMLPreview reads a generated document in pages from a memory-mapped file,
+so only the page on screen is ever decoded. RecordPager formats one page of
+records at a time for a table widget. Neither imports the GUI toolkit.
+"""
+
+import mmap
+import os
+import tempfile
+from enum import Enum
+from types import TracebackType
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from .xml_builder import FieldSpec, RecordSpec
+
+_CONTINUATION = 0b1100_0000  # Mask of UTF-8 continuation bytes, 0b10xx_xxxx
+
+
+class XMLPreview:
+    """Read-only, page-at-a-time view of an XML file
+
+    Pages are about ``page_bytes`` long. Each page ends after the first line
+    break past its nominal end when there is one nearby, so pages of pretty
+    output hold whole lines, and otherwise at a character boundary. Page
+    boundaries are computed from the page number alone, so any page can be
+    shown without reading the ones before it.
+    """
+
+    def __init__(
+        self, path: str, page_bytes: int = 64 * 1024, delete: bool = False
+    ) -> None:
+        if page_bytes < 4:
+            # A page must be longer than the longest UTF-8 character
+            raise ValueError("page_bytes must be at least 4")
+        self.path = path
+        self.page_bytes = page_bytes
+        self._delete = delete
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be mapped
+        self._map: Optional[mmap.mmap] = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else None
+        )
+
+        count = max(1, -(-self.size // page_bytes))
+        if count > 1 and self._boundary((count - 1) * page_bytes) >= self.size:
+            # The last nominal page starts after the final line break
+            count -= 1
+        self.page_count = count
+
+    def _boundary(self, offset: int) -> int:
+        """Return the start of the page nominally starting at offset"""
+        if offset <= 0 or self._map is None:
+            return 0
+        if offset >= self.size:
+            return self.size
+        # Search less than a page ahead so consecutive starts never meet
+        newline = self._map.find(b"\n", offset, offset + self.page_bytes - 1)
+        if newline != -1:
+            return newline + 1
+        while offset < self.size and self._map[offset] & _CONTINUATION == 0b1000_0000:
+            offset += 1
+        return offset
+
+    def page(self, number: int) -> str:
+        """Return the text of a page, numbered from 0"""
+        if not 0 <= number < self.page_count:
+            raise IndexError("XMLPreview page out of range")
+        if self._map is None:
+            return ""
+        start = self._boundary(number * self.page_bytes)
+        stop = self._boundary((number + 1) * self.page_bytes)
+        return self._map[start:stop].decode("utf-8")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        if self._delete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "XMLPreview":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def temporary_path() -> str:
+    """Create an empty temporary file for a document to be previewed
+
+    Open the written file with ``XMLPreview(path, delete=True)`` so it is
+    removed when the preview is closed.
+    """
+    fd, path = tempfile.mkstemp(prefix="persephone-", suffix=".xml")
+    os.close(fd)
+    return path
+
+
+def _display(value: Any) -> str:
+    """Format a field value for a table cell"""
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class RecordPager:
+    """Pages of table rows for a sequence of records
+
+    The columns are the scalar fields of the record's schema. Rows are only
+    formatted for the requested page, and records are accessed by index, so
+    a lazily decoded container such as AplikaceTable only materializes the
+    records on that page.
+    """
+
+    def __init__(
+        self, spec: RecordSpec, records: Sequence[Any], page_size: int = 100
+    ) -> None:
+        self.spec = spec
+        self.records = records
+        self.page_size = page_size
+        self.fields: Tuple[FieldSpec, ...] = tuple(
+            f for f in spec.fields if f.item is None
+        )
+
+    @property
+    def headings(self) -> List[str]:
+        return [field_spec.tag for field_spec in self.fields]
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.records) // self.page_size))
+
+    def page(self, number: int) -> List[Tuple[str, ...]]:
+        """Return the rows of a page, numbered from 0"""
+        if not 0 <= number < self.page_count:
+            raise IndexError("RecordPager page out of range")
+        start = number * self.page_size
+        stop = min(start + self.page_size, len(self.records))
+        names = [field_spec.name for field_spec in self.fields]
+        return [
+            tuple(_display(getattr(record, name)) for name in names)
+            for record in (self.records[index] for index in range(start, stop))
+        ]
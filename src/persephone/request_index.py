@@ -0,0 +1,199 @@
+"""
+Referential integrity of a request
+
+``Aplikace.id_pestovani`` and ``Sklizen.id_pestovani`` refer to a Pestovani
+and ``Aplikace.id_pozemek`` and ``Pastva.id_pozemek`` to the parcel of an
+Osev in the same request. RequestIndex maps these ids to their owners in a
+single pass over the Osevy, so every reference is then resolved by a dict
+lookup and a whole request is checked in linear time:
+
+    index = RequestIndex(request.osevy)
+    for issue in index.check(request):
+        print(issue)  # aplikace[3].id_pestovani: dangling reference 'PEST9'
+
+Several Osevy may share a parcel; a Pestovani id must be unique.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from itertools import repeat
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .gc_pause import paused_gc
+from .xml_builder import REQUEST_SECTIONS, Osev, Pestovani, Request
+
+# Sections referencing Osevy and the reference fields each one has
+_REFERENCING = tuple(
+    (
+        spec.name,
+        tuple(
+            name
+            for name in ("id_pestovani", "id_pozemek", "id_plodina")
+            if name in {field_spec.name for field_spec in spec.item.fields}
+        ),
+    )
+    for spec in REQUEST_SECTIONS[1:]
+    if spec.item is not None
+)
+
+
+class IssueKind(Enum):
+    """Kind of referential integrity problem"""
+
+    DANGLING = "dangling reference"
+    DUPLICATE = "duplicate id"
+    CROP_MISMATCH = "crop mismatch"
+
+
+@dataclass
+class IntegrityIssue:
+    """A reference or id of one record that does not resolve cleanly
+
+    ``section`` is the Request field holding the record, ``index`` its
+    position there and ``field`` the path of the offending value inside it.
+    """
+
+    kind: IssueKind
+    section: str
+    index: int
+    field: str
+    value: Any
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.section}[{self.index}].{self.field}: {self.message}"
+
+
+class RequestIndex:
+    """Owners of the Pestovani and parcel ids of a request
+
+    ``crops`` maps each id_pestovani to its Pestovani and ``crop_owners`` to
+    the position of its Osev; ``parcels`` maps each id_pozemek to the
+    positions of the Osevy on it, in order. Ids repeated across Pestovani
+    keep their first owner and are listed in ``duplicates``. With
+    ``pause_gc`` the cyclic garbage collector is paused while indexing (see
+    gc_pause).
+    """
+
+    def __init__(self, osevy: Iterable[Osev], pause_gc: bool = False) -> None:
+        self.osevy: List[Osev] = list(osevy)
+        self.crops: Dict[str, Pestovani] = {}
+        self.crop_owners: Dict[str, int] = {}
+        self.parcels: Dict[str, List[int]] = {}
+        self.duplicates: List[IntegrityIssue] = []
+
+        with paused_gc(pause_gc):
+            crops = self.crops
+            owners = self.crop_owners
+            parcels = self.parcels
+            for index, osev in enumerate(self.osevy):
+                on_parcel = parcels.get(osev.id_pozemek)
+                if on_parcel is None:
+                    parcels[osev.id_pozemek] = [index]
+                else:
+                    on_parcel.append(index)
+                for position, pestovani in enumerate(osev.pestovani or ()):
+                    crop = pestovani.id_pestovani
+                    owner = owners.setdefault(crop, index)
+                    if crops.setdefault(crop, pestovani) is not pestovani:
+                        self.duplicates.append(
+                            IntegrityIssue(
+                                IssueKind.DUPLICATE,
+                                "osevy",
+                                index,
+                                f"pestovani[{position}].id_pestovani",
+                                crop,
+                                f"duplicate id {crop!r}, first used in osevy[{owner}]",
+                            )
+                        )
+
+    def osev_for_crop(self, id_pestovani: Optional[str]) -> Optional[Osev]:
+        """Return the Osev growing the Pestovani id_pestovani, or None"""
+        owner = self.crop_owners.get(id_pestovani or "")
+        return None if owner is None else self.osevy[owner]
+
+    def osevy_for_parcel(self, id_pozemek: Optional[str]) -> List[Osev]:
+        """Return the Osevy on the parcel id_pozemek, in request order"""
+        return [self.osevy[owner] for owner in self.parcels.get(id_pozemek or "", ())]
+
+    def _section_issues(
+        self, section: str, columns: Dict[str, Sequence[Any]]
+    ) -> List[IntegrityIssue]:
+        """Return the issues of a section given as one column per field"""
+        issues: List[IntegrityIssue] = []
+        crops = self.crops
+        parcels = self.parcels
+        length = len(next(iter(columns.values()), ()))
+        nothing = repeat(None)
+        rows = zip(
+            range(length),
+            columns.get("id_pestovani", nothing),
+            columns.get("id_pozemek", nothing),
+            columns.get("id_plodina", nothing),
+        )
+        for index, crop, parcel, plodina in rows:
+            if crop is not None:
+                pestovani = crops.get(crop)
+                if pestovani is None:
+                    issues.append(
+                        IntegrityIssue(
+                            IssueKind.DANGLING,
+                            section,
+                            index,
+                            "id_pestovani",
+                            crop,
+                            f"dangling reference {crop!r}",
+                        )
+                    )
+                elif plodina is not None and pestovani.id_plodina != plodina:
+                    issues.append(
+                        IntegrityIssue(
+                            IssueKind.CROP_MISMATCH,
+                            section,
+                            index,
+                            "id_plodina",
+                            plodina,
+                            f"crop {plodina} differs from crop "
+                            f"{pestovani.id_plodina} of Pestovani {crop!r}",
+                        )
+                    )
+            if parcel is not None and parcel not in parcels:
+                issues.append(
+                    IntegrityIssue(
+                        IssueKind.DANGLING,
+                        section,
+                        index,
+                        "id_pozemek",
+                        parcel,
+                        f"dangling reference {parcel!r}",
+                    )
+                )
+        return issues
+
+    def check(self, request: Request) -> List[IntegrityIssue]:
+        """Return the duplicate ids and unresolved references of request
+
+        Issues are ordered by section, then record. The request should hold
+        the Osevy this index was built from. Sections that are generators
+        are consumed.
+        """
+        issues = list(self.duplicates)
+        columns: Dict[str, Sequence[Any]]
+        for section, fields in _REFERENCING:
+            records = getattr(request, section) or ()
+            if hasattr(records, "column"):
+                # Columnar tables decode single columns without records
+                columns = {field: records.column(field) for field in fields}
+            else:
+                records = records if isinstance(records, Sequence) else list(records)
+                columns = {
+                    field: list(map(attrgetter(field), records)) for field in fields
+                }
+            issues.extend(self._section_issues(section, columns))
+        return issues
+
+    @classmethod
+    def from_request(cls, request: Request, pause_gc: bool = False) -> "RequestIndex":
+        """Index the Osevy of request"""
+        return cls(request.osevy, pause_gc)
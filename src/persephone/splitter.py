@@ -0,0 +1,235 @@
+"""
+Size-aware splitting of oversized requests
+
+The service limits the size of a single submission. ``split_request`` packs
+the records of a request into several valid requests, each under a byte
+and/or record limit, without building any XML: the size of every record is
+computed from the schema (see compile_record_sizer) and the size of each
+part is known exactly before it is built.
+
+Records that reference each other always end up in the same part. An Osev
+is kept with the Aplikace and Sklizen records referencing one of its
+Pestovani by ``id_pestovani`` and with the Aplikace and Pastva records
+referencing its parcel by ``id_pozemek``; Osevy sharing a parcel or a
+Pestovani stay together too. A group of linked records larger than the
+limit cannot be split and is returned as a part of its own, over the limit.
+"""
+
+import dataclasses
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .batch import BuildResult, PathType, build_many
+from .request_index import RequestIndex
+from .xml_builder import (
+    REQUEST_SECTIONS,
+    FieldKind,
+    FieldSpec,
+    Request,
+    Sizer,
+    XMLBuilder,
+    compile_record_sizer,
+)
+
+
+class _Unit:
+    """Records that must be submitted in the same request"""
+
+    __slots__ = ("sections", "size", "count")
+
+    def __init__(self) -> None:
+        self.sections: Tuple[List[Any], ...] = tuple([] for _ in REQUEST_SECTIONS)
+        self.size = 0
+        self.count = 0
+
+    def add(self, section: int, record: Any, size: int) -> None:
+        self.sections[section].append(record)
+        self.size += size
+        self.count += 1
+
+
+def _link_units(sections: Sequence[List[Any]], sizers: Sequence[Sizer]) -> List[_Unit]:
+    """Group the records of a request into units, in order of first Osev
+
+    Osevy sharing a parcel or a Pestovani id, as found by RequestIndex, are
+    joined with a union-find, then every other record joins the unit of the
+    Osev it references.
+    Records referencing nothing in the request form units of their own.
+    """
+    osevy = sections[0]
+    parent = list(range(len(osevy)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def union(first: int, second: int) -> None:
+        first, second = find(first), find(second)
+        # The lower index stays the root, so units keep the order of Osevy
+        if first < second:
+            parent[second] = first
+        elif second < first:
+            parent[first] = second
+
+    lookup = RequestIndex(osevy)
+    for on_parcel in lookup.parcels.values():
+        for other in on_parcel[1:]:
+            union(on_parcel[0], other)
+    for duplicate in lookup.duplicates:
+        union(lookup.crop_owners[duplicate.value], duplicate.index)
+    by_crop = lookup.crop_owners
+    by_parcel = {parcel: on_parcel[0] for parcel, on_parcel in lookup.parcels.items()}
+
+    # Index of an Osev referenced by each dependent record, or None
+    owners: List[List[Optional[int]]] = []
+    for records in sections[1:]:
+        section_owners: List[Optional[int]] = []
+        for record in records:
+            crop = by_crop.get(getattr(record, "id_pestovani", None) or "")
+            parcel = by_parcel.get(getattr(record, "id_pozemek", None) or "")
+            if crop is not None and parcel is not None:
+                union(crop, parcel)
+            section_owners.append(crop if crop is not None else parcel)
+        owners.append(section_owners)
+
+    units: Dict[int, _Unit] = {}
+    size_osev = sizers[0]
+    for index, osev in enumerate(osevy):
+        root = find(index)
+        unit = units.get(root)
+        if unit is None:
+            unit = units[root] = _Unit()
+        unit.add(0, osev, size_osev(osev))
+    linked = list(units.values())
+    free: List[_Unit] = []
+    for section, (records, section_owners) in enumerate(
+        zip(sections[1:], owners), start=1
+    ):
+        size_record = sizers[section]
+        for record, owner in zip(records, section_owners):
+            if owner is None:
+                unit = _Unit()
+                free.append(unit)
+            else:
+                unit = units[find(owner)]
+            unit.add(section, record, size_record(record))
+    return linked + free
+
+
+def _part(request: Request, sections: Sequence[List[Any]]) -> Request:
+    changes: Dict[str, Any] = {
+        spec.name: records for spec, records in zip(REQUEST_SECTIONS, sections)
+    }
+    changes["rozsah_dat"] = list(request.rozsah_dat)
+    return dataclasses.replace(request, **changes)
+
+
+def _section_overhead(spec: FieldSpec, indent: str, newline: str) -> int:
+    """Return the bytes a section wrapper adds once the section has records"""
+    wrapper = len(f"{indent}<{spec.tag}>{newline}{indent}</{spec.tag}>{newline}")
+    if spec.kind is FieldKind.LIST:
+        # An empty LIST section is still written as an empty element
+        wrapper -= len(f"{indent}<{spec.tag}/>{newline}")
+    return wrapper
+
+
+def iter_parts(
+    request: Request,
+    max_bytes: Optional[int] = None,
+    max_records: Optional[int] = None,
+    pretty: bool = True,
+) -> Iterator[Request]:
+    """Yield requests holding the records of request, each within the limits
+
+    ``max_bytes`` limits the encoded size of each part as built with
+    ``pretty`` and ``max_records`` the number of section records (Osev,
+    Aplikace, Sklizen and Pastva) in it. Units of linked records are packed
+    in the order of their first Osev, followed by the records referencing
+    nothing in request. A part lists each section unit by unit, so request
+    order is kept only among the records of one unit, not within a part as
+    a whole nor across parts. Every part repeats the header of request.
+    Sections that are generators are consumed before the first part is
+    yielded.
+    """
+    if max_bytes is None and max_records is None:
+        raise ValueError("max_bytes or max_records is required")
+
+    builder = XMLBuilder(pretty=pretty)
+    step = "  " if pretty else ""
+    newline = "\n" if pretty else ""
+    sizers = [
+        compile_record_sizer(spec.item, step * 2, step, newline)
+        for spec in REQUEST_SECTIONS
+        if spec.item is not None
+    ]
+    sections = [list(getattr(request, spec.name) or ()) for spec in REQUEST_SECTIONS]
+
+    empty = _part(request, [[] for _ in REQUEST_SECTIONS])
+    base = len(builder.build_request_bytes(empty))
+    if max_bytes is not None and base >= max_bytes:
+        raise ValueError(
+            f"max_bytes {max_bytes} is below the {base} bytes of the request header"
+        )
+    overheads = [_section_overhead(spec, step, newline) for spec in REQUEST_SECTIONS]
+    byte_limit = max_bytes if max_bytes is not None else float("inf")
+    record_limit = max_records if max_records is not None else float("inf")
+
+    current: List[List[Any]] = [[] for _ in REQUEST_SECTIONS]
+    size = base
+    count = 0
+    for unit in _link_units(sections, sizers):
+        extra = unit.size + sum(
+            overhead
+            for overhead, records, part_records in zip(
+                overheads, unit.sections, current
+            )
+            if records and not part_records
+        )
+        if count and (size + extra > byte_limit or count + unit.count > record_limit):
+            yield _part(request, current)
+            current = [[] for _ in REQUEST_SECTIONS]
+            size = base
+            count = 0
+            extra = unit.size + sum(
+                overhead
+                for overhead, records in zip(overheads, unit.sections)
+                if records
+            )
+        for part_records, records in zip(current, unit.sections):
+            part_records.extend(records)
+        size += extra
+        count += unit.count
+    yield _part(request, current)
+
+
+def split_request(
+    request: Request,
+    max_bytes: Optional[int] = None,
+    max_records: Optional[int] = None,
+    pretty: bool = True,
+) -> List[Request]:
+    """Split request into parts within the limits, see iter_parts"""
+    return list(iter_parts(request, max_bytes, max_records, pretty))
+
+
+def build_parts(
+    request: Request,
+    max_bytes: Optional[int] = None,
+    max_records: Optional[int] = None,
+    workers: Optional[int] = None,
+    output_dir: Optional[PathType] = None,
+    pretty: bool = True,
+) -> List[BuildResult]:
+    """Split request and build the parts in parallel across a process pool
+
+    Parts are handed to build_many as they are packed, so the first parts
+    are being built while the rest are still being split off. See
+    build_many for ``workers`` and ``output_dir``.
+    """
+    return build_many(
+        iter_parts(request, max_bytes, max_records, pretty),
+        workers,
+        output_dir,
+        pretty,
+    )
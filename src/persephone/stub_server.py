@@ -0,0 +1,260 @@
+"""
+Local stub of the EH_PEH02A service for offline tests and benchmarks
+
+StubServer accepts request documents over HTTP/1.1 with keep-alive and
+answers with a Response carrying a new GUID, after a simulated latency. It
+can fail a share of submissions at random or a scripted number of them,
+validate the submitted documents, and close connections after a number of
+requests, so client pooling, retries and throughput can be exercised
+without the real service::
+
+    python -m persephone.stub_server --port 8080 --latency 0.05 --error-rate 0.1
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+from io import BytesIO
+from types import TracebackType
+from typing import Dict, List, Optional, Tuple, Type
+
+from .xml_builder import Response, XMLBuilder
+from .xml_parser import parse_request_xml
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class StubServer:
+    """Imitation of the submission service listening on localhost
+
+    Each submission waits ``latency`` seconds, varied by a normal deviation
+    of ``jitter`` seconds, then fails with ``error_status`` with probability
+    ``error_rate`` or succeeds with a Response. Failures queued with
+    ``fail_next`` come first. With ``validate`` the document is parsed and
+    malformed ones get 400. ``requests_per_connection`` closes each
+    connection after that many responses, like a server limiting keep-alive.
+    ``seed`` makes the latencies, failures and GUIDs reproducible.
+
+    The counters ``requests``, ``connections`` and ``max_in_flight`` record
+    what the server saw.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/EH_PEH02A",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        validate: bool = False,
+        requests_per_connection: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.validate = validate
+        self.requests_per_connection = requests_per_connection
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._scripted: List[Tuple[int, Optional[float]]] = []
+        self._builder = XMLBuilder(pretty=False)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Dict["asyncio.Task[None]", asyncio.StreamWriter] = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    def fail_next(
+        self, count: int = 1, status: int = 503, retry_after: Optional[float] = None
+    ) -> None:
+        """Answer the next ``count`` submissions with ``status``
+
+        ``retry_after`` is sent as the Retry-After header, in seconds.
+        """
+        self._scripted.extend([(status, retry_after)] * count)
+
+    async def start(self) -> None:
+        """Start listening; with port 0 the chosen port is stored in ``port``"""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop listening and close the open connections"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        handlers = list(self._handlers)
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def __aenter__(self) -> "StubServer":
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        task = asyncio.current_task()
+        assert task is not None
+        self._handlers[task] = writer
+        served = 0
+        try:
+            while True:
+                try:
+                    request_line = await reader.readuntil(b"\r\n")
+                except asyncio.IncompleteReadError:
+                    return  # Client closed the connection
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readuntil(b"\r\n")
+                    if line == b"\r\n":
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                served += 1
+                close = headers.get("connection", "").lower() == "close" or (
+                    self.requests_per_connection is not None
+                    and served >= self.requests_per_connection
+                )
+                status, extra, payload = await self._respond(request_line, body)
+                self._send(writer, status, extra, payload, close)
+                await writer.drain()
+                if close:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            del self._handlers[task]
+            writer.close()
+
+    async def _respond(
+        self, request_line: bytes, body: bytes
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Return the status, extra headers and body answering a request"""
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2 or parts[1] != self.path:
+            return 404, {}, b""
+        if parts[0] != "POST":
+            return 405, {"Allow": "POST"}, b""
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency
+            if self.jitter:
+                delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+
+        if self._scripted:
+            status, retry_after = self._scripted.pop(0)
+            extra = {} if retry_after is None else {"Retry-After": f"{retry_after:g}"}
+            return status, extra, _REASONS.get(status, "Error").encode("ascii")
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status, {}, b"Simulated failure"
+        if self.validate:
+            try:
+                parse_request_xml(BytesIO(body))
+            except Exception as e:
+                return 400, {}, f"Invalid request: {e}".encode("utf-8")
+
+        guid = uuid.UUID(int=self._random.getrandbits(128), version=4)
+        document = self._builder.build_response_xml(Response(guid_podani=str(guid)))
+        return 200, {"Content-Type": "text/xml; charset=utf-8"}, document.encode()
+
+    @staticmethod
+    def _send(
+        writer: asyncio.StreamWriter,
+        status: int,
+        extra: Dict[str, str],
+        payload: bytes,
+        close: bool,
+    ) -> None:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}"]
+        lines.extend(f"{name}: {value}" for name, value in extra.items())
+        lines.append(f"Content-Length: {len(payload)}")
+        lines.append(f"Connection: {'close' if close else 'keep-alive'}")
+        head = "\r\n".join(lines) + "\r\n\r\n"
+        writer.write(head.encode("latin-1") + payload)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m persephone.stub_server",
+        description="Run a local stub of the EH_PEH02A submission service",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        validate=args.validate,
+        seed=args.seed,
+    )
+
+    async def serve() -> None:
+        await server.start()
+        print(f"Stub service listening on {server.url}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
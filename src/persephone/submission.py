@@ -0,0 +1,370 @@
+"""
+Asynchronous submission client for the EH_PEH02A service
+
+SubmissionClient posts request documents over HTTP/1.1 and parses the
+returned Response. It keeps a pool of keep-alive connections, limits the
+number of submissions in flight and, optionally, the rate at which they
+start, and retries transient failures (connection errors, timeouts, 429 and
+5xx responses) with exponential backoff. It is built on asyncio streams
+only; see persephone.stub_server for a local service to test against.
+"""
+
+import asyncio
+import random
+import ssl
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from .xml_builder import Request, Response, XMLBuilder
+from .xml_parser import parse_response_xml
+
+# Statuses worth retrying; other 4xx responses are permanent failures
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class SubmissionError(Exception):
+    """Raised when a submission fails permanently or runs out of retries"""
+
+    def __init__(
+        self, message: str, status: Optional[int] = None, attempts: int = 0
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.attempts = attempts
+
+
+@dataclass
+class SubmissionResult:
+    """Outcome of one submission of a batch"""
+
+    index: int
+    response: Optional[Response] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _HTTPResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    async def post(self, head: bytes, body: bytes) -> _HTTPResponse:
+        self.writer.write(head + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise SubmissionError(f"Malformed status line {status_line!r}") from None
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked()
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            self.reusable = False
+        if headers.get("connection", "").lower() == "close":
+            self.reusable = False
+        return _HTTPResponse(status, headers, body)
+
+    async def _read_chunked(self) -> bytes:
+        chunks = BytesIO()
+        while True:
+            size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readuntil(b"\r\n")
+                return chunks.getvalue()
+            chunks.write(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def close(self) -> None:
+        self.reusable = False
+        self.writer.close()
+
+
+class _ConnectionPool:
+    """Idle keep-alive connections to one host, opened on demand"""
+
+    def __init__(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext]):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.opened = 0
+        self._idle: List[_Connection] = []
+
+    async def acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.close()
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context
+        )
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def release(self, connection: _Connection) -> None:
+        if connection.reusable:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second
+
+    Up to ``burst`` acquisitions may happen back to back after a pause.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self._lock is None:
+            # Created on first use so it belongs to the running loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class SubmissionClient:
+    """Submit requests to the service with pooling, limits and retries
+
+    ``concurrency`` bounds the submissions in flight and therefore the
+    number of pooled connections; ``rate`` (submissions per second, None for
+    unlimited) bounds how fast attempts start, retries included. Failed
+    attempts are retried ``retries`` times, waiting ``backoff * 2**n``
+    seconds with jitter, at most ``max_backoff``, or the server's
+    Retry-After when it sends one. Use the client as an async context
+    manager so its connections are closed::
+
+        async with SubmissionClient("http://localhost:8080/EH_PEH02A") as client:
+            response = await client.submit(request)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 8,
+        rate: Optional[float] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 60.0,
+        builder: Optional[XMLBuilder] = None,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported service URL {url!r}")
+        secure = parts.scheme == "https"
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if secure else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.builder = builder or XMLBuilder(pretty=False)
+        self._limiter = RateLimiter(rate) if rate else None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool = _ConnectionPool(
+            self.host, self.port, ssl.create_default_context() if secure else None
+        )
+        default_port = 443 if secure else 80
+        self._host_header = (
+            self.host if self.port == default_port else f"{self.host}:{self.port}"
+        )
+
+    @property
+    def connections_opened(self) -> int:
+        return self._pool.opened
+
+    async def __aenter__(self) -> "SubmissionClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        self._pool.close()
+        # Let the transports finish closing
+        await asyncio.sleep(0)
+
+    def _head(self, length: int) -> bytes:
+        return (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            "Content-Type: text/xml; charset=utf-8\r\n"
+            f"Content-Length: {length}\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode("ascii")
+
+    async def _attempt(self, payload: bytes) -> _HTTPResponse:
+        connection = await self._pool.acquire()
+        try:
+            response = await asyncio.wait_for(
+                connection.post(self._head(len(payload)), payload), self.timeout
+            )
+        except BaseException:
+            connection.close()
+            raise
+        self._pool.release(connection)
+        return response
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * 2.0**attempt, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def submit_payload(self, payload: bytes) -> Tuple[Response, int]:
+        """Submit an encoded request document
+
+        Returns the parsed Response and the number of attempts it took.
+        Raises SubmissionError when the service rejects the document or the
+        retries are exhausted.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            attempt = 0
+            while True:
+                if self._limiter is not None:
+                    await self._limiter.acquire()
+                retry_after = None
+                try:
+                    http = await self._attempt(payload)
+                except (
+                    OSError,
+                    asyncio.IncompleteReadError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    error = SubmissionError(
+                        f"{type(e).__name__}: {e}" if str(e) else type(e).__name__,
+                        attempts=attempt + 1,
+                    )
+                else:
+                    if http.status == 200:
+                        try:
+                            return parse_response_xml(BytesIO(http.body)), attempt + 1
+                        except Exception as e:
+                            raise SubmissionError(
+                                f"Invalid response document: {e}",
+                                http.status,
+                                attempt + 1,
+                            ) from None
+                    error = SubmissionError(
+                        f"HTTP {http.status}: {http.body[:200]!r}",
+                        http.status,
+                        attempt + 1,
+                    )
+                    if http.status not in RETRY_STATUSES:
+                        raise error
+                    retry_after = http.headers.get("retry-after")
+
+                if attempt >= self.retries:
+                    raise error
+                await asyncio.sleep(self._delay(attempt, retry_after))
+                attempt += 1
+
+    async def submit(self, request: Request) -> Response:
+        """Build and submit a request, returning the service's Response"""
+        response, _ = await self.submit_payload(
+            self.builder.build_request_bytes(request)
+        )
+        return response
+
+    async def _submit_one(self, index: int, payload: bytes) -> SubmissionResult:
+        try:
+            response, attempts = await self.submit_payload(payload)
+        except SubmissionError as e:
+            return SubmissionResult(index, error=str(e), attempts=e.attempts)
+        return SubmissionResult(index, response=response, attempts=attempts)
+
+    async def submit_many(self, requests: Iterable[Request]) -> List[SubmissionResult]:
+        """Submit requests concurrently, returning results in input order
+
+        A request that fails is reported in its result instead of aborting
+        the batch.
+        """
+        tasks = []
+        for index, request in enumerate(requests):
+            try:
+                payload = self.builder.build_request_bytes(request)
+            except Exception as e:
+                tasks.append(self._failed(index, f"{type(e).__name__}: {e}"))
+                continue
+            tasks.append(self._submit_one(index, payload))
+        return list(await asyncio.gather(*tasks))
+
+    async def submit_payloads(
+        self, payloads: Iterable[bytes]
+    ) -> List[SubmissionResult]:
+        """Submit encoded documents concurrently, in input order, like submit_many"""
+        return list(
+            await asyncio.gather(
+                *(self._submit_one(i, payload) for i, payload in enumerate(payloads))
+            )
+        )
+
+    @staticmethod
+    async def _failed(index: int, error: str) -> SubmissionResult:
+        return SubmissionResult(index, error=error)
@@ -0,0 +1,650 @@
+"""
+Validation of requests against the EH_PEH02A field rules
+
+The rules of each record class are declared once in RULES. Together with
+the required fields of its dataclass and the enum fields of its schema they
+are compiled into one checker function per record type, which reads all the
+fields it needs with a single attrgetter call. Valid records, the common
+case, cost a few C calls each.
+
+A Validator checks a request on its own, or while an XMLBuilder serializes
+it, in the same pass over the records:
+
+    validator = Validator()
+    violations = validator.validate(request)
+
+    builder = XMLBuilder(validator=Validator(fail_fast=True))
+    data = builder.build_request_bytes(request)  # raises ValidationError
+
+In fail-fast mode validation stops at the first invalid record; otherwise
+every violation of the request is collected. validate_parallel spreads the
+per-record rules of a large request over a process pool and adds the
+cross-record checks of RequestIndex.
+"""
+
+import os
+from collections import deque
+from dataclasses import MISSING, dataclass, fields, replace
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter, itemgetter, le
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .xml_builder import (
+    REQUEST_HEADER,
+    REQUEST_SECTIONS,
+    REQUEST_SPEC,
+    Aplikace,
+    FieldKind,
+    Osev,
+    Pastva,
+    Pestovani,
+    RecordSpec,
+    Request,
+    TypRequest,
+    Vymera,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from multiprocessing.context import BaseContext
+
+
+@dataclass
+class Violation:
+    """A field value breaking a rule
+
+    ``path`` locates the record in the request, such as ``osevy[2].vymery[0]``
+    (empty for the request header), and ``rule`` names the broken rule.
+    """
+
+    rule: str
+    path: str
+    field: str
+    message: str
+    value: Any = None
+
+    def __str__(self) -> str:
+        location = f"{self.path}.{self.field}" if self.path else self.field
+        return f"{location}: {self.message}"
+
+
+class ValidationError(ValueError):
+    """Raised when a request built or checked in fail-fast mode is invalid"""
+
+    def __init__(self, violations: Sequence[Violation]) -> None:
+        self.violations = list(violations)
+        more = len(self.violations) - 1
+        message = str(self.violations[0])
+        if more:
+            message += f" (and {more} more)"
+        super().__init__(message)
+
+
+class Rule(NamedTuple):
+    """A condition on some fields of a record
+
+    ``test`` is called with the values of ``fields`` and returns False when
+    the record breaks the rule; it is skipped when one of the values is
+    None unless ``with_missing`` is set. ``message`` is formatted with the
+    values by field name and reported on ``field``.
+    """
+
+    name: str
+    field: str
+    fields: Tuple[str, ...]
+    test: Callable[..., bool]
+    message: str
+    with_missing: bool = False
+
+
+def not_before(name: str, start: str) -> Rule:
+    """Rule that a date is not before the start date of the same record"""
+    message = f"{{{name}}} is before {start} {{{start}}}"
+    return Rule("order", name, (start, name), le, message)
+
+
+def at_most(name: str, limit: str) -> Rule:
+    """Rule that a value does not exceed another field of the same record"""
+    message = f"{{{name}}} exceeds {limit} {{{limit}}}"
+    return Rule("limit", name, (name, limit), le, message)
+
+
+def required_when(name: str, other: str, values: Tuple[Any, ...]) -> Rule:
+    """Rule that a field is set when another field holds one of values"""
+
+    def test(value: Any, condition: Any) -> bool:
+        return value is not None or condition not in values
+
+    return Rule(
+        "required",
+        name,
+        (name, other),
+        test,
+        f"{name} is required for {other} {{{other}.value}}",
+        with_missing=True,
+    )
+
+
+# Rules beyond required fields and value types, by record class. The
+# request rules are those listed under Validation in XML_BUILDER_README.
+RULES: Dict[type, Tuple[Rule, ...]] = {
+    Request: (
+        required_when("obdobi_od", "typ", (TypRequest.K,)),
+        required_when("obdobi_do", "typ", (TypRequest.K,)),
+        required_when("hosp_rok", "typ", (TypRequest.S, TypRequest.B)),
+        not_before("obdobi_do", "obdobi_od"),
+    ),
+    Vymera: (not_before("platnost_do", "platnost_od"),),
+    Pestovani: (
+        not_before("ukonceni_pestovani", "zahajeni_pestovani"),
+        not_before("platnost_do", "platnost_od"),
+    ),
+    Osev: (not_before("platnost_do", "platnost_od"),),
+    Aplikace: (
+        at_most("vymera_aplikace", "vymera_plodiny"),
+        not_before("dat_zapraveni_ukonceni", "dat_aplikace_zahajeni"),
+    ),
+    Pastva: (not_before("pastva_do", "pastva_od"),),
+}
+
+# The request header, without the record sections checked one by one
+_HEADER = RecordSpec(REQUEST_SPEC.tag, REQUEST_SPEC.cls, REQUEST_HEADER)
+_SECTION_ITEMS = {
+    spec.name: spec.item for spec in REQUEST_SECTIONS if spec.item is not None
+}
+
+# Returned by checkers for valid records
+_VALID: Tuple[Violation, ...] = ()
+
+_NONE = type(None)
+
+# Value types accepted by field kind, besides None, with the name reported
+# for others. bool is an int subclass but not accepted as a number.
+_KIND_TYPES: Dict[FieldKind, Tuple[Tuple[type, ...], str]] = {
+    FieldKind.DATE: ((date,), "date"),
+    FieldKind.DECIMAL: ((Decimal, int), "number"),
+    FieldKind.INT: ((int,), "whole number"),
+}
+
+# Rules a checker runs on records with one combination of value types
+Plan = Tuple[Tuple[Callable[..., bool], Callable[[Any], Tuple[Any, ...]]], ...]
+
+# Combinations of value types a checker keeps a plan for
+MAX_PLANS = 1024
+
+
+class Checker(NamedTuple):
+    """Compiled rules of a record type
+
+    ``check`` takes the values of ``names``, as read by ``get`` from a
+    record, and returns the violations of the record with paths relative
+    to it.
+    """
+
+    names: Tuple[str, ...]
+    get: Callable[[Any], Tuple[Any, ...]]
+    check: Callable[[Tuple[Any, ...]], Sequence[Violation]]
+
+
+def _tuple_getter(
+    make: Callable[..., Callable[[Any], Any]], keys: Sequence[Any]
+) -> Callable[[Any], Tuple[Any, ...]]:
+    """Return make(*keys), made to return a tuple for one or no key too"""
+    if not keys:
+        return lambda item: ()
+    if len(keys) > 1:
+        return make(*keys)
+    get_one = make(keys[0])
+    return lambda item: (get_one(item),)
+
+
+def _within(prefix: str, violations: Iterable[Violation]) -> List[Violation]:
+    """Return violations with their paths moved under prefix"""
+    return [
+        replace(
+            violation,
+            path=f"{prefix}.{violation.path}" if violation.path else prefix,
+        )
+        for violation in violations
+    ]
+
+
+@lru_cache(maxsize=None)
+def compile_record_checker(spec: RecordSpec) -> Checker:
+    """Return the checker of a record type, generated on first use"""
+    record_fields = {f.name: f for f in fields(spec.cls)}
+    required = [
+        field_spec.name
+        for field_spec in spec.fields
+        if record_fields[field_spec.name].default is MISSING
+        and record_fields[field_spec.name].default_factory is MISSING
+    ]
+    rules = RULES.get(spec.cls, ())
+    # Required fields come first, so one slice tells whether one is missing
+    names = list(required)
+    for name in [
+        *(field_spec.name for field_spec in spec.fields if field_spec.enum),
+        *(
+            field_spec.name
+            for field_spec in spec.fields
+            if field_spec.kind in _KIND_TYPES
+        ),
+        *(name for rule in rules for name in rule.fields),
+        *(field_spec.name for field_spec in spec.fields if field_spec.item),
+    ]:
+        if name not in names:
+            names.append(name)
+    position = {name: index for index, name in enumerate(names)}
+    count = len(required)
+    enums = [
+        (position[field_spec.name], field_spec.name, field_spec.enum)
+        for field_spec in spec.fields
+        if field_spec.enum is not None
+    ]
+    typed = [
+        (position[field_spec.name], field_spec.name, *_KIND_TYPES[field_spec.kind])
+        for field_spec in spec.fields
+        if field_spec.enum is None and field_spec.kind in _KIND_TYPES
+    ]
+    compiled = [
+        (
+            rule,
+            _tuple_getter(itemgetter, [position[name] for name in rule.fields]),
+            [position[name] for name in rule.fields],
+        )
+        for rule in rules
+    ]
+    nested = [
+        (position[field_spec.name], field_spec.name, compile_record_checker(item))
+        for field_spec in spec.fields
+        for item in (field_spec.item,)
+        if item is not None
+    ]
+
+    def plan(signature: Tuple[type, ...]) -> Optional[Plan]:
+        """Return the rules to run on records whose values have these types
+
+        Returns None if the types alone break a rule: a required field is
+        None, an enum field holds something else than its enum or a date or
+        number field something else than a date or number.
+        """
+        if _NONE in signature[:count]:
+            return None
+        for index, _, enum in enums:
+            if signature[index] is not enum and signature[index] is not _NONE:
+                return None
+        for index, _, types, _ in typed:
+            if signature[index] not in types and signature[index] is not _NONE:
+                return None
+        return tuple(
+            (rule.test, get_args)
+            for rule, get_args, indexes in compiled
+            if rule.with_missing
+            or all(signature[index] is not _NONE for index in indexes)
+        )
+
+    # Plans by the types of the values of a record. Records of a section
+    # mostly share a handful of signatures, so checking one costs a tuple of
+    # types, one dict lookup and its rules; comparing Decimal values with
+    # None, as ``None in values`` would, is several times slower.
+    plans: Dict[Tuple[type, ...], Plan] = {}
+
+    def record_violations(values: Tuple[Any, ...]) -> List[Violation]:
+        """Return every violation of the record's own fields"""
+        violations = [
+            Violation("required", "", name, f"{name} is required")
+            for name, value in zip(required, values)
+            if value is None
+        ]
+        for index, name, enum in enums:
+            value = values[index]
+            if value is not None and type(value) is not enum:
+                violations.append(
+                    Violation(
+                        "enum",
+                        "",
+                        name,
+                        f"{value!r} is not a {enum.__name__}",
+                        value,
+                    )
+                )
+        # Rules are not run on values of the wrong type, which they could
+        # not compare
+        mistyped = set()
+        for index, name, types, kind_name in typed:
+            value = values[index]
+            if value is not None and type(value) not in types:
+                mistyped.add(index)
+                violations.append(
+                    Violation(
+                        "type", "", name, f"{value!r} is not a {kind_name}", value
+                    )
+                )
+        for rule, get_args, indexes in compiled:
+            if mistyped.intersection(indexes):
+                continue
+            args = get_args(values)
+            if None in args and not rule.with_missing:
+                continue
+            if not rule.test(*args):
+                named = dict(zip(rule.fields, args))
+                violations.append(
+                    Violation(
+                        rule.name,
+                        "",
+                        rule.field,
+                        rule.message.format(**named),
+                        named[rule.field],
+                    )
+                )
+        return violations
+
+    def check_fields(values: Tuple[Any, ...]) -> Sequence[Violation]:
+        """Return the violations of the record's own fields"""
+        signature = tuple(map(type, values))
+        rules_to_run = plans.get(signature)
+        if rules_to_run is None:
+            rules_to_run = plan(signature)
+            if rules_to_run is None:
+                return record_violations(values)
+            if len(plans) < MAX_PLANS:
+                plans[signature] = rules_to_run
+        for test, get_args in rules_to_run:
+            if not test(*get_args(values)):
+                return record_violations(values)
+        return _VALID
+
+    get = _tuple_getter(attrgetter, names)
+    if not nested:
+        return Checker(tuple(names), get, check_fields)
+
+    def check(values: Tuple[Any, ...]) -> Sequence[Violation]:
+        violations = check_fields(values)
+        for index, name, item_checker in nested:
+            items = values[index]
+            if not items:
+                continue
+            item_get = item_checker.get
+            item_check = item_checker.check
+            for item_index, item in enumerate(items):
+                found = item_check(item_get(item))
+                if found:
+                    violations = [
+                        *violations,
+                        *_within(f"{name}[{item_index}]", found),
+                    ]
+        return violations
+
+    return Checker(tuple(names), get, check)
+
+
+class Validator:
+    """Checks requests against RULES
+
+    Violations of the last request checked are kept in ``violations``. With
+    ``fail_fast`` checking stops at the first invalid record and raises
+    ValidationError; validate() returns the violations found so far
+    instead.
+    """
+
+    def __init__(self, fail_fast: bool = False) -> None:
+        self.fail_fast = fail_fast
+        self.violations: List[Violation] = []
+
+    def _report(self, prefix: str, found: Sequence[Violation]) -> None:
+        self.violations.extend(_within(prefix, found) if prefix else found)
+        if self.fail_fast:
+            raise ValidationError(self.violations)
+
+    def start(self, request: Request) -> None:
+        """Forget earlier violations and check the header of request"""
+        self.violations = []
+        checker = compile_record_checker(_HEADER)
+        found = checker.check(checker.get(request))
+        if found:
+            self._report("", found)
+
+    def track(
+        self, section: str, spec: RecordSpec, records: Iterable[Any], start: int = 0
+    ) -> Any:
+        """Check the records of a section as they are consumed
+
+        Returns an iterator yielding each record once it is checked, so an
+        invalid record is never yielded in fail-fast mode. Containers that
+        serialize themselves, such as AplikaceTable, are checked one column
+        at a time right away and returned as they are. ``start`` is the
+        index of the first record in the section, used in paths.
+        """
+        checker = compile_record_checker(spec)
+        column = getattr(records, "column", None)
+        if column is not None and hasattr(records, "iter_xml"):
+            rows = zip(*(column(name) for name in checker.names))
+            self._check_values(section, checker, rows, start)
+            return records
+        return self._track(section, checker, records, start)
+
+    def _check_values(
+        self,
+        section: str,
+        checker: Checker,
+        rows: Iterable[Tuple[Any, ...]],
+        start: int,
+    ) -> None:
+        check = checker.check
+        for index, values in enumerate(rows, start):
+            found = check(values)
+            if found:
+                self._report(f"{section}[{index}]", found)
+
+    def _track(
+        self, section: str, checker: Checker, records: Iterable[Any], start: int
+    ) -> Iterator[Any]:
+        get = checker.get
+        check = checker.check
+        for index, record in enumerate(records, start):
+            found = check(get(record))
+            if found:
+                self._report(f"{section}[{index}]", found)
+            yield record
+
+    def finish(self) -> None:
+        """Raise ValidationError if the request checked has violations"""
+        if self.violations:
+            raise ValidationError(self.violations)
+
+    def validate(self, request: Request) -> List[Violation]:
+        """Check request on its own and return its violations
+
+        Sections that are generators are consumed.
+        """
+        try:
+            self.start(request)
+            for spec in REQUEST_SECTIONS:
+                assert spec.item is not None
+                records = getattr(request, spec.name) or ()
+                tracked = self.track(spec.name, spec.item, records)
+                if tracked is not records:
+                    deque(tracked, maxlen=0)
+        except ValidationError:
+            pass
+        return list(self.violations)
+
+
+def validate_request(request: Request, fail_fast: bool = False) -> List[Violation]:
+    """Return the violations of request, see Validator"""
+    return Validator(fail_fast).validate(request)
+
+
+def check_references(request: Request) -> List[Violation]:
+    """Return the cross-record violations of request, see RequestIndex
+
+    Pestovani ids used twice, references to Pestovani or parcels missing
+    from the request and crop mismatches are reported as violations of the
+    rules ``duplicate``, ``dangling`` and ``crop_mismatch``.
+    """
+    from .request_index import RequestIndex
+
+    return [
+        Violation(
+            issue.kind.name.lower(),
+            f"{issue.section}[{issue.index}]",
+            issue.field,
+            issue.message,
+            issue.value,
+        )
+        for issue in RequestIndex.from_request(request).check(request)
+    ]
+
+
+# Records of a section checked by one task of validate_parallel
+SHARD_SIZE = 16384
+
+# The request validated by this worker process, see validate_parallel
+_shared: Optional[Request] = None
+
+
+def _share(request: Optional[Request]) -> None:
+    global _shared
+    _shared = request
+
+
+def _check_shard(
+    section: str, start: int, stop: int, fail_fast: bool
+) -> List[Violation]:
+    """Check records start to stop of a section of the shared request"""
+    assert _shared is not None
+    spec = _SECTION_ITEMS[section]
+    validator = Validator(fail_fast)
+    records = getattr(_shared, section)[start:stop]
+    try:
+        deque(validator.track(section, spec, records, start), maxlen=0)
+    except ValidationError:
+        pass
+    return validator.violations
+
+
+def validate_parallel(
+    request: Request,
+    workers: Optional[int] = None,
+    fail_fast: bool = False,
+    shard_size: int = SHARD_SIZE,
+    mp_context: Optional["BaseContext"] = None,
+) -> List[Violation]:
+    """Validate request across a process pool, with cross-record checks
+
+    The sections are cut into shards of ``shard_size`` consecutive records
+    whose per-record rules are checked by ``workers`` processes, while this
+    process checks the header and, with check_references, the ids and
+    references across records. Violations come in request order (header,
+    then each section by record), followed by the cross-record ones, however
+    many workers there are. In fail-fast mode the first invalid record in
+    that order is reported.
+
+    The request is pickled once per worker, unless ``mp_context`` is a
+    fork context (``multiprocessing.get_context("fork")``), whose workers
+    share it without copying; the default start method is used otherwise.
+    Sections that are generators are consumed first, and a request small
+    enough for a single shard is checked in this process.
+    """
+    sections: Dict[str, Any] = {}
+    for spec in REQUEST_SECTIONS:
+        records = getattr(request, spec.name) or ()
+        if not isinstance(records, Sequence) and not hasattr(records, "column"):
+            records = list(records)
+        sections[spec.name] = records
+    request = replace(request, **sections)
+
+    validator = Validator(fail_fast)
+    try:
+        validator.start(request)
+    except ValidationError:
+        return validator.violations
+    violations = validator.violations
+
+    # Columnar tables are checked here, column by column, and the other
+    # sections cut into shards; parts keeps both in request order
+    parts: List[Union[List[Violation], Tuple[str, int, int]]] = []
+    for spec in REQUEST_SECTIONS:
+        assert spec.item is not None
+        records = sections[spec.name]
+        if hasattr(records, "column"):
+            table_validator = Validator(fail_fast)
+            try:
+                table_validator.track(spec.name, spec.item, records)
+            except ValidationError:
+                pass
+            parts.append(table_validator.violations)
+            continue
+        for start in range(0, len(records), shard_size):
+            parts.append((spec.name, start, min(start + shard_size, len(records))))
+
+    workers = workers or os.cpu_count() or 1
+    shards = sum(1 for part in parts if isinstance(part, tuple))
+    if workers == 1 or shards <= 1:
+        _share(request)
+        try:
+            results = [
+                part if isinstance(part, list) else _check_shard(*part, fail_fast)
+                for part in parts
+            ]
+            references = check_references(request)
+        finally:
+            _share(None)
+        return _merge(violations, results, references, fail_fast)
+
+    # The builder imports this module for Validator; only parallel
+    # validation needs the process pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        workers, mp_context=mp_context, initializer=_share, initargs=(request,)
+    ) as executor:
+        futures = [
+            (
+                part
+                if isinstance(part, list)
+                else executor.submit(_check_shard, *part, fail_fast)
+            )
+            for part in parts
+        ]
+        # The cross-record pass runs while the workers check the shards
+        references = check_references(request)
+        return _merge(violations, futures, references, fail_fast)
+
+
+def _merge(
+    violations: List[Violation],
+    results: Sequence[Union[List[Violation], "Future[List[Violation]]"]],
+    references: List[Violation],
+    fail_fast: bool,
+) -> List[Violation]:
+    """Append the violations of each part, then the cross-record ones
+
+    ``results`` holds the violations of each part of the request, or
+    futures of them. In fail-fast mode parts after the first with
+    violations are cancelled.
+    """
+    for result in results:
+        violations.extend(result if isinstance(result, list) else result.result())
+        if fail_fast and violations:
+            for other in results:
+                if not isinstance(other, list):
+                    other.cancel()
+            return violations
+    violations.extend(references[:1] if fail_fast else references)
+    return violations
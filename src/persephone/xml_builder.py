@@ -6,8 +6,29 @@ from dataclasses import dataclass, field
 from datetime import date
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional, Union
-from xml.etree.ElementTree import Element, SubElement, tostring
+from functools import lru_cache, partial
+from itertools import chain, islice
+from operator import attrgetter, is_not
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+if TYPE_CHECKING:
+    from .build_stats import BuildHook, BuildStats
+    from .fragment_cache import FragmentCache
+    from .validation import Validator
 
 
 class TypRequest(Enum):
@@ -255,15 +276,15 @@ class Request:
     """Main request data structure"""
 
     typ: TypRequest
-    osevy: List[Osev]
+    osevy: Iterable[Osev]
     obdobi_od: Optional[date] = None
     obdobi_do: Optional[date] = None
     hosp_rok: Optional[int] = None
     rezim_volani: Optional[RezimVolani] = None
     rozsah_dat: List[RozsahDat] = field(default_factory=list)
-    aplikace: List[Aplikace] = field(default_factory=list)
-    sklizne: List[Sklizen] = field(default_factory=list)
-    pastvy: List[Pastva] = field(default_factory=list)
+    aplikace: Iterable[Aplikace] = field(default_factory=list)
+    sklizne: Iterable[Sklizen] = field(default_factory=list)
+    pastvy: Iterable[Pastva] = field(default_factory=list)
 
 
 @dataclass
@@ -273,284 +294,979 @@ class Response:
     guid_podani: str
 
 
-class XMLBuilder:
-    """XML Builder for EH_PEH02A service"""
-
-    def __init__(self) -> None:
-        self.encoding = "utf-8"
-
-    def _add_element_if_not_none(
-        self,
-        parent: Element,
-        tag: str,
-        value: Union[str, int, bool, Decimal, date, Enum, None],
-        enum_value: bool = False,
-    ) -> None:
-        """Add XML element only if value is not None"""
-        if value is not None:
-            if isinstance(value, bool):
-                text = "true" if value else "false"
-            elif isinstance(value, date):
-                text = value.strftime("%Y-%m-%d")
-            elif isinstance(value, Decimal):
-                text = str(value)
-            elif enum_value and hasattr(value, "value"):
-                text = value.value
-            else:
-                text = str(value)
-
-            elem = SubElement(parent, tag)
-            elem.text = text
-
-    def _build_vymery(self, parent: Element, vymery: List[Vymera]) -> None:
-        """Build Vymery XML elements"""
-        vymery_elem = SubElement(parent, "Vymery")
-        for vymera in vymery:
-            vymera_elem = SubElement(vymery_elem, "Vymera")
-            self._add_element_if_not_none(vymera_elem, "Vymera", vymera.vymera)
-            self._add_element_if_not_none(vymera_elem, "PlatnostOd", vymera.platnost_od)
-            self._add_element_if_not_none(vymera_elem, "PlatnostDo", vymera.platnost_do)
-
-    def _build_pestovani(
-        self, parent: Element, pestovani_list: List[Pestovani]
-    ) -> None:
-        """Build Pestovani XML elements"""
-        if not pestovani_list:
-            return
-
-        for pestovani in pestovani_list:
-            pestovani_elem = SubElement(parent, "Pestovani")
-            self._add_element_if_not_none(
-                pestovani_elem, "IdPestovani", pestovani.id_pestovani
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "IdPlodina", pestovani.id_plodina
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "IdUzitkovySmer", pestovani.id_uzitkovy_smer
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "Viceleta", pestovani.viceleta
-            )
-            self._add_element_if_not_none(pestovani_elem, "HospRok", pestovani.hosp_rok)
-            self._add_element_if_not_none(
-                pestovani_elem, "TypPlodiny", pestovani.typ_plodiny, enum_value=True
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "ZahajeniPestovani", pestovani.zahajeni_pestovani
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "UkonceniPestovani", pestovani.ukonceni_pestovani
-            )
-            self._add_element_if_not_none(
-                pestovani_elem, "PlatnostOd", pestovani.platnost_od
+class FieldKind(Enum):
+    """How a dataclass field is rendered in XML"""
+
+    TEXT = "text"  # Escaped string
+    INT = "int"  # Integer
+    BOOL = "bool"  # true/false
+    DATE = "date"  # YYYY-MM-DD
+    DECIMAL = "decimal"  # Decimal as stored
+    ENUM = "enum"  # Enum member value
+    LIST = "list"  # Wrapper element, always written, one element per item
+    SECTION = "section"  # Like LIST, but omitted when empty
+    REPEATED = "repeated"  # One element per item, no wrapper
+    GROUP = "group"  # Wrapper omitted when empty, item fields written inline
+
+
+class FieldSpec(NamedTuple):
+    """Mapping of one dataclass field to its XML element"""
+
+    name: str
+    tag: str
+    kind: FieldKind
+    enum: Optional[Type[Enum]] = None
+    item: Optional["RecordSpec"] = None
+    places: Optional[int] = None  # Decimal places a DECIMAL value is rounded to
+
+
+class RecordSpec(NamedTuple):
+    """Mapping of a dataclass to its XML element and ordered fields"""
+
+    tag: str
+    cls: type
+    fields: Tuple[FieldSpec, ...]
+
+
+# Field schema of the EH_PEH02A document. The order of the fields is the
+# order of the elements in the output; adding an element to the document
+# only requires adding its FieldSpec here.
+
+VYMERA_SPEC = RecordSpec(
+    "Vymera",
+    Vymera,
+    (
+        FieldSpec("vymera", "Vymera", FieldKind.DECIMAL, places=2),
+        FieldSpec("platnost_od", "PlatnostOd", FieldKind.DATE),
+        FieldSpec("platnost_do", "PlatnostDo", FieldKind.DATE),
+    ),
+)
+
+PESTOVANI_SPEC = RecordSpec(
+    "Pestovani",
+    Pestovani,
+    (
+        FieldSpec("id_pestovani", "IdPestovani", FieldKind.TEXT),
+        FieldSpec("id_plodina", "IdPlodina", FieldKind.INT),
+        FieldSpec("id_uzitkovy_smer", "IdUzitkovySmer", FieldKind.INT),
+        FieldSpec("viceleta", "Viceleta", FieldKind.BOOL),
+        FieldSpec("hosp_rok", "HospRok", FieldKind.INT),
+        FieldSpec("typ_plodiny", "TypPlodiny", FieldKind.ENUM, TypPlodiny),
+        FieldSpec("zahajeni_pestovani", "ZahajeniPestovani", FieldKind.DATE),
+        FieldSpec("ukonceni_pestovani", "UkonceniPestovani", FieldKind.DATE),
+        FieldSpec("platnost_od", "PlatnostOd", FieldKind.DATE),
+        FieldSpec("platnost_do", "PlatnostDo", FieldKind.DATE),
+    ),
+)
+
+OSEV_SPEC = RecordSpec(
+    "Osev",
+    Osev,
+    (
+        FieldSpec("zkod", "Zkod", FieldKind.TEXT),
+        FieldSpec("ctverec", "Ctverec", FieldKind.TEXT),
+        FieldSpec("id_pozemek", "IdPozemek", FieldKind.TEXT),
+        FieldSpec("nazev_pozemek", "NazevPozemek", FieldKind.TEXT),
+        FieldSpec("platnost_od", "PlatnostOd", FieldKind.DATE),
+        FieldSpec("platnost_do", "PlatnostDo", FieldKind.DATE),
+        FieldSpec("vymery", "Vymery", FieldKind.LIST, item=VYMERA_SPEC),
+        FieldSpec("pestovani", "Pestovani", FieldKind.REPEATED, item=PESTOVANI_SPEC),
+    ),
+)
+
+APLIKACE_SPEC = RecordSpec(
+    "Aplikace",
+    Aplikace,
+    (
+        FieldSpec("typ", "Typ", FieldKind.ENUM, TypAplikace),
+        FieldSpec("dat_aplikace_zahajeni", "DatAplikaceZahajeni", FieldKind.DATE),
+        FieldSpec("dat_zapraveni_ukonceni", "DatZapraveniUkonceni", FieldKind.DATE),
+        FieldSpec("doba_zapraveni", "DobaZapraveni", FieldKind.ENUM, DobaZapraveni),
+        FieldSpec("id_pestovani", "IdPestovani", FieldKind.TEXT),
+        FieldSpec("id_pozemek", "IdPozemek", FieldKind.TEXT),
+        FieldSpec("id_plodina", "IdPlodina", FieldKind.INT),
+        FieldSpec("vymera_plodiny", "VymeraPlodiny", FieldKind.DECIMAL, places=2),
+        FieldSpec("vymera_aplikace", "VymeraAplikace", FieldKind.DECIMAL, places=2),
+        FieldSpec("mnozstvi_celkem", "MnozstviCelkem", FieldKind.DECIMAL, places=3),
+        FieldSpec("mnozstvi_ha", "MnozstviHa", FieldKind.DECIMAL, places=3),
+        FieldSpec("merna_jednotka", "MernaJednotka", FieldKind.ENUM, MernaJednotka),
+        FieldSpec("id_hnojivo", "IdHnojivo", FieldKind.INT),
+        FieldSpec("nazev_hnojivo", "NazevHnojivo", FieldKind.TEXT),
+        FieldSpec("kategorie_n", "KategorieN", FieldKind.INT),
+        FieldSpec("druh_hnojiva", "DruhHnojiva", FieldKind.INT),
+        FieldSpec("typove_id_hnojivo", "TypoveIdHnojivo", FieldKind.INT),
+        FieldSpec("metoda_zivin", "MetodaZivin", FieldKind.ENUM, MetodaZivin),
+        FieldSpec("privod_n", "PrivodN", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_p", "PrivodP", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_k", "PrivodK", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_mg", "PrivodMg", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_ca", "PrivodCa", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_s", "PrivodS", FieldKind.DECIMAL, places=2),
+        FieldSpec("rozklad_slamy", "RozkladSlamy", FieldKind.BOOL),
+    ),
+)
+
+SKLIZEN_SPEC = RecordSpec(
+    "Sklizen",
+    Sklizen,
+    (
+        FieldSpec("id_pestovani", "IdPestovani", FieldKind.TEXT),
+        FieldSpec("id_produkt", "IdProdukt", FieldKind.INT),
+        FieldSpec("typ_produktu", "TypProduktu", FieldKind.ENUM, TypProduktu),
+        FieldSpec("hosp_rok", "HospRok", FieldKind.INT),
+        FieldSpec("vymera_sklizne", "VymeraSklizne", FieldKind.DECIMAL, places=3),
+        FieldSpec("mnozstvi_celkem", "MnozstviCelkem", FieldKind.DECIMAL, places=3),
+        FieldSpec("mnozstvi_ha", "MnozstviHa", FieldKind.DECIMAL, places=3),
+        FieldSpec("merna_jednotka", "MernaJednotka", FieldKind.ENUM, MernaJednotka),
+        FieldSpec("susina", "Susina", FieldKind.INT),
+    ),
+)
+
+PASTVA_SPEC = RecordSpec(
+    "Pastva",
+    Pastva,
+    (
+        FieldSpec("id_pozemek", "IdPozemek", FieldKind.TEXT),
+        FieldSpec("id_druh_zvirat", "IdDruhZvirat", FieldKind.TEXT),
+        FieldSpec("id_kategorie_zvirat", "IdKategorieZvirat", FieldKind.INT),
+        FieldSpec("vlastni_kategorie_zvirat", "VlastniKategorieZvirat", FieldKind.TEXT),
+        FieldSpec("pocet_ks", "PocetKs", FieldKind.DECIMAL, places=3),
+        FieldSpec("pocet_dj", "PocetDJ", FieldKind.DECIMAL, places=3),
+        FieldSpec("pastva_od", "PastvaOd", FieldKind.DATE),
+        FieldSpec("pastva_do", "PastvaDo", FieldKind.DATE),
+        FieldSpec("pocet_hod_pastva", "PocetHodPastva", FieldKind.INT),
+        FieldSpec("vymera_pastvy", "VymeraPastvy", FieldKind.DECIMAL, places=2),
+        FieldSpec("mnozstvi_ha", "MnozstviHa", FieldKind.DECIMAL, places=3),
+        FieldSpec("merna_jednotka", "MernaJednotka", FieldKind.ENUM, MernaJednotka),
+        FieldSpec("id_hnojivo", "IdHnojivo", FieldKind.INT),
+        FieldSpec("nazev_hnojivo", "NazevHnojivo", FieldKind.TEXT),
+        FieldSpec("metoda_zivin", "MetodaZivin", FieldKind.ENUM, MetodaZivin),
+        FieldSpec("privod_n", "PrivodN", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_p", "PrivodP", FieldKind.DECIMAL, places=2),
+        FieldSpec("privod_k", "PrivodK", FieldKind.DECIMAL, places=2),
+    ),
+)
+
+ROZSAH_DAT_SPEC = RecordSpec(
+    "RozsahDat",
+    RozsahDat,
+    (FieldSpec("kod", "Kod", FieldKind.ENUM, RozsahKod),),
+)
+
+REQUEST_SPEC = RecordSpec(
+    "Request",
+    Request,
+    (
+        FieldSpec("typ", "Typ", FieldKind.ENUM, TypRequest),
+        FieldSpec("obdobi_od", "ObdobiOd", FieldKind.DATE),
+        FieldSpec("obdobi_do", "ObdobiDo", FieldKind.DATE),
+        FieldSpec("hosp_rok", "HospRok", FieldKind.INT),
+        FieldSpec("rezim_volani", "RezimVolani", FieldKind.ENUM, RezimVolani),
+        FieldSpec("rozsah_dat", "RozsahDat", FieldKind.GROUP, item=ROZSAH_DAT_SPEC),
+        # Sections are streamed record by record after the fields above
+        FieldSpec("osevy", "Osevy", FieldKind.LIST, item=OSEV_SPEC),
+        FieldSpec("aplikace", "Aplikace", FieldKind.SECTION, item=APLIKACE_SPEC),
+        FieldSpec("sklizne", "Sklizne", FieldKind.SECTION, item=SKLIZEN_SPEC),
+        FieldSpec("pastvy", "Pastvy", FieldKind.SECTION, item=PASTVA_SPEC),
+    ),
+)
+
+RESPONSE_SPEC = RecordSpec(
+    "Response",
+    Response,
+    (FieldSpec("guid_podani", "GuidPodani", FieldKind.TEXT),),
+)
+
+_STREAMED_KINDS = (FieldKind.LIST, FieldKind.SECTION)
+
+# Fields written at the start of a request, and its record sections, which
+# are streamed record by record after them, in document order
+REQUEST_HEADER: Tuple[FieldSpec, ...] = tuple(
+    spec for spec in REQUEST_SPEC.fields if spec.kind not in _STREAMED_KINDS
+)
+REQUEST_SECTIONS: Tuple[FieldSpec, ...] = tuple(
+    spec
+    for spec in REQUEST_SPEC.fields
+    if spec.kind in _STREAMED_KINDS and spec.item is not None
+)
+
+Writer = Callable[[Any, Callable[[str], object]], None]
+
+# Called with (records serialized, total records or None if unknown)
+ProgressHook = Callable[[int, Optional[int]], None]
+
+# Number of records between two calls of a progress hook
+PROGRESS_INTERVAL = 256
+
+
+def escape_text(text: str) -> str:
+    """Escape character data for XML output
+
+    Quotes and ``>`` are escaped and line endings are normalized to ``\\n`` so
+    the output stays identical to what the minidom reparse used to produce.
+    """
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _format_text(value: object) -> str:
+    return escape_text(str(value))
+
+
+# Formatters by field kind. Those of dates, bools and enums raise
+# TypeError, AttributeError or KeyError for other values, which the
+# writers turn into _invalid_value errors.
+_FORMATTERS: Dict[FieldKind, Callable[[Any], str]] = {
+    FieldKind.TEXT: _format_text,
+    FieldKind.INT: str,
+    FieldKind.BOOL: {True: "true", False: "false"}.__getitem__,
+    FieldKind.DATE: date.isoformat,
+    FieldKind.DECIMAL: str,
+    FieldKind.ENUM: attrgetter("value"),
+}
+
+
+def _invalid_value(spec: FieldSpec, value: Any) -> ValueError:
+    """Return the error for a value a field cannot be written from"""
+    expected = spec.enum.__name__ if spec.enum is not None else spec.kind.name.lower()
+    return ValueError(f"{spec.tag}: cannot write {value!r} as a {expected}")
+
+
+def _compile_fields(
+    fields: Tuple[FieldSpec, ...], indent: str, step: str, newline: str
+) -> Writer:
+    """Generate a writer for the field elements of a record
+
+    Tags, indentation and the value formatter of every field are resolved
+    once here, so the returned function only reads attributes and appends
+    strings. Nested lists get a renderer in place of a formatter; it emits
+    its own elements, so their tag pieces are left empty.
+    """
+    steps: List[Tuple[str, Callable[[Any], str], str, str, str]] = []
+    for spec in fields:
+        tag = spec.tag
+        if spec.item is None:
+            steps.append(
+                (
+                    spec.name,
+                    _FORMATTERS[spec.kind],
+                    f"{indent}<{tag}>",
+                    f"</{tag}>{newline}",
+                    f"{indent}<{tag}/>{newline}",
+                )
             )
-            self._add_element_if_not_none(
-                pestovani_elem, "PlatnostDo", pestovani.platnost_do
+        else:
+            render = _compile_nested(spec, indent, step, newline)
+            steps.append((spec.name, render, "", "", ""))
+    specs = {spec.name: spec for spec in fields}
+
+    def write_fields(record: Any, append: Callable[[str], object]) -> None:
+        for name, format_value, open_tag, close_tag, empty_tag in steps:
+            value = getattr(record, name)
+            if value is not None:
+                try:
+                    text = format_value(value)
+                except (TypeError, AttributeError, KeyError):
+                    raise _invalid_value(specs[name], value) from None
+                append(open_tag + text + close_tag if text else empty_tag)
+
+    return write_fields
+
+
+def _compile_nested(
+    spec: FieldSpec, indent: str, step: str, newline: str
+) -> Callable[[Any], str]:
+    """Generate a renderer for a field holding a list of nested records"""
+    assert spec.item is not None
+    open_tag = f"{indent}<{spec.tag}>{newline}"
+    close_tag = f"{indent}</{spec.tag}>{newline}"
+    empty_tag = f"{indent}<{spec.tag}/>{newline}"
+    kind = spec.kind
+
+    if kind is FieldKind.REPEATED:
+        write_item = compile_record_writer(spec.item, indent, step, newline)
+        open_tag = close_tag = empty_tag = ""
+    elif kind is FieldKind.GROUP:
+        write_item = _compile_fields(spec.item.fields, indent + step, step, newline)
+    else:
+        write_item = compile_record_writer(spec.item, indent + step, step, newline)
+    if kind is not FieldKind.LIST:
+        empty_tag = ""
+
+    def render(items: Any) -> str:
+        if not items:
+            return empty_tag
+        parts = [open_tag]
+        for item in items:
+            write_item(item, parts.append)
+        parts.append(close_tag)
+        return "".join(parts)
+
+    return render
+
+
+@lru_cache(maxsize=None)
+def compile_record_writer(
+    spec: RecordSpec, indent: str, step: str, newline: str
+) -> Writer:
+    """Return the serializer for a record type at a given indentation
+
+    Serializers are generated from the record's schema on first use and
+    cached, one per record type and layout.
+    """
+    open_tag = f"{indent}<{spec.tag}>{newline}"
+    close_tag = f"{indent}</{spec.tag}>{newline}"
+    empty_tag = f"{indent}<{spec.tag}/>{newline}"
+    write_fields = _compile_fields(spec.fields, indent + step, step, newline)
+
+    def write_record(record: Any, append: Callable[[str], object]) -> None:
+        parts: List[str] = []
+        write_fields(record, parts.append)
+        if parts:
+            append(open_tag)
+            append("".join(parts))
+            append(close_tag)
+        else:
+            append(empty_tag)
+
+    return write_record
+
+
+# Returns the number of bytes a record serializes to in UTF-8
+Sizer = Callable[[Any], int]
+
+
+def _text_size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _value_sizer(spec: FieldSpec, tags: int, empty: int) -> Callable[[Any], int]:
+    """Return the size of a non-None field element from its value
+
+    ``tags`` is the size of the open and close tags and ``empty`` that of
+    the empty element written for an empty value.
+    """
+    kind = spec.kind
+    if kind is FieldKind.DATE:
+        # date.isoformat() always pads the year to four digits
+        return lambda value: tags + 10
+    if kind in (FieldKind.BOOL, FieldKind.ENUM):
+        members: Iterable[Any] = (
+            (True, False) if kind is FieldKind.BOOL else spec.enum or ()
+        )
+        format_value = _FORMATTERS[kind]
+        sizes = {}
+        for member in members:
+            text = format_value(member)
+            sizes[member] = tags + _text_size(text) if text else empty
+        return sizes.__getitem__
+    if kind in (FieldKind.INT, FieldKind.DECIMAL):
+        # Formatted numbers are never empty and always ASCII
+        return lambda value: tags + len(str(value))
+
+    def size_text(value: Any) -> int:
+        text = _format_text(value)
+        return tags + _text_size(text) if text else empty
+
+    return size_text
+
+
+def _compile_field_sizes(
+    fields: Tuple[FieldSpec, ...], indent: str, step: str, newline: str
+) -> Sizer:
+    """Generate a sizer for the field elements written by _compile_fields"""
+    steps: List[Tuple[str, Callable[[Any], int]]] = []
+    for spec in fields:
+        if spec.item is None:
+            tags = _text_size(f"{indent}<{spec.tag}></{spec.tag}>{newline}")
+            empty = _text_size(f"{indent}<{spec.tag}/>{newline}")
+            steps.append((spec.name, _value_sizer(spec, tags, empty)))
+        else:
+            steps.append((spec.name, _compile_nested_size(spec, indent, step, newline)))
+
+    def size_fields(record: Any) -> int:
+        size = 0
+        for name, size_value in steps:
+            value = getattr(record, name)
+            if value is not None:
+                size += size_value(value)
+        return size
+
+    return size_fields
+
+
+def _compile_nested_size(
+    spec: FieldSpec, indent: str, step: str, newline: str
+) -> Sizer:
+    """Generate a sizer for the elements written by _compile_nested"""
+    assert spec.item is not None
+    wrapper = _text_size(f"{indent}<{spec.tag}>{newline}{indent}</{spec.tag}>{newline}")
+    empty = _text_size(f"{indent}<{spec.tag}/>{newline}")
+    kind = spec.kind
+
+    if kind is FieldKind.REPEATED:
+        size_item = compile_record_sizer(spec.item, indent, step, newline)
+        wrapper = 0
+    elif kind is FieldKind.GROUP:
+        size_item = _compile_field_sizes(spec.item.fields, indent + step, step, newline)
+    else:
+        size_item = compile_record_sizer(spec.item, indent + step, step, newline)
+    if kind is not FieldKind.LIST:
+        empty = 0
+
+    def size_items(items: Any) -> int:
+        if not items:
+            return empty
+        return wrapper + sum(map(size_item, items))
+
+    return size_items
+
+
+@lru_cache(maxsize=None)
+def compile_record_sizer(
+    spec: RecordSpec, indent: str, step: str, newline: str
+) -> Sizer:
+    """Return the exact encoded size of a record without serializing it
+
+    The sizer mirrors compile_record_writer field by field, but only
+    computes lengths: dates, booleans and enum members have a fixed size and
+    only text values are formatted.
+    """
+    tags = _text_size(f"{indent}<{spec.tag}>{newline}{indent}</{spec.tag}>{newline}")
+    empty = _text_size(f"{indent}<{spec.tag}/>{newline}")
+    size_fields = _compile_field_sizes(spec.fields, indent + step, step, newline)
+    names = [field_spec.name for field_spec in spec.fields]
+
+    def size_record(record: Any) -> int:
+        size = size_fields(record)
+        if size:
+            return tags + size
+        # Empty nested lists write nothing but still open the element
+        if any(getattr(record, name) is not None for name in names):
+            return tags
+        return empty
+
+    return size_record
+
+
+# Returns the values of one field of a chunk of records, None for missing
+Column = Callable[[str], List[Any]]
+
+# Records fetched at a time by XMLBuilder.estimate_size
+SIZE_CHUNK = 4096
+
+_is_present = partial(is_not, None)
+
+
+def _record_columns(records: List[Any]) -> Column:
+    def column(name: str) -> List[Any]:
+        return list(map(attrgetter(name), records))
+
+    return column
+
+
+def _column_sizer(
+    spec: FieldSpec, indent: str, step: str, newline: str
+) -> Callable[[List[Any]], int]:
+    """Return the total size of the elements of one field over many records
+
+    The values of a field are sized together with C-level list and string
+    operations: fixed-size values are counted, text is measured joined,
+    adding the growth of each escaped character, and nested records are
+    flattened and sized one column at a time in turn.
+    """
+    kind = spec.kind
+    if spec.item is not None:
+        wrapper = len(f"{indent}<{spec.tag}>{newline}{indent}</{spec.tag}>{newline}")
+        empty_list = (
+            len(f"{indent}<{spec.tag}/>{newline}") if kind is FieldKind.LIST else 0
+        )
+        if kind is FieldKind.REPEATED:
+            size_items = _compile_records_total(spec.item, indent, step, newline)
+            wrapper = 0
+        elif kind is FieldKind.GROUP:
+            size_group = _compile_fields_total(
+                spec.item.fields, indent + step, step, newline
             )
 
-    def _build_osevy(self, parent: Element, osevy: List[Osev]) -> None:
-        """Build Osevy XML elements"""
-        osevy_elem = SubElement(parent, "Osevy")
-        for osev in osevy:
-            osev_elem = SubElement(osevy_elem, "Osev")
-            self._add_element_if_not_none(osev_elem, "Zkod", osev.zkod)
-            self._add_element_if_not_none(osev_elem, "Ctverec", osev.ctverec)
-            self._add_element_if_not_none(osev_elem, "IdPozemek", osev.id_pozemek)
-            self._add_element_if_not_none(osev_elem, "NazevPozemek", osev.nazev_pozemek)
-            self._add_element_if_not_none(osev_elem, "PlatnostOd", osev.platnost_od)
-            self._add_element_if_not_none(osev_elem, "PlatnostDo", osev.platnost_do)
-
-            self._build_vymery(osev_elem, osev.vymery)
-            self._build_pestovani(osev_elem, osev.pestovani)
-
-    def _build_aplikace(self, parent: Element, aplikace_list: List[Aplikace]) -> None:
-        """Build Aplikace XML elements"""
-        if not aplikace_list:
-            return
+            def size_items(column: Column, count: int) -> int:
+                return size_group(column, count)[0]
 
-        aplikace_parent = SubElement(parent, "Aplikace")
-        for aplikace in aplikace_list:
-            aplikace_elem = SubElement(aplikace_parent, "Aplikace")
-            self._add_element_if_not_none(
-                aplikace_elem, "Typ", aplikace.typ, enum_value=True
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "DatAplikaceZahajeni", aplikace.dat_aplikace_zahajeni
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "DatZapraveniUkonceni", aplikace.dat_zapraveni_ukonceni
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "DobaZapraveni", aplikace.doba_zapraveni, enum_value=True
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "IdPestovani", aplikace.id_pestovani
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "IdPozemek", aplikace.id_pozemek
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "IdPlodina", aplikace.id_plodina
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "VymeraPlodiny", aplikace.vymera_plodiny
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "VymeraAplikace", aplikace.vymera_aplikace
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "MnozstviCelkem", aplikace.mnozstvi_celkem
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "MnozstviHa", aplikace.mnozstvi_ha
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "MernaJednotka", aplikace.merna_jednotka, enum_value=True
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "IdHnojivo", aplikace.id_hnojivo
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "NazevHnojivo", aplikace.nazev_hnojivo
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "KategorieN", aplikace.kategorie_n
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "DruhHnojiva", aplikace.druh_hnojiva
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "TypoveIdHnojivo", aplikace.typove_id_hnojivo
-            )
-            self._add_element_if_not_none(
-                aplikace_elem, "MetodaZivin", aplikace.metoda_zivin, enum_value=True
-            )
-            self._add_element_if_not_none(aplikace_elem, "PrivodN", aplikace.privod_n)
-            self._add_element_if_not_none(aplikace_elem, "PrivodP", aplikace.privod_p)
-            self._add_element_if_not_none(aplikace_elem, "PrivodK", aplikace.privod_k)
-            self._add_element_if_not_none(aplikace_elem, "PrivodMg", aplikace.privod_mg)
-            self._add_element_if_not_none(aplikace_elem, "PrivodCa", aplikace.privod_ca)
-            self._add_element_if_not_none(aplikace_elem, "PrivodS", aplikace.privod_s)
-            self._add_element_if_not_none(
-                aplikace_elem, "RozkladSlamy", aplikace.rozklad_slamy
+        else:
+            size_items = _compile_records_total(spec.item, indent + step, step, newline)
+
+        def size_nested(values: List[Any]) -> int:
+            lists = list(filter(_is_present, values))
+            filled = list(filter(None, lists))
+            items = list(chain.from_iterable(filled))
+            return (
+                len(filled) * wrapper
+                + (len(lists) - len(filled)) * empty_list
+                + size_items(_record_columns(items), len(items))
             )
 
-    def _build_sklizne(self, parent: Element, sklizne_list: List[Sklizen]) -> None:
-        """Build Sklizne XML elements"""
-        if not sklizne_list:
-            return
+        return size_nested
 
-        sklizne_parent = SubElement(parent, "Sklizne")
-        for sklizen in sklizne_list:
-            sklizen_elem = SubElement(sklizne_parent, "Sklizen")
-            self._add_element_if_not_none(
-                sklizen_elem, "IdPestovani", sklizen.id_pestovani
-            )
-            self._add_element_if_not_none(sklizen_elem, "IdProdukt", sklizen.id_produkt)
-            self._add_element_if_not_none(
-                sklizen_elem, "TypProduktu", sklizen.typ_produktu, enum_value=True
-            )
-            self._add_element_if_not_none(sklizen_elem, "HospRok", sklizen.hosp_rok)
-            self._add_element_if_not_none(
-                sklizen_elem, "VymeraSklizne", sklizen.vymera_sklizne
-            )
-            self._add_element_if_not_none(
-                sklizen_elem, "MnozstviCelkem", sklizen.mnozstvi_celkem
-            )
-            self._add_element_if_not_none(
-                sklizen_elem, "MnozstviHa", sklizen.mnozstvi_ha
-            )
-            self._add_element_if_not_none(
-                sklizen_elem, "MernaJednotka", sklizen.merna_jednotka, enum_value=True
+    tags = _text_size(f"{indent}<{spec.tag}></{spec.tag}>{newline}")
+    empty = _text_size(f"{indent}<{spec.tag}/>{newline}")
+    if kind is FieldKind.DATE:
+        return lambda values: (len(values) - values.count(None)) * (tags + 10)
+    if kind in (FieldKind.BOOL, FieldKind.ENUM):
+        size_value = _value_sizer(spec, tags, empty)
+        members: Iterable[Any] = (
+            (True, False) if kind is FieldKind.BOOL else spec.enum or ()
+        )
+        sizes = [(member, size_value(member)) for member in members]
+
+        def size_members(values: List[Any]) -> int:
+            # list.count matches members by identity in C, while hashing an
+            # Enum member calls Enum.__hash__ in Python
+            return sum(size * values.count(member) for member, size in sizes)
+
+        return size_members
+    if kind in (FieldKind.INT, FieldKind.DECIMAL):
+
+        def size_numbers(values: List[Any]) -> int:
+            present = list(filter(_is_present, values))
+            return len(present) * tags + len("".join(map(str, present)))
+
+        return size_numbers
+
+    def size_texts(values: List[Any]) -> int:
+        texts = list(map(str, filter(_is_present, values)))
+        if not texts:
+            return 0
+        blank = texts.count("")
+        # Separators keep a \r and a \n of adjacent values apart
+        joined = "\0".join(texts)
+        return (
+            _text_size(joined)
+            - (len(texts) - 1)
+            + 4 * joined.count("&")
+            + 3 * (joined.count("<") + joined.count(">"))
+            + 5 * joined.count('"')
+            - joined.count("\r\n")
+            + (len(texts) - blank) * tags
+            + blank * empty
+        )
+
+    return size_texts
+
+
+def _compile_fields_total(
+    fields: Tuple[FieldSpec, ...], indent: str, step: str, newline: str
+) -> Callable[[Column, int], Tuple[int, int]]:
+    """Return the size of the field elements of many records
+
+    The returned function also counts the records without any field, which
+    are written as an empty element.
+    """
+    sizers = [
+        (spec.name, _column_sizer(spec, indent, step, newline)) for spec in fields
+    ]
+    names = [name for name, _ in sizers]
+
+    def size_fields(column: Column, count: int) -> Tuple[int, int]:
+        size = 0
+        complete = False
+        for name, size_values in sizers:
+            values = column(name)
+            if not complete and not values.count(None):
+                complete = True
+            size += size_values(values)
+        if complete or not count:
+            return size, 0
+        rows = zip(*map(column, names))
+        return size, sum(1 for row in rows if row.count(None) == len(names))
+
+    return size_fields
+
+
+@lru_cache(maxsize=None)
+def _compile_records_total(
+    spec: RecordSpec, indent: str, step: str, newline: str
+) -> Callable[[Column, int], int]:
+    """Return the size of many records of spec, like compile_record_sizer"""
+    tags = len(f"{indent}<{spec.tag}>{newline}{indent}</{spec.tag}>{newline}")
+    empty = len(f"{indent}<{spec.tag}/>{newline}")
+    size_fields = _compile_fields_total(spec.fields, indent + step, step, newline)
+
+    def size_records(column: Column, count: int) -> int:
+        size, blank = size_fields(column, count)
+        return size + (count - blank) * tags + blank * empty
+
+    return size_records
+
+
+@lru_cache(maxsize=None)
+def _compile_request_total(pretty: bool) -> Callable[[Request], int]:
+    """Return the function behind XMLBuilder.estimate_size for a layout"""
+    step = "  " if pretty else ""
+    newline = "\n" if pretty else ""
+    size_header = _compile_fields_total(REQUEST_HEADER, step, step, newline)
+    fixed = len(
+        f'<?xml version="1.0" encoding="utf-8"?>{newline}'
+        f"<Request>{newline}</Request>{newline}"
+    )
+    sections = []
+    for spec in REQUEST_SECTIONS:
+        if spec.item is not None:
+            wrapper = len(f"{step}<{spec.tag}>{newline}{step}</{spec.tag}>{newline}")
+            empty = (
+                len(f"{step}<{spec.tag}/>{newline}")
+                if spec.kind is FieldKind.LIST
+                else 0
             )
-            self._add_element_if_not_none(sklizen_elem, "Susina", sklizen.susina)
+            size_records = _compile_records_total(spec.item, step * 2, step, newline)
+            sections.append((spec.name, wrapper, empty, size_records))
+
+    def size_request(request: Request) -> int:
+        size = fixed + size_header(_record_columns([request]), 1)[0]
+        for name, wrapper, empty, size_records in sections:
+            records = getattr(request, name)
+            if not hasattr(records, "__len__"):
+                raise TypeError(f"cannot size section {name} without consuming it")
+            if not len(records):
+                size += empty
+                continue
+            size += wrapper
+            column = getattr(records, "column", None)
+            if column is not None:
+                # Columnar containers such as AplikaceTable
+                size += size_records(column, len(records))
+                continue
+            iterator = iter(records)
+            while True:
+                chunk = list(islice(iterator, SIZE_CHUNK))
+                if not chunk:
+                    break
+                size += size_records(_record_columns(chunk), len(chunk))
+        return size
+
+    return size_request
+
+
+class _Progress:
+    """Counts serialized section records for a progress hook"""
+
+    def __init__(self, hook: ProgressHook, total: Optional[int]) -> None:
+        self.hook = hook
+        self.total = total
+        self.done = 0
+
+    def track(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Yield records, reporting every PROGRESS_INTERVAL serialized records"""
+        hook = self.hook
+        total = self.total
+        done = self.done
+        for record in records:
+            yield record
+            done += 1
+            if not done % PROGRESS_INTERVAL:
+                self.done = done
+                hook(done, total)
+        self.done = done
+
+    def advance(self, count: int) -> None:
+        self.done += count
+        self.hook(self.done, self.total)
 
-    def _build_pastvy(self, parent: Element, pastvy_list: List[Pastva]) -> None:
-        """Build Pastvy XML elements"""
-        if not pastvy_list:
+
+class XMLBuilder:
+    """XML Builder for EH_PEH02A service
+
+    With ``pretty=False`` the builder emits compact XML without indentation
+    or line breaks, intended for machine-to-machine submissions. A
+    FragmentCache lets rebuilds of a mostly unchanged request reuse the
+    serialized records of the previous build. An ``on_build`` hook receives
+    a BuildStats with timings and counters after every request build.
+
+    An ``on_progress`` hook is called with the number of section records
+    serialized so far and the total (None when a section is a generator)
+    every PROGRESS_INTERVAL records and once when the request is complete.
+    An exception raised by the hook aborts the build, which is how callers
+    cancel a build in progress.
+
+    A ``validator`` checks each record as it is serialized and raises
+    ValidationError, either at the first invalid record (fail-fast) or once
+    the last record is written, so no output of an invalid request is
+    complete.
+    """
+
+    def __init__(
+        self,
+        pretty: bool = True,
+        cache: Optional["FragmentCache"] = None,
+        on_build: Optional["BuildHook"] = None,
+        on_progress: Optional[ProgressHook] = None,
+        validator: Optional["Validator"] = None,
+    ) -> None:
+        self.encoding = "utf-8"
+        self.pretty = pretty
+        self.cache = cache
+        self.on_build = on_build
+        self.on_progress = on_progress
+        self.validator = validator
+        self._indent = "  " if pretty else ""
+        self._newline = "\n" if pretty else ""
+
+        step = self._indent
+        newline = self._newline
+        self._write_header = _compile_fields(REQUEST_HEADER, step, step, newline)
+        self._sections = [
+            (spec, compile_record_writer(spec.item, step * 2, step, newline))
+            for spec in REQUEST_SECTIONS
+            if spec.item is not None
+        ]
+        self._write_response = compile_record_writer(RESPONSE_SPEC, "", step, newline)
+
+    def _declaration(self) -> str:
+        return f'<?xml version="1.0" encoding="{self.encoding}"?>{self._newline}'
+
+    @staticmethod
+    def _render_records(records: Iterable[Any], write_record: Writer) -> Iterator[str]:
+        parts: List[str] = []
+        for record in records:
+            write_record(record, parts.append)
+            yield "".join(parts)
+            parts.clear()
+
+    def _write_section(
+        self,
+        write: Callable[[str], object],
+        spec: FieldSpec,
+        records: Iterable[Any],
+        write_record: Writer,
+    ) -> None:
+        """Write a section wrapper and its records one element at a time
+
+        Records are pulled lazily so generators are consumed exactly once.
+        Containers that serialize themselves, such as AplikaceTable, provide
+        ``iter_xml(indent, step, newline)`` yielding ready fragments instead.
+        Empty sections are omitted unless the schema lists them as LIST, in
+        which case they are written as an empty element.
+        """
+        indent = self._indent
+        newline = self._newline
+        tag = spec.tag
+        iter_xml = getattr(records, "iter_xml", None)
+        if iter_xml is not None:
+            fragments = iter(iter_xml(indent * 2, indent, newline))
+        elif self.cache is not None and spec.item is not None:
+            fragments = self.cache.render_records(spec.item, records, write_record)
+        else:
+            fragments = self._render_records(records, write_record)
+        for first in fragments:
+            break
+        else:
+            if spec.kind is FieldKind.LIST:
+                write(f"{indent}<{tag}/>{newline}")
             return
 
-        pastvy_parent = SubElement(parent, "Pastvy")
-        for pastva in pastvy_list:
-            pastva_elem = SubElement(pastvy_parent, "Pastva")
-            self._add_element_if_not_none(pastva_elem, "IdPozemek", pastva.id_pozemek)
-            self._add_element_if_not_none(
-                pastva_elem, "IdDruhZvirat", pastva.id_druh_zvirat
-            )
-            self._add_element_if_not_none(
-                pastva_elem, "IdKategorieZvirat", pastva.id_kategorie_zvirat
-            )
-            self._add_element_if_not_none(
-                pastva_elem, "VlastniKategorieZvirat", pastva.vlastni_kategorie_zvirat
-            )
-            self._add_element_if_not_none(pastva_elem, "PocetKs", pastva.pocet_ks)
-            self._add_element_if_not_none(pastva_elem, "PocetDJ", pastva.pocet_dj)
-            self._add_element_if_not_none(pastva_elem, "PastvaOd", pastva.pastva_od)
-            self._add_element_if_not_none(pastva_elem, "PastvaDo", pastva.pastva_do)
-            self._add_element_if_not_none(
-                pastva_elem, "PocetHodPastva", pastva.pocet_hod_pastva
-            )
-            self._add_element_if_not_none(
-                pastva_elem, "VymeraPastvy", pastva.vymera_pastvy
-            )
-            self._add_element_if_not_none(pastva_elem, "MnozstviHa", pastva.mnozstvi_ha)
-            self._add_element_if_not_none(
-                pastva_elem, "MernaJednotka", pastva.merna_jednotka, enum_value=True
-            )
-            self._add_element_if_not_none(pastva_elem, "IdHnojivo", pastva.id_hnojivo)
-            self._add_element_if_not_none(
-                pastva_elem, "NazevHnojivo", pastva.nazev_hnojivo
-            )
-            self._add_element_if_not_none(
-                pastva_elem, "MetodaZivin", pastva.metoda_zivin, enum_value=True
-            )
-            self._add_element_if_not_none(pastva_elem, "PrivodN", pastva.privod_n)
-            self._add_element_if_not_none(pastva_elem, "PrivodP", pastva.privod_p)
-            self._add_element_if_not_none(pastva_elem, "PrivodK", pastva.privod_k)
+        write(f"{indent}<{tag}>{newline}")
+        write(first)
+        for fragment in fragments:
+            write(fragment)
+        write(f"{indent}</{tag}>{newline}")
+
+    def _write_request(self, request: Request, write: Callable[[str], object]) -> None:
+        """Serialize a request through a text write callback"""
+        newline = self._newline
+        sections = self._iter_sections(request)
+        parts = [self._declaration(), f"<Request>{newline}"]
+        self._write_header(request, parts.append)
+        write("".join(parts))
+
+        for spec, write_record, records in sections:
+            self._write_section(write, spec, records, write_record)
+        write(f"</Request>{newline}")
+
+    def _iter_sections(
+        self, request: Request
+    ) -> Iterator[Tuple[FieldSpec, Writer, Any]]:
+        """Yield each section of a request with its writer and records
+
+        With an ``on_progress`` hook the records are counted as they are
+        consumed, and with a validator checked. The validator checks the
+        header right away, so call this before writing it.
+        """
+        sections = [
+            (spec, write_record, getattr(request, spec.name))
+            for spec, write_record in self._sections
+        ]
+        sizes = [
+            len(records) if hasattr(records, "__len__") else None
+            for _, _, records in sections
+        ]
+        validator = self.validator
+        if validator is not None:
+            validator.start(request)
+            checked = []
+            for spec, write_record, records in sections:
+                assert spec.item is not None
+                records = validator.track(spec.name, spec.item, records)
+                checked.append((spec, write_record, records))
+            sections = checked
+        return self._yield_sections(sections, sizes)
+
+    def _yield_sections(
+        self,
+        sections: List[Tuple[FieldSpec, Writer, Any]],
+        sizes: List[Optional[int]],
+    ) -> Iterator[Tuple[FieldSpec, Writer, Any]]:
+        """Yield the sections of _iter_sections, counting progress
+
+        Code after each yield runs once the section is written.
+        """
+        validator = self.validator
+        if self.on_progress is None:
+            yield from sections
+        else:
+            total = None if None in sizes else sum(filter(None, sizes))
+            progress = _Progress(self.on_progress, total)
+            for spec, write_record, records in sections:
+                if hasattr(records, "iter_xml"):
+                    # Self-serializing containers are counted once written
+                    yield spec, write_record, records
+                    progress.done += len(records)
+                else:
+                    yield spec, write_record, progress.track(records)
+            progress.advance(0)
+        if validator is not None:
+            validator.finish()
+
+    def _write_request_measured(
+        self, request: Request, write: Callable[[str], object], stats: "BuildStats"
+    ) -> None:
+        """Serialize a request like _write_request, measuring each section"""
+        from .build_stats import SectionStats
+
+        encoding = self.encoding
+        serialize_start = perf_counter()
+
+        def counting(section: SectionStats) -> Callable[[str], object]:
+            def counted_write(text: str) -> object:
+                section.count(text, encoding)
+                return write(text)
+
+            return counted_write
+
+        sections = self._iter_sections(request)
+        header = SectionStats("header")
+        stats.sections.append(header)
+        parts = [self._declaration(), f"<Request>{self._newline}"]
+        self._write_header(request, parts.append)
+        counting(header)("".join(parts))
+        header.seconds = perf_counter() - serialize_start
+
+        for spec, write_record, records in sections:
+            section = SectionStats(spec.name)
+            stats.sections.append(section)
+            start = perf_counter()
+            if hasattr(records, "iter_xml"):
+                section.records = len(records)
+            else:
+                records = section.count_records(records)
+            self._write_section(counting(section), spec, records, write_record)
+            section.seconds = perf_counter() - start
+
+        start = perf_counter()
+        counting(header)(f"</Request>{self._newline}")
+        header.seconds += perf_counter() - start
+        stats.phases["serialize"] = perf_counter() - serialize_start
+
+    def _start_stats(self, mode: str) -> "BuildStats":
+        # Imported on first measured build, unmeasured builders never need it
+        from .build_stats import BuildStats
+
+        return BuildStats(mode, self.pretty)
+
+    def _finish(
+        self, stats: "BuildStats", phase: str, finish: Callable[[], Any]
+    ) -> Any:
+        """Run the final phase of a measured build and report the stats"""
+        start = perf_counter()
+        result = finish()
+        stats.phases[phase] = perf_counter() - start
+        assert self.on_build is not None
+        self.on_build(stats)
+        return result
 
     def build_request_xml(self, request: Request) -> str:
         """Build request XML string"""
-        root = Element("Request")
-
-        # Add main request elements
-        self._add_element_if_not_none(root, "Typ", request.typ, enum_value=True)
-        self._add_element_if_not_none(root, "ObdobiOd", request.obdobi_od)
-        self._add_element_if_not_none(root, "ObdobiDo", request.obdobi_do)
-        self._add_element_if_not_none(root, "HospRok", request.hosp_rok)
-        self._add_element_if_not_none(
-            root, "RezimVolani", request.rezim_volani, enum_value=True
+        parts: List[str] = []
+        if self.on_build is None:
+            self._write_request(request, parts.append)
+            return "".join(parts)
+
+        stats = self._start_stats("xml")
+        self._write_request_measured(request, parts.append, stats)
+        xml: str = self._finish(stats, "join", lambda: "".join(parts))
+        return xml
+
+    def build_request_bytes(self, request: Request) -> bytes:
+        """Build request XML encoded as bytes, ready to be sent
+
+        Combined with ``pretty=False`` this is the cheapest way to produce a
+        submission payload: the document is joined and encoded exactly once.
+        """
+        parts: List[str] = []
+        if self.on_build is None:
+            self._write_request(request, parts.append)
+            return "".join(parts).encode(self.encoding)
+
+        stats = self._start_stats("bytes")
+        self._write_request_measured(request, parts.append, stats)
+        data: bytes = self._finish(
+            stats, "encode", lambda: "".join(parts).encode(self.encoding)
         )
+        return data
 
-        # Add RozsahDat if present
-        if request.rozsah_dat:
-            rozsah_elem = SubElement(root, "RozsahDat")
-            for rozsah in request.rozsah_dat:
-                self._add_element_if_not_none(
-                    rozsah_elem, "Kod", rozsah.kod, enum_value=True
-                )
+    def write_request(self, request: Request, fp: BinaryIO) -> None:
+        """Stream request XML to a binary file-like object
 
-        # Build main data sections
-        self._build_osevy(root, request.osevy)
-        self._build_aplikace(root, request.aplikace)
-        self._build_sklizne(root, request.sklizne)
-        self._build_pastvy(root, request.pastvy)
+        Each Osev, Aplikace, Sklizen and Pastva element is encoded and written
+        as soon as it is built, so the sections of the request may be
+        generators and memory use does not grow with the number of records.
+        """
+        encoding = self.encoding
 
-        return self._format_xml(root)
+        def write(text: str) -> object:
+            return fp.write(text.encode(encoding))
+
+        if self.on_build is None:
+            self._write_request(request, write)
+            return
+
+        # Encoding and writing happen inside the serialize phase
+        stats = self._start_stats("stream")
+        self._write_request_measured(request, write, stats)
+        self.on_build(stats)
+
+    def estimate_size(self, request: Request, pretty: Optional[bool] = None) -> int:
+        """Return the size of the encoded request XML without building it
+
+        The size is exact: it equals ``len(build_request_bytes(request))``
+        for a builder with the given ``pretty`` setting, this builder's by
+        default. It is computed from the schema one field at a time over
+        all records of a section, which is far cheaper than serializing
+        them. Sections must be sized containers; a generator section raises
+        TypeError instead of being consumed.
+        """
+        size_request = _compile_request_total(self.pretty if pretty is None else pretty)
+        return size_request(request)
 
     def build_response_xml(self, response: Response) -> str:
         """Build response XML string"""
-        root = Element("Response")
-        self._add_element_if_not_none(root, "GuidPodani", response.guid_podani)
-        return self._format_xml(root)
-
-    def _format_xml(self, root: Element) -> str:
-        """Format XML with proper indentation"""
-        # Use minidom for pretty printing
-        from xml.dom import minidom
-
-        rough_string = tostring(root, encoding=self.encoding)
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding=self.encoding).decode(
-            self.encoding
-        )
+        parts = [self._declaration()]
+        self._write_response(response, parts.append)
+        return "".join(parts)
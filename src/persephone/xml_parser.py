@@ -0,0 +1,220 @@
+"""
+Streaming XML Parser for EH_PEH02A Agricultural Data Service
+
+Reads documents produced by XMLBuilder back into the dataclasses of
+persephone.xml_builder. Parsing is driven by the same field schema the
+builder uses and is built on ``iterparse``: each record element is converted
+and dropped from the tree as soon as it ends, so large archives are parsed
+in constant memory.
+"""
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from functools import lru_cache
+from os import PathLike
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Type,
+    Union,
+)
+from xml.etree.ElementTree import Element, iterparse, parse
+
+from .xml_builder import (
+    REQUEST_SECTIONS,
+    REQUEST_SPEC,
+    RESPONSE_SPEC,
+    Aplikace,
+    FieldKind,
+    FieldSpec,
+    Osev,
+    Pastva,
+    RecordSpec,
+    Request,
+    Response,
+    Sklizen,
+)
+
+Source = Union[str, "PathLike[str]", IO[bytes]]
+Record = Union[Osev, Aplikace, Sklizen, Pastva]
+
+
+def _collect_enums(spec: RecordSpec, found: Dict[Type[Enum], None]) -> None:
+    for field_spec in spec.fields:
+        if field_spec.enum is not None:
+            found[field_spec.enum] = None
+        if field_spec.item is not None:
+            _collect_enums(field_spec.item, found)
+
+
+def _enum_tables() -> Dict[Type[Enum], Dict[str, Enum]]:
+    found: Dict[Type[Enum], None] = {}
+    _collect_enums(REQUEST_SPEC, found)
+    _collect_enums(RESPONSE_SPEC, found)
+    return {cls: {member.value: member for member in cls} for cls in found}
+
+
+# Value-to-member lookup for every enumeration used in the schema
+_ENUM_MEMBERS = _enum_tables()
+
+_PARSERS: Dict[FieldKind, Callable[[str], Any]] = {
+    FieldKind.TEXT: str,
+    FieldKind.INT: int,
+    FieldKind.BOOL: {"true": True, "false": False}.__getitem__,
+    FieldKind.DATE: date.fromisoformat,
+    FieldKind.DECIMAL: Decimal,
+}
+
+
+def enum_members(enum: Type[Enum]) -> Dict[str, Enum]:
+    """Return the members of an enumeration used in the schema by value"""
+    return _ENUM_MEMBERS[enum]
+
+
+def value_parser(spec: FieldSpec) -> Callable[[str], Any]:
+    """Return the parser of the XML text of a field
+
+    Enumerations are looked up by value and raise KeyError for unknown
+    text; the other parsers raise ValueError or a decimal error.
+    """
+    if spec.enum is not None:
+        return _ENUM_MEMBERS[spec.enum].__getitem__
+    return _PARSERS.get(spec.kind, str)
+
+
+_FieldTable = Dict[str, Tuple[FieldSpec, Callable[[str], Any]]]
+
+
+@lru_cache(maxsize=None)
+def _field_table(spec: RecordSpec) -> _FieldTable:
+    """Map child element tags of a record to their field and value parser"""
+    table: _FieldTable = {}
+    for field_spec in spec.fields:
+        table[field_spec.tag] = (field_spec, value_parser(field_spec))
+    return table
+
+
+def _parse_fields(
+    spec: RecordSpec, children: Iterable[Element], parent: str
+) -> Dict[str, Any]:
+    """Convert child elements of a record into dataclass keyword arguments"""
+    table = _field_table(spec)
+    values: Dict[str, Any] = {}
+    for child in children:
+        try:
+            field_spec, parse_value = table[child.tag]
+        except KeyError:
+            raise ValueError(
+                f"Unexpected element <{child.tag}> in <{parent}>"
+            ) from None
+
+        kind = field_spec.kind
+        item = field_spec.item
+        if item is None:
+            text = child.text or ""
+            try:
+                values[field_spec.name] = parse_value(text)
+            except (KeyError, ValueError, InvalidOperation):
+                raise ValueError(
+                    f"Invalid value {text!r} for <{child.tag}> in <{parent}>"
+                ) from None
+        elif kind is FieldKind.REPEATED:
+            values.setdefault(field_spec.name, []).append(_parse_record(item, child))
+        elif kind is FieldKind.GROUP:
+            # Every child of a group is a single-field item
+            values[field_spec.name] = [
+                _construct(item, _parse_fields(item, (entry,), child.tag))
+                for entry in child
+            ]
+        else:
+            values[field_spec.name] = [_parse_record(item, entry) for entry in child]
+    return values
+
+
+def _construct(spec: RecordSpec, values: Dict[str, Any]) -> Any:
+    try:
+        return spec.cls(**values)
+    except TypeError as e:
+        raise ValueError(f"Incomplete <{spec.tag}> element: {e}") from None
+
+
+def _parse_record(spec: RecordSpec, elem: Element) -> Any:
+    """Convert a record element into an instance of its dataclass"""
+    if elem.tag != spec.tag:
+        raise ValueError(f"Expected <{spec.tag}>, found <{elem.tag}>")
+    return _construct(spec, _parse_fields(spec, elem, elem.tag))
+
+
+# Request sections, keyed by wrapper tag
+_SECTIONS = {field_spec.tag: field_spec for field_spec in REQUEST_SECTIONS}
+_SECTION_NAMES = frozenset(field_spec.name for field_spec in _SECTIONS.values())
+
+
+def _iter_request(source: Source) -> Iterator[Tuple[str, Any]]:
+    """Yield (field name, value) for header fields and each section record
+
+    Record elements are removed from the tree once converted, so at most
+    one record is held in memory at a time.
+    """
+    stack: List[Element] = []
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if not stack and elem.tag != REQUEST_SPEC.tag:
+                raise ValueError(f"Expected <{REQUEST_SPEC.tag}>, found <{elem.tag}>")
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        depth = len(stack)
+        if depth == 2:
+            section = _SECTIONS.get(stack[1].tag)
+            if section is not None and section.item is not None:
+                yield section.name, _parse_record(section.item, elem)
+                stack[1].remove(elem)
+        elif depth == 1:
+            if elem.tag not in _SECTIONS:
+                header = _parse_fields(REQUEST_SPEC, (elem,), REQUEST_SPEC.tag)
+                yield from header.items()
+            stack[0].remove(elem)
+
+
+def iter_request_records(source: Source) -> Iterator[Record]:
+    """Iterate over the Osev, Aplikace, Sklizen and Pastva records of a request
+
+    ``source`` is a file name or a binary file object. Records are yielded
+    in document order as soon as their element has been read.
+    """
+    for name, value in _iter_request(source):
+        if name in _SECTION_NAMES:
+            yield value
+
+
+def parse_request_xml(source: Source) -> Request:
+    """Parse a request document into a Request
+
+    ``source`` is a file name or a binary file object.
+    """
+    values: Dict[str, Any] = {name: [] for name in _SECTION_NAMES}
+    for name, value in _iter_request(source):
+        if name in _SECTION_NAMES:
+            values[name].append(value)
+        else:
+            values[name] = value
+    request: Request = _construct(REQUEST_SPEC, values)
+    return request
+
+
+def parse_response_xml(source: Source) -> Response:
+    """Parse a response document into a Response
+
+    ``source`` is a file name or a binary file object.
+    """
+    response: Response = _parse_record(RESPONSE_SPEC, parse(source).getroot())
+    return response
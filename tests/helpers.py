@@ -0,0 +1,251 @@
+"""
+Factories and sample data shared by the test modules
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from persephone.xml_builder import (
+    Aplikace,
+    DobaZapraveni,
+    MernaJednotka,
+    Osev,
+    Pastva,
+    Pestovani,
+    Request,
+    RozsahDat,
+    RozsahKod,
+    Sklizen,
+    TypAplikace,
+    TypPlodiny,
+    TypRequest,
+    Vymera,
+)
+
+
+def create_osev(index=0, **changes):
+    """Create an Osev FIELD<index> on parcel POZ<index> growing PEST<index>
+
+    Keyword arguments replace fields of the Osev.
+    """
+    values = dict(
+        zkod=f"FIELD{index}",
+        ctverec="A1",
+        id_pozemek=f"POZ{index}",
+        nazev_pozemek="Pole u lesa" if index % 2 else 'Louka <& "dolní">',
+        platnost_od=date(2025, 1, 1),
+        vymery=[Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))],
+        pestovani=[
+            Pestovani(
+                id_pestovani=f"PEST{index}",
+                id_plodina=123,
+                viceleta=bool(index % 3),
+                zahajeni_pestovani=date(2025, 3, 15),
+                platnost_od=date(2025, 3, 15),
+                typ_plodiny=TypPlodiny.HLA,
+            )
+        ],
+    )
+    values.update(changes)
+    return Osev(**values)
+
+
+def _create_aplikace(index):
+    return Aplikace(
+        typ=TypAplikace.H,
+        dat_aplikace_zahajeni=date(2025, 4, 1),
+        id_plodina=123,
+        vymera_plodiny=Decimal("10.50"),
+        vymera_aplikace=Decimal("10.50"),
+        id_pestovani=f"PEST{index}",
+        id_pozemek=f"POZ{index}",
+        doba_zapraveni=DobaZapraveni.H48_PLUS,
+        mnozstvi_celkem=Decimal("1500.500"),
+        merna_jednotka=MernaJednotka.T,
+        nazev_hnojivo="Hnůj",
+        rozklad_slamy=False,
+    )
+
+
+def _create_sklizen(index):
+    return Sklizen(
+        id_pestovani=f"PEST{index}",
+        id_produkt=111,
+        hosp_rok=2025,
+        vymera_sklizne=Decimal("10.500"),
+        merna_jednotka=MernaJednotka.T,
+    )
+
+
+def _create_pastva(index):
+    return Pastva(
+        id_pozemek=f"POZ{index}",
+        id_druh_zvirat="CATTLE",
+        pocet_ks=Decimal("25"),
+        pocet_dj=Decimal("20.5"),
+        pastva_od=date(2025, 5, 1),
+        pastva_do=date(2025, 9, 30),
+        id_kategorie_zvirat=222,
+        pocet_hod_pastva=8,
+    )
+
+
+_SECTION_RECORDS = {
+    "aplikace": _create_aplikace,
+    "sklizne": _create_sklizen,
+    "pastvy": _create_pastva,
+}
+
+
+def create_request(count=1, *, zkod=None, sections=(), **changes):
+    """Create an S request for 2025 with count Osevy made by create_osev
+
+    zkod replaces the code of every Osev. Each of the sections named in
+    sections, "aplikace", "sklizne" or "pastvy", gets one record per Osev
+    referring to its Pestovani or parcel. Keyword arguments replace fields
+    of the request.
+    """
+    osev_changes = {} if zkod is None else {"zkod": zkod}
+    values = dict(
+        typ=TypRequest.S,
+        hosp_rok=2025,
+        rozsah_dat=[RozsahDat(RozsahKod.OSEVY)],
+        osevy=[create_osev(index, **osev_changes) for index in range(count)],
+    )
+    for section in sections:
+        values[section] = list(map(_SECTION_RECORDS[section], range(count)))
+    values.update(changes)
+    return Request(**values)
+
+
+def create_aplikace(crop=None, parcel=None, name="Hnůj"):
+    """Create an Aplikace of crop 123 referring to a Pestovani or parcel"""
+    return Aplikace(
+        typ=TypAplikace.H,
+        dat_aplikace_zahajeni=date(2025, 4, 1),
+        id_pestovani=crop,
+        id_pozemek=parcel,
+        id_plodina=123,
+        vymera_plodiny=Decimal("10.50"),
+        vymera_aplikace=Decimal("10.50"),
+        mnozstvi_ha=Decimal("1.5"),
+        merna_jednotka=MernaJednotka.T,
+        nazev_hnojivo=name,
+    )
+
+
+def create_linked_request(size=40):
+    """Create a request whose dependent records are interleaved"""
+    aplikace = [create_aplikace(crop=f"PEST{i}") for i in reversed(range(size))]
+    aplikace.append(create_aplikace(parcel="POZ5"))
+    aplikace.append(create_aplikace(crop="UNKNOWN"))
+    sklizne = [
+        Sklizen(
+            id_pestovani=f"PEST{i}",
+            id_produkt=111,
+            hosp_rok=2025,
+            vymera_sklizne=Decimal("10.500"),
+            merna_jednotka=MernaJednotka.T,
+        )
+        for i in range(0, size, 2)
+    ]
+    pastvy = [
+        Pastva(
+            id_pozemek=f"POZ{i}",
+            id_druh_zvirat="CATTLE",
+            pocet_ks=Decimal("25"),
+            pocet_dj=Decimal("20.5"),
+            pastva_od=date(2025, 5, 1),
+            pastva_do=date(2025, 9, 30),
+            id_kategorie_zvirat=222,
+            pocet_hod_pastva=8,
+        )
+        for i in range(0, size, 5)
+    ]
+    request = create_request(size, aplikace=aplikace, sklizne=sklizne, pastvy=pastvy)
+    # Two Osevy on one parcel must stay together
+    request.osevy.append(create_osev(size, id_pozemek="POZ0"))
+    return request
+
+
+REQUEST_DICT = {
+    "typ": "S",
+    "hosp_rok": 2025,
+    "rozsah_dat": ["O", {"kod": "S"}],
+    "osevy": [
+        {
+            "zkod": "FIELD1",
+            "ctverec": "A1",
+            "id_pozemek": "POZEMEK001",
+            "platnost_od": "2025-01-01",
+            "vymery": [{"vymera": 10.5, "platnost_od": "2025-01-01"}],
+            "pestovani": [
+                {
+                    "id_pestovani": "PEST1",
+                    "id_plodina": 123,
+                    "viceleta": False,
+                    "zahajeni_pestovani": "2025-03-15",
+                    "platnost_od": "2025-03-15",
+                    "typ_plodiny": "HLA",
+                }
+            ],
+        }
+    ],
+    "sklizne": [
+        {
+            "id_pestovani": "PEST1",
+            "id_produkt": "111",
+            "hosp_rok": 2025,
+            "vymera_sklizne": "10.500",
+            "merna_jednotka": "t",
+        }
+    ],
+}
+
+# The request defined by REQUEST_DICT and CSV_TEXT
+LOADED_REQUEST = Request(
+    typ=TypRequest.S,
+    hosp_rok=2025,
+    rozsah_dat=[RozsahDat(RozsahKod.OSEVY), RozsahDat(RozsahKod.SKLIZNE)],
+    osevy=[
+        Osev(
+            zkod="FIELD1",
+            ctverec="A1",
+            id_pozemek="POZEMEK001",
+            platnost_od=date(2025, 1, 1),
+            vymery=[Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))],
+            pestovani=[
+                Pestovani(
+                    id_pestovani="PEST1",
+                    id_plodina=123,
+                    viceleta=False,
+                    zahajeni_pestovani=date(2025, 3, 15),
+                    platnost_od=date(2025, 3, 15),
+                    typ_plodiny=TypPlodiny.HLA,
+                )
+            ],
+        )
+    ],
+    sklizne=[
+        Sklizen(
+            id_pestovani="PEST1",
+            id_produkt=111,
+            hosp_rok=2025,
+            vymera_sklizne=Decimal("10.500"),
+            merna_jednotka=MernaJednotka.T,
+        )
+    ],
+)
+
+CSV_TEXT = """\
+record,typ,hosp_rok,kod,zkod,ctverec,id_pozemek,platnost_od,vymera,\
+id_pestovani,id_plodina,viceleta,zahajeni_pestovani,typ_plodiny,\
+id_produkt,vymera_sklizne,merna_jednotka
+Request,S,2025,,,,,,,,,,,,,,
+RozsahDat,,,O,,,,,,,,,,,,,
+RozsahDat,,,S,,,,,,,,,,,,,
+Osev,,,,FIELD1,A1,POZEMEK001,2025-01-01,,,,,,,,,
+Vymera,,,,,,,2025-01-01,10.50,,,,,,,,
+Pestovani,,,,,,,2025-03-15,,PEST1,123,false,2025-03-15,HLA,,,
+Sklizen,,2025,,,,,,,PEST1,,,,,111,10.500,t
+"""
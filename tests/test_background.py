@@ -0,0 +1,79 @@
+"""
+Test cases for background request builds
+"""
+
+import asyncio
+import threading
+
+import pytest
+from helpers import create_request
+
+from persephone.background import BackgroundBuild, BuildCancelled
+from persephone.xml_builder import XMLBuilder
+
+
+class TestBackgroundBuild:
+    """Test cases for BackgroundBuild"""
+
+    def test_result_and_progress_on_loop_thread(self):
+        """Test that progress is delivered on the event loop thread"""
+        request = create_request(600)
+        calls = []
+
+        def on_progress(done, total):
+            calls.append((done, total, threading.current_thread()))
+
+        xml = asyncio.run(BackgroundBuild(request, on_progress=on_progress).run())
+
+        assert xml == XMLBuilder().build_request_xml(request)
+        assert [(done, total) for done, total, _ in calls] == [
+            (256, 600),
+            (512, 600),
+            (600, 600),
+        ]
+        assert all(thread is threading.main_thread() for _, _, thread in calls)
+
+    def test_loop_stays_responsive(self):
+        """Test that the event loop runs while the build is in progress"""
+        started = threading.Event()
+        release = threading.Event()
+        request = create_request(10)
+        osevy = request.osevy
+
+        def blocking_osevy():
+            started.set()
+            release.wait(5)
+            yield from osevy
+
+        request.osevy = blocking_osevy()
+
+        async def main():
+            task = asyncio.ensure_future(BackgroundBuild(request).run())
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            # The loop is free while the worker thread is blocked
+            assert not task.done()
+            release.set()
+            return await task
+
+        assert "<Zkod>FIELD9</Zkod>" in asyncio.run(main())
+
+    def test_cancel(self):
+        """Test that a cancelled build raises BuildCancelled"""
+        build = BackgroundBuild(create_request(1000))
+        build.cancel()
+
+        assert build.cancelled
+        with pytest.raises(BuildCancelled):
+            asyncio.run(build.run())
+
+    def test_write(self, tmp_path):
+        """Test that write streams the document to a file"""
+        request = create_request(300)
+        path = tmp_path / "request.xml"
+
+        asyncio.run(BackgroundBuild(request, pretty=False).write(str(path)))
+
+        assert path.read_bytes() == XMLBuilder(pretty=False).build_request_bytes(
+            request
+        )
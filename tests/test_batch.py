@@ -0,0 +1,58 @@
+"""
+Test cases for the batch builder
+"""
+
+import threading
+
+from helpers import create_request
+
+from persephone.batch import build_many, output_path
+from persephone.xml_builder import XMLBuilder
+
+
+class TestBuildMany:
+    """Test cases for build_many"""
+
+    def test_results_in_input_order_as_bytes(self):
+        """Test that results keep input order and carry encoded XML"""
+        requests = [create_request(zkod=f"FIELD{i:02d}") for i in range(10)]
+
+        results = build_many(requests, workers=2)
+
+        builder = XMLBuilder()
+        assert [r.index for r in results] == list(range(10))
+        assert all(r.ok and r.path is None for r in results)
+        assert [r.data for r in results] == [
+            builder.build_request_bytes(request) for request in requests
+        ]
+
+    def test_results_written_to_output_dir(self, tmp_path):
+        """Test that workers write files and only return their paths"""
+        requests = (create_request(zkod=f"FIELD{i}") for i in range(3))
+
+        results = build_many(requests, workers=2, output_dir=tmp_path, pretty=False)
+
+        assert [r.path for r in results] == [output_path(tmp_path, i) for i in range(3)]
+        assert all(r.data is None for r in results)
+        with open(results[1].path, "rb") as fp:
+            assert b"<Zkod>FIELD1</Zkod>" in fp.read()
+
+    def test_failures_do_not_abort_batch(self):
+        """Test that failing requests are reported per result"""
+        broken = create_request(zkod="BROKEN")
+        broken.typ = "K"  # Not an enum member, fails in the builder
+        unpicklable = create_request(zkod="LOCKED")
+        unpicklable.osevy = [threading.Lock()]
+        requests = [
+            create_request(zkod="OK0"),
+            broken,
+            unpicklable,
+            create_request(zkod="OK3"),
+        ]
+
+        results = build_many(requests, workers=2)
+
+        assert [r.ok for r in results] == [True, False, False, True]
+        assert results[1].error == "ValueError: Typ: cannot write 'K' as a TypRequest"
+        assert results[2].error
+        assert b"OK3" in results[3].data
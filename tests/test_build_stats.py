@@ -0,0 +1,97 @@
+"""
+Test cases for XMLBuilder build statistics
+"""
+
+import io
+import json
+from xml.etree import ElementTree as ET
+
+from helpers import create_request
+
+from persephone.build_stats import BuildStats, JsonLinesExporter
+from persephone.columnar import AplikaceTable
+from persephone.xml_builder import XMLBuilder
+
+
+class TestBuildStats:
+    """Test cases for the on_build hook"""
+
+    def build(self, method, request, **kwargs):
+        collected = []
+        builder = XMLBuilder(on_build=collected.append, **kwargs)
+        if method == "write_request":
+            fp = io.BytesIO()
+            builder.write_request(request, fp)
+            output = fp.getvalue()
+        else:
+            output = getattr(builder, method)(request)
+        assert len(collected) == 1
+        return collected[0], output
+
+    def test_output_unchanged(self):
+        """Test that measuring a build does not change its output"""
+        request = create_request(3, sections=("aplikace",))
+        _, xml = self.build("build_request_xml", request)
+
+        assert xml == XMLBuilder().build_request_xml(request)
+
+    def test_sections_and_counters(self):
+        """Test per-section record, element and byte counts"""
+        request = create_request(3, sections=("aplikace",))
+        stats, data = self.build("build_request_bytes", request)
+        sections = {section.name: section for section in stats.sections}
+
+        assert stats.mode == "bytes"
+        assert list(sections) == ["header", "osevy", "aplikace", "sklizne", "pastvy"]
+        assert sections["osevy"].records == 3
+        assert sections["aplikace"].records == 3
+        assert sections["sklizne"].bytes == 0
+        assert stats.records == 6
+        assert stats.bytes == len(data)
+        assert sum(s.elements for s in stats.sections) == len(
+            list(ET.fromstring(data).iter())
+        )
+        assert set(stats.phases) == {"serialize", "encode"}
+        assert stats.seconds >= sum(s.seconds for s in stats.sections) * 0.99
+
+    def test_stream_and_compact(self):
+        """Test that streamed compact builds count the bytes written"""
+        stats, data = self.build(
+            "write_request", create_request(3, sections=("aplikace",)), pretty=False
+        )
+
+        assert stats.mode == "stream"
+        assert not stats.pretty
+        assert stats.bytes == len(data)
+        assert set(stats.phases) == {"serialize"}
+
+    def test_columnar_section(self):
+        """Test that self-serializing sections report their length"""
+        request = create_request(3, sections=("aplikace",))
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+        stats, xml = self.build("build_request_xml", request)
+
+        assert stats.sections[2].records == 3
+        assert xml == XMLBuilder().build_request_xml(
+            create_request(3, sections=("aplikace",))
+        )
+
+    def test_json_lines_exporter(self):
+        """Test that the exporter writes one JSON object per build"""
+        fp = io.StringIO()
+        builder = XMLBuilder(on_build=JsonLinesExporter(fp))
+        builder.build_request_xml(create_request(1, sections=("aplikace",)))
+        builder.build_request_xml(create_request(2, sections=("aplikace",)))
+
+        lines = [json.loads(line) for line in fp.getvalue().splitlines()]
+        assert [line["records"] for line in lines] == [2, 4]
+        assert lines[0]["sections"]["osevy"]["records"] == 1
+        assert lines[0]["mode"] == "xml"
+        assert set(lines[0]["phases"]) == {"serialize", "join"}
+
+    def test_to_dict_totals(self):
+        """Test the totals of an empty BuildStats"""
+        stats = BuildStats("xml", True)
+
+        assert stats.to_dict()["records"] == 0
+        assert stats.seconds == 0
@@ -0,0 +1,164 @@
+"""
+Test cases for the headless command line interface
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from helpers import CSV_TEXT, LOADED_REQUEST, REQUEST_DICT
+
+from persephone.cli import main
+from persephone.stub_server import StubServer
+from persephone.xml_builder import XMLBuilder
+
+
+def write_inputs(directory):
+    """Write one JSON, one multi-request JSON, one CSV and one broken file"""
+    directory.mkdir()
+    (directory / "a.json").write_text(json.dumps(REQUEST_DICT), encoding="utf-8")
+    (directory / "b.json").write_text(
+        json.dumps([REQUEST_DICT, REQUEST_DICT]), encoding="utf-8"
+    )
+    (directory / "c.csv").write_text(CSV_TEXT, encoding="utf-8")
+    (directory / "d.json").write_text('{"typ": "X"}', encoding="utf-8")
+    (directory / "notes.txt").write_text("ignored", encoding="utf-8")
+
+
+class TestBuildCommand:
+    """Test cases for python -m persephone build"""
+
+    def test_build_directory(self, tmp_path, capsys):
+        """Test that inputs are converted and failures reported"""
+        write_inputs(tmp_path / "in")
+        output = tmp_path / "out"
+
+        status = main(
+            ["build", "--input", str(tmp_path / "in"), "--output", str(output)]
+        )
+
+        captured = capsys.readouterr()
+        assert status == 1
+        assert sorted(p.name for p in output.iterdir()) == [
+            "a.xml",
+            "b-001.xml",
+            "b-002.xml",
+            "c.xml",
+        ]
+        expected = XMLBuilder().build_request_xml(LOADED_REQUEST)
+        assert (output / "c.xml").read_text(encoding="utf-8") == expected
+        assert "Converted 3 of 4 files: 4 requests, 8 records" in captured.out
+        assert "FAILED" in captured.err and "d.json" in captured.err
+
+    def test_parallel_compact_build(self, tmp_path, capsys):
+        """Test that parallel builds give the same files"""
+        write_inputs(tmp_path / "in")
+        (tmp_path / "in" / "d.json").unlink()
+        output = tmp_path / "out"
+
+        status = main(
+            [
+                "build",
+                "--input",
+                str(tmp_path / "in"),
+                "--output",
+                str(output),
+                "--jobs",
+                "2",
+                "--compact",
+            ]
+        )
+
+        assert status == 0
+        expected = XMLBuilder(pretty=False).build_request_xml(LOADED_REQUEST)
+        assert (output / "b-002.xml").read_text(encoding="utf-8") == expected
+
+    def test_missing_input_directory(self, tmp_path, capsys):
+        """Test that a missing input directory is an error"""
+        status = main(["build", "--input", str(tmp_path / "x"), "--output", "out"])
+
+        assert status == 2
+        assert "Input directory not found" in capsys.readouterr().err
+
+    def test_module_entry_point(self, tmp_path):
+        """Test that python -m persephone build runs the command line"""
+        write_inputs(tmp_path / "in")
+        src = Path(__file__).parent.parent / "src"
+
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "persephone",
+                "build",
+                "--input",
+                "in",
+                "--output",
+                "out",
+            ],
+            cwd=tmp_path,
+            env={**os.environ, "PYTHONPATH": str(src)},
+            capture_output=True,
+            text=True,
+        )
+
+        assert completed.returncode == 1
+        assert "4 requests" in completed.stdout
+        assert (tmp_path / "out" / "a.xml").exists()
+
+
+class TestSubmitCommand:
+    """Test cases for python -m persephone submit"""
+
+    def serve(self, stub):
+        """Run stub on a background thread and return a function stopping it"""
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            loop.run_until_complete(stub.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(stub.close())
+            loop.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started.wait()
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+
+        return stop
+
+    def test_submit_and_resume(self, tmp_path, capsys):
+        """Test that a second run only submits what was not accepted"""
+        inputs = tmp_path / "in"
+        inputs.mkdir()
+        (inputs / "a.json").write_text(
+            json.dumps([REQUEST_DICT, dict(REQUEST_DICT, hosp_rok=2026)]),
+            encoding="utf-8",
+        )
+        stub = StubServer()
+        stub.fail_next(1, status=400)
+        stop = self.serve(stub)
+        try:
+            args = ["submit", "--outbox", str(tmp_path / "outbox.sqlite")]
+            args += ["--url", stub.url, "--input", str(inputs), "--concurrency", "1"]
+
+            first = main(args)
+            second = main(args + ["--retry-failed"])
+        finally:
+            stop()
+
+        output = capsys.readouterr().out.splitlines()
+        assert first == 1
+        assert output[0].startswith("1 accepted, 0 pending, 1 failed")
+        assert second == 0
+        assert output[1].startswith("2 accepted, 0 pending, 0 failed")
+        assert stub.requests == 3
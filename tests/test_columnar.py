@@ -0,0 +1,141 @@
+"""
+Test cases for the columnar Aplikace table
+"""
+
+from dataclasses import replace
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from persephone.columnar import AplikaceTable, format_scaled, scale_column
+from persephone.xml_builder import (
+    Aplikace,
+    DobaZapraveni,
+    MernaJednotka,
+    Request,
+    TypAplikace,
+    TypRequest,
+    XMLBuilder,
+)
+
+
+def create_aplikace(count):
+    """Create Aplikace records with a mix of present and missing fields"""
+    return [
+        Aplikace(
+            typ=TypAplikace.H if i % 2 else TypAplikace.S,
+            dat_aplikace_zahajeni=date(2025, 4, 1 + i % 28),
+            id_plodina=100 + i,
+            vymera_plodiny=Decimal("15.755"),
+            vymera_aplikace=Decimal(i) / 7,
+            doba_zapraveni=DobaZapraveni.H48_PLUS if i % 3 == 0 else None,
+            id_pestovani=f"PEST<{i}>" if i % 2 else None,
+            mnozstvi_celkem=Decimal("1500.5") if i % 5 else None,
+            merna_jednotka=MernaJednotka.KG,
+            nazev_hnojivo="" if i == 1 else None,
+            rozklad_slamy=bool(i % 2) if i % 4 else None,
+        )
+        for i in range(count)
+    ]
+
+
+class TestAplikaceTable:
+    """Test cases for AplikaceTable"""
+
+    def test_scaled_integer_rounding_matches_decimal_round(self):
+        """Test column rounding against round() on Decimal values"""
+        values = [
+            Decimal("15.755"),
+            Decimal("15.745"),
+            "0.005",
+            3,
+            Decimal("1E+2"),
+            Decimal("-0.001"),
+            "-0.004",
+            -7,
+        ]
+
+        scaled, negative_zeros = scale_column(values, 2)
+
+        assert negative_zeros == [5, 6]
+        assert [
+            format_scaled(v, 2, row in negative_zeros) for row, v in enumerate(scaled)
+        ] == [str(round(Decimal(v), 2)) for v in values]
+
+    def test_negative_zero_and_large_values(self):
+        """Test values rounding to -0 and values too large for a 64-bit array"""
+        records = create_aplikace(3)
+        records[1] = replace(records[1], vymera_aplikace=Decimal("-0.001"))
+        records[2] = replace(
+            records[2], id_plodina=2**70, mnozstvi_celkem=Decimal(2**70)
+        )
+        builder = XMLBuilder(pretty=False)
+
+        def build(aplikace):
+            request = Request(typ=TypRequest.S, osevy=[], aplikace=aplikace)
+            return builder.build_request_xml(request)
+
+        table = AplikaceTable.from_records(records)
+
+        assert table[1].vymera_aplikace.as_tuple() == Decimal("-0.00").as_tuple()
+        assert table[2].id_plodina == 2**70
+        assert table[2].mnozstvi_celkem == 2**70
+        assert "<VymeraAplikace>-0.00</VymeraAplikace>" in build(table)
+        assert build(table) == build(records)
+
+    def test_round_trip_through_records(self):
+        """Test that records read back from the table equal the originals"""
+        records = create_aplikace(20)
+
+        table = AplikaceTable.from_records(records)
+
+        assert len(table) == 20
+        assert list(table) == records
+        assert table[-1] == records[-1]
+        assert table.column("mnozstvi_celkem")[:2] == [None, Decimal("1500.500")]
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_serialization_matches_records(self, pretty):
+        """Test that XMLBuilder output is identical for table and records"""
+        records = create_aplikace(50)
+        builder = XMLBuilder(pretty=pretty)
+
+        def build(aplikace):
+            request = Request(typ=TypRequest.S, osevy=[], aplikace=aplikace)
+            return builder.build_request_xml(request)
+
+        table = AplikaceTable.from_records(records)
+        expected = build(records)
+        assert build(table) == expected
+
+        step, newline = ("  ", "\n") if pretty else ("", "")
+        chunks = list(table.iter_xml(step * 2, step, newline, chunk_size=7))
+        assert len(chunks) == 8
+        assert "".join(chunks) in expected
+
+    def test_from_columns_rounds_whole_columns(self):
+        """Test building from raw columns with omitted optional fields"""
+        table = AplikaceTable.from_columns(
+            typ=["H", TypAplikace.K],
+            dat_aplikace_zahajeni=[date(2025, 4, 1), date(2025, 4, 2)],
+            id_plodina=[1, 2],
+            vymera_plodiny=["1.005", "2.999"],
+            vymera_aplikace=[Decimal("1"), Decimal("2")],
+            mnozstvi_ha=[None, "0.12345"],
+        )
+
+        assert table.column("typ") == [TypAplikace.H, TypAplikace.K]
+        assert table.column("vymera_plodiny") == [Decimal("1.00"), Decimal("3.00")]
+        assert table.column("mnozstvi_ha") == [None, Decimal("0.123")]
+        assert table.column("privod_n") == [None, None]
+        assert len(AplikaceTable.from_columns()) == 0
+
+    def test_invalid_columns(self):
+        """Test that unknown, ragged and incomplete columns are rejected"""
+        with pytest.raises(ValueError, match="Unknown columns"):
+            AplikaceTable.from_columns(foo=[1])
+        with pytest.raises(ValueError, match="different lengths"):
+            AplikaceTable.from_columns(id_plodina=[1], mnozstvi_ha=[None, None])
+        with pytest.raises(ValueError, match="required"):
+            AplikaceTable.from_columns(id_plodina=[1])
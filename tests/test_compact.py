@@ -0,0 +1,82 @@
+"""
+Test cases for the compact record classes
+"""
+
+import pickle
+from dataclasses import fields
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from persephone import compact, xml_builder
+from persephone.xml_builder import Request, TypAplikace, TypRequest, XMLBuilder
+
+
+class TestCompactRecords:
+    """Test cases for slotted record variants"""
+
+    @pytest.mark.parametrize("name", compact.__all__)
+    def test_same_fields_without_instance_dict(self, name):
+        """Test that variants keep the fields but drop __dict__"""
+        regular = getattr(xml_builder, name)
+        slotted = getattr(compact, name)
+
+        assert [f.name for f in fields(slotted)] == [f.name for f in fields(regular)]
+        assert slotted.__slots__ == tuple(f.name for f in fields(regular))
+        assert "__dict__" not in dir(slotted)
+
+    def test_constructor_defaults_and_rounding(self):
+        """Test that defaults and __post_init__ rounding still apply"""
+        aplikace = compact.Aplikace(
+            typ=TypAplikace.H,
+            dat_aplikace_zahajeni=date(2025, 4, 1),
+            id_plodina=123,
+            vymera_plodiny=Decimal("15.999"),
+            vymera_aplikace=Decimal("15.75"),
+            privod_n=Decimal("12.999"),
+        )
+        osev = compact.Osev(
+            zkod="TEST01",
+            ctverec="A1",
+            id_pozemek="POZEMEK001",
+            platnost_od=date(2025, 1, 1),
+            vymery=[],
+        )
+
+        assert aplikace.vymera_plodiny == Decimal("16.00")
+        assert aplikace.privod_n == Decimal("13.00")
+        assert aplikace.rozklad_slamy is None
+        assert osev.pestovani == []
+        assert (
+            osev.pestovani is not compact.Osev("", "", "", date.today(), []).pestovani
+        )
+        with pytest.raises(AttributeError):
+            aplikace.unknown = 1
+
+    def test_builder_output_matches_regular_records(self):
+        """Test that compact records serialize like the regular ones"""
+
+        def build(module):
+            vymera = module.Vymera(
+                vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1)
+            )
+            osev = module.Osev(
+                zkod="TEST01",
+                ctverec="A1",
+                id_pozemek="POZEMEK001",
+                platnost_od=date(2025, 1, 1),
+                vymery=[vymera],
+            )
+            return Request(typ=TypRequest.K, osevy=[osev])
+
+        builder = XMLBuilder()
+        assert builder.build_request_xml(build(compact)) == builder.build_request_xml(
+            build(xml_builder)
+        )
+
+    def test_pickle_round_trip(self):
+        """Test that compact records can be sent to worker processes"""
+        vymera = compact.Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))
+
+        assert pickle.loads(pickle.dumps(vymera)) == vymera
@@ -0,0 +1,148 @@
+"""
+Test cases for canonical content hashes
+"""
+
+import dataclasses
+from datetime import date
+from decimal import Decimal
+
+from helpers import create_osev, create_request
+
+from persephone import compact
+from persephone.columnar import AplikaceTable
+from persephone.content_hash import hash_record, hash_request, record_encoder
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    Aplikace,
+    MernaJednotka,
+    TypAplikace,
+)
+
+
+def create_aplikace(count=3):
+    """Create Aplikace records"""
+    return [
+        Aplikace(
+            typ=TypAplikace.H,
+            dat_aplikace_zahajeni=date(2025, 4, 1),
+            id_pestovani="PEST1",
+            id_pozemek="POZ1",
+            id_plodina=123,
+            vymera_plodiny=Decimal("10.50"),
+            vymera_aplikace=Decimal("10.50"),
+            mnozstvi_ha=Decimal(i + 1),
+            merna_jednotka=MernaJednotka.T,
+            nazev_hnojivo="Hnůj",
+        )
+        for i in range(count)
+    ]
+
+
+class TestHashRequest:
+    """Test cases for hash_request"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.request = create_request(2, sections=("aplikace",))
+
+    def test_equal_content_equal_hash(self):
+        """Test that separately built equal requests hash alike"""
+        assert hash_request(self.request) == hash_request(
+            create_request(2, sections=("aplikace",))
+        )
+
+    def test_pinned_digest(self):
+        """Test that the digest does not change between versions"""
+        assert hash_request(self.request) == (
+            "b6b7b61c9c328cec86af3443cccf0b5c" "c61ea3a6bbd7a5f8e8d0322150ec7b03"
+        )
+
+    def test_every_field_counts(self):
+        """Test that changing any field changes the hash"""
+        request = self.request
+        variants = [
+            dataclasses.replace(request, hosp_rok=2026),
+            dataclasses.replace(request, rozsah_dat=[]),
+            dataclasses.replace(request, osevy=[create_osev(0)]),
+            dataclasses.replace(request, osevy=[create_osev(1), create_osev(0)]),
+            dataclasses.replace(request, osevy=[create_osev(0), create_osev(2)]),
+            dataclasses.replace(request, aplikace=request.aplikace[:1]),
+        ]
+        osev = create_osev(1)
+        osev.pestovani[0].viceleta = False
+        variants.append(dataclasses.replace(request, osevy=[create_osev(0), osev]))
+        osev = create_osev(1)
+        osev.vymery[0].vymera = Decimal("10.51")
+        variants.append(dataclasses.replace(request, osevy=[create_osev(0), osev]))
+
+        hashes = {hash_request(variant) for variant in variants}
+
+        assert hash_request(request) not in hashes
+        assert len(hashes) == len(variants)
+
+    def test_missing_empty_and_separators(self):
+        """Test that None, empty values and separator characters stay distinct"""
+        osevy = [
+            [create_osev(zkod="A", nazev_pozemek=None)],
+            [create_osev(zkod="A", nazev_pozemek="")],
+            [create_osev(zkod="A", nazev_pozemek="None")],
+            [create_osev(zkod="A", vymery=[])],
+            [create_osev(zkod="A", vymery=[], pestovani=[])],
+            [create_osev(zkod="A", ctverec="B\x1fC")],
+            [create_osev(zkod="A\x1fB", ctverec="C")],
+        ]
+
+        hashes = {hash_request(create_request(osevy=records)) for records in osevy}
+
+        assert len(hashes) == len(osevy)
+
+    def test_containers(self):
+        """Test that generators and columnar tables hash like lists"""
+        request = self.request
+        records = request.aplikace
+
+        generated = dataclasses.replace(request, aplikace=iter(records))
+        table = dataclasses.replace(
+            request, aplikace=AplikaceTable.from_records(records)
+        )
+
+        assert hash_request(generated) == hash_request(request)
+        assert hash_request(table) == hash_request(request)
+
+    def test_batches(self):
+        """Test that sections longer than a batch are hashed in full"""
+        records = create_aplikace(3000)
+        changed = create_aplikace(3000)
+        changed[2500].nazev_hnojivo = "Kejda"
+
+        assert hash_request(create_request(aplikace=records)) != hash_request(
+            create_request(aplikace=changed)
+        )
+
+
+class TestHashRecord:
+    """Test cases for hash_record"""
+
+    def test_compact_records(self):
+        """Test that compact records hash like the dataclasses"""
+        vymera = compact.Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))
+        osev = dataclasses.replace(create_osev(), vymery=[vymera])
+
+        assert hash_record(OSEV_SPEC, osev) == hash_record(OSEV_SPEC, create_osev())
+
+    def test_record_hash(self):
+        """Test that record hashes depend on content and record type"""
+        first, second, third = create_aplikace()
+        assert hash_record(APLIKACE_SPEC, first) == hash_record(
+            APLIKACE_SPEC, create_aplikace()[0]
+        )
+        assert hash_record(APLIKACE_SPEC, first) != hash_record(APLIKACE_SPEC, second)
+        assert len(hash_record(APLIKACE_SPEC, third)) == 32
+
+    def test_encoding_is_ascii(self):
+        """Test that text is escaped so the encoding has no raw separators"""
+        encoded = record_encoder(APLIKACE_SPEC)(create_aplikace()[0])
+
+        assert "Hn\\u016fj" in encoded
+        assert encoded.isascii()
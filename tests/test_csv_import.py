@@ -0,0 +1,225 @@
+"""
+Test cases for the streaming CSV importer
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from persephone import compact, csv_import
+from persephone.csv_import import CSVImporter, RowError
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    PASTVA_SPEC,
+    Aplikace,
+    DobaZapraveni,
+    MernaJednotka,
+    MetodaZivin,
+    Pastva,
+    Request,
+    TypAplikace,
+    TypRequest,
+    XMLBuilder,
+)
+
+APLIKACE_CSV = """\
+typ,dat_aplikace_zahajeni,id_plodina,vymera_plodiny,vymera_aplikace,\
+doba_zapraveni,mnozstvi_ha,merna_jednotka,metoda_zivin,nazev_hnojivo,rozklad_slamy
+H,2025-04-01,123,10.505,10.5,48+,1.23456,kg,P,Hnůj,true
+K,2025-04-02,124,3,3,,,t,,"Kejda, ředěná",
+"""
+
+
+def expected_aplikace():
+    return [
+        Aplikace(
+            typ=TypAplikace.H,
+            dat_aplikace_zahajeni=date(2025, 4, 1),
+            id_plodina=123,
+            vymera_plodiny=Decimal("10.505"),
+            vymera_aplikace=Decimal("10.5"),
+            doba_zapraveni=DobaZapraveni.H48_PLUS,
+            mnozstvi_ha=Decimal("1.23456"),
+            merna_jednotka=MernaJednotka.KG,
+            metoda_zivin=MetodaZivin.PRVKOVA,
+            nazev_hnojivo="Hnůj",
+            rozklad_slamy=True,
+        ),
+        Aplikace(
+            typ=TypAplikace.K,
+            dat_aplikace_zahajeni=date(2025, 4, 2),
+            id_plodina=124,
+            vymera_plodiny=Decimal("3"),
+            vymera_aplikace=Decimal("3"),
+            merna_jednotka=MernaJednotka.T,
+            nazev_hnojivo="Kejda, ředěná",
+        ),
+    ]
+
+
+def read(importer, text):
+    return list(importer.iter_records(io.StringIO(text)))
+
+
+class TestCSVImporter:
+    """Test cases for CSVImporter"""
+
+    def test_records_match_dataclasses(self):
+        """Test that imported records equal constructed and rounded ones"""
+        importer = CSVImporter(APLIKACE_SPEC)
+
+        records = read(importer, APLIKACE_CSV)
+
+        assert records == expected_aplikace()
+        assert records[0].mnozstvi_ha.as_tuple().exponent == -3
+        assert importer.errors == []
+        assert importer.rows == 2
+
+    def test_column_mapping(self, tmp_path):
+        """Test mapped headers, ignored extra columns and unmapped fields"""
+        path = tmp_path / "pastvy.csv"
+        path.write_text(
+            "Parcel;Animals;Head;Units;From;To;Comment\n"
+            "POZ1;CATTLE;25;20.5;2025-05-01;2025-09-30;ignored\n",
+            encoding="utf-8",
+        )
+        columns = {
+            "id_pozemek": "Parcel",
+            "id_druh_zvirat": "Animals",
+            "pocet_ks": "Head",
+            "pocet_dj": "Units",
+            "pastva_od": "From",
+            "pastva_do": "To",
+        }
+        importer = CSVImporter(PASTVA_SPEC, columns, delimiter=";")
+
+        (record,) = importer.iter_records(path)
+
+        assert record == Pastva(
+            id_pozemek="POZ1",
+            id_druh_zvirat="CATTLE",
+            pocet_ks=Decimal("25"),
+            pocet_dj=Decimal("20.5"),
+            pastva_od=date(2025, 5, 1),
+            pastva_do=date(2025, 9, 30),
+        )
+
+    def test_row_errors_are_collected(self):
+        """Test that invalid rows are reported and the others imported"""
+        lines = APLIKACE_CSV.splitlines()
+        text = "\n".join(
+            [
+                lines[0],
+                lines[1],
+                lines[1].replace(",kg,", ",oz,"),
+                "",
+                lines[1].replace("2025-04-01", ""),
+                "H,2025-04-01",
+                lines[1].replace("10.505", "ten"),
+                lines[2],
+            ]
+        )
+        importer = CSVImporter(APLIKACE_SPEC, chunk_size=3)
+
+        records = read(importer, text)
+
+        assert records == [expected_aplikace()[0], expected_aplikace()[1]]
+        assert importer.errors == [
+            RowError(3, "invalid value", "merna_jednotka", "oz"),
+            RowError(5, "missing value", "dat_aplikace_zahajeni"),
+            RowError(6, "expected 11 columns, found 2"),
+            RowError(7, "invalid value", "vymera_plodiny", "ten"),
+        ]
+        assert str(importer.errors[0]) == "line 3: merna_jednotka: invalid value 'oz'"
+        assert importer.rows == 6
+
+    def test_bad_value_in_full_chunk(self):
+        """Test rows and lines when a chunk of whole rows has a bad value"""
+        lines = APLIKACE_CSV.splitlines()
+        text = "\n".join(
+            [
+                lines[0],
+                lines[2].replace("Kejda, ředěná", "Kejda,\nředěná"),
+                lines[1].replace(",kg,", ",oz,"),
+                lines[1],
+            ]
+        )
+        importer = CSVImporter(APLIKACE_SPEC)
+
+        records = read(importer, text)
+
+        assert [record.nazev_hnojivo for record in records] == [
+            "Kejda,\nředěná",
+            "Hnůj",
+        ]
+        # The quoted value spans lines 2 and 3
+        assert importer.errors == [RowError(4, "invalid value", "merna_jednotka", "oz")]
+        assert importer.rows == 3
+
+    def test_chunks(self):
+        """Test that records are yielded in lists of chunk_size"""
+        lines = APLIKACE_CSV.splitlines()
+        text = "\n".join([lines[0]] + [lines[1]] * 5)
+        importer = CSVImporter(APLIKACE_SPEC, chunk_size=2)
+
+        chunks = list(importer.iter_chunks(io.StringIO(text)))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+    def test_memo_limit(self, monkeypatch):
+        """Test that values stay correct when the memo is cleared"""
+        monkeypatch.setattr(csv_import, "MEMO_SIZE", 2)
+        header = "typ,dat_aplikace_zahajeni,id_plodina,vymera_plodiny,vymera_aplikace"
+        rows = [f"H,2025-04-{day:02d},1,{day}.5,1" for day in range(1, 11)]
+        importer = CSVImporter(
+            APLIKACE_SPEC, {name: name for name in header.split(",")}
+        )
+
+        records = read(importer, "\n".join([header] + rows))
+
+        assert [record.dat_aplikace_zahajeni.day for record in records] == list(
+            range(1, 11)
+        )
+        assert [record.vymera_plodiny for record in records] == [
+            Decimal(f"{day}.50") for day in range(1, 11)
+        ]
+
+    def test_compact_records(self):
+        """Test that slotted record classes are filled like dataclasses"""
+        importer = CSVImporter(APLIKACE_SPEC, record_class=compact.Aplikace)
+
+        records = read(importer, APLIKACE_CSV)
+
+        assert all(type(record) is compact.Aplikace for record in records)
+        assert [
+            vars(Aplikace(**{name: getattr(record, name) for name in record.__slots__}))
+            for record in records
+        ] == [vars(record) for record in expected_aplikace()]
+
+    def test_streams_into_builder(self):
+        """Test that records can be passed to write_request as a generator"""
+        builder = XMLBuilder()
+        request = Request(
+            typ=TypRequest.S,
+            osevy=[],
+            aplikace=CSVImporter(APLIKACE_SPEC).iter_records(io.StringIO(APLIKACE_CSV)),
+        )
+        stream = io.BytesIO()
+
+        builder.write_request(request, stream)
+
+        request.aplikace = expected_aplikace()
+        assert stream.getvalue() == builder.build_request_bytes(request)
+
+    def test_invalid_setup(self):
+        """Test errors raised before any row is read"""
+        with pytest.raises(ValueError, match="nested records"):
+            CSVImporter(OSEV_SPEC)
+        with pytest.raises(ValueError, match="Unknown fields: bogus"):
+            CSVImporter(APLIKACE_SPEC, {"bogus": "x"})
+        with pytest.raises(ValueError, match="Missing columns: Crop"):
+            read(CSVImporter(APLIKACE_SPEC, {"id_plodina": "Crop"}), APLIKACE_CSV)
+        assert read(CSVImporter(APLIKACE_SPEC), "") == []
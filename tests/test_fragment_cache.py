@@ -0,0 +1,133 @@
+"""
+Test cases for the fragment cache
+"""
+
+import sys
+from decimal import Decimal
+
+import pytest
+from helpers import create_request
+
+from persephone.fragment_cache import _ENTRY_OVERHEAD, FragmentCache
+from persephone.xml_builder import XMLBuilder
+
+
+class TestFragmentCache:
+    """Test cases for FragmentCache"""
+
+    def test_rebuild_reuses_unchanged_records(self):
+        """Test that only changed records are serialized again"""
+        request = create_request(10, sections=("sklizne",))
+        request.sklizne = []
+        cache = FragmentCache()
+        builder = XMLBuilder(cache=cache)
+
+        first = builder.build_request_xml(request)
+        assert (cache.hits, cache.misses) == (0, 10)
+
+        request.osevy[3].pestovani[0].id_plodina = 999
+        second = builder.build_request_xml(request)
+
+        assert (cache.hits, cache.misses) == (9, 11)
+        assert second == XMLBuilder().build_request_xml(request)
+        assert second != first
+
+    def test_fragments_keyed_by_layout(self):
+        """Test that pretty and compact builders sharing a cache do not mix"""
+        request = create_request(2, sections=("sklizne",))
+        request.sklizne = []
+        cache = FragmentCache()
+
+        pretty = XMLBuilder(cache=cache).build_request_xml(request)
+        compact = XMLBuilder(pretty=False, cache=cache).build_request_xml(request)
+
+        assert pretty == XMLBuilder().build_request_xml(request)
+        assert compact == XMLBuilder(pretty=False).build_request_xml(request)
+        assert cache.hits == 0
+
+    def test_lru_eviction_respects_byte_budget(self):
+        """Test that the least recently used fragments are evicted"""
+        request = create_request(10, sections=("sklizne",))
+        request.sklizne = []
+        cache = FragmentCache(max_bytes=3000)
+        builder = XMLBuilder(cache=cache)
+
+        builder.build_request_xml(request)
+
+        assert 0 < len(cache) < 10
+        assert 0 < cache.size <= cache.max_bytes
+
+        # The first records were evicted, the last ones are still cached
+        builder.build_request_xml(request)
+        assert cache.hits == 0
+
+    def test_equal_values_serialized_differently(self):
+        """Test that values comparing equal but written differently do not mix"""
+        request = create_request(3, sections=("sklizne",))
+        request.osevy = []
+        amounts = [5, Decimal("5"), Decimal("5.000")]
+        for sklizen, amount in zip(request.sklizne, amounts):
+            sklizen.id_pestovani = "PEST"
+            sklizen.vymera_sklizne = amount
+        cache = FragmentCache()
+
+        xml = XMLBuilder(cache=cache).build_request_xml(request)
+
+        assert xml == XMLBuilder().build_request_xml(request)
+        assert "<VymeraSklizne>5.000</VymeraSklizne>" in xml
+        # Only 5 and Decimal("5") are written alike
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_size_counts_memory(self):
+        """Test that the size counts fragments in memory and key overhead"""
+        request = create_request(2, sections=("sklizne",))
+        request.sklizne = []
+        request.osevy[1].nazev_pozemek = "Žlutý lán"
+        cache = FragmentCache()
+
+        XMLBuilder(cache=cache).build_request_xml(request)
+
+        fragments = list(cache._fragments.values())
+        assert cache.size == sum(sys.getsizeof(f) + _ENTRY_OVERHEAD for f in fragments)
+        # Non-ASCII text takes more memory per character
+        assert sys.getsizeof(fragments[1]) > 2 * len(fragments[1])
+
+    def test_unhashable_values_are_cached(self):
+        """Test that records are keyed by digest, whatever their values"""
+
+        class UnhashableText(str):
+            __hash__ = None  # type: ignore[assignment]
+
+        request = create_request(1, sections=("sklizne",))
+        request.sklizne = []
+        request.osevy[0].zkod = UnhashableText("FIELD")
+        cache = FragmentCache()
+        builder = XMLBuilder(cache=cache)
+
+        builder.build_request_xml(request)
+        xml = builder.build_request_xml(request)
+
+        assert "<Zkod>FIELD</Zkod>" in xml
+        assert (len(cache), cache.hits, cache.misses) == (1, 1, 1)
+
+    def test_invalid_values_are_not_cached(self):
+        """Test that values the builder rejects are reported by the builder"""
+        request = create_request(1)
+        request.osevy[0].platnost_od = "2025-01-01"
+        cache = FragmentCache()
+
+        with pytest.raises(ValueError, match="PlatnostOd: cannot write"):
+            XMLBuilder(cache=cache).build_request_xml(request)
+
+        assert len(cache) == 0
+
+    def test_clear(self):
+        """Test that clear drops all fragments"""
+        cache = FragmentCache()
+        XMLBuilder(cache=cache).build_request_xml(
+            create_request(3, sections=("sklizne",))
+        )
+
+        assert len(cache) == 6
+        cache.clear()
+        assert (len(cache), cache.size) == (0, 0)
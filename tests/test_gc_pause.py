@@ -0,0 +1,76 @@
+"""
+Test cases for pausing the garbage collector
+"""
+
+import gc
+
+import pytest
+from helpers import create_osev
+
+from persephone.gc_pause import paused_gc
+from persephone.periods import ValidityIndex
+
+
+@pytest.fixture
+def gc_enabled():
+    """Restore the collector state after each test"""
+    enabled = gc.isenabled()
+    gc.enable()
+    yield
+    if enabled:
+        gc.enable()
+    else:
+        gc.disable()
+
+
+class TestPausedGC:
+    """Test cases for paused_gc"""
+
+    def test_restores_enabled_collector(self, gc_enabled):
+        """Test that the collector is re-enabled, also after an exception"""
+        with paused_gc():
+            assert not gc.isenabled()
+        assert gc.isenabled()
+
+        with pytest.raises(ValueError):
+            with paused_gc():
+                raise ValueError
+        assert gc.isenabled()
+
+    def test_nested_blocks(self, gc_enabled):
+        """Test that only the outermost block re-enables the collector"""
+        with paused_gc():
+            with paused_gc():
+                pass
+            assert not gc.isenabled()
+        assert gc.isenabled()
+
+    def test_opt_out(self, gc_enabled):
+        """Test that paused_gc(False) leaves the collector running"""
+        with paused_gc(False):
+            assert gc.isenabled()
+            with paused_gc():
+                assert not gc.isenabled()
+            assert gc.isenabled()
+        assert gc.isenabled()
+
+    def test_keeps_disabled_collector(self, gc_enabled):
+        """Test that a collector disabled by the caller stays disabled"""
+        gc.disable()
+        with paused_gc():
+            pass
+        assert not gc.isenabled()
+
+    def test_library_pauses_only_when_asked(self, gc_enabled):
+        """Test that indexes leave the collector running by default"""
+        states = []
+
+        def osevy():
+            states.append(gc.isenabled())
+            yield create_osev()
+
+        ValidityIndex(osevy())
+        ValidityIndex(osevy(), pause_gc=True)
+
+        assert states == [True, False]
+        assert gc.isenabled()
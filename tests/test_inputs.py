@@ -0,0 +1,81 @@
+"""
+Test cases for JSON and CSV request definitions
+"""
+
+import json
+
+import pytest
+from helpers import CSV_TEXT, LOADED_REQUEST, REQUEST_DICT
+
+from persephone.inputs import load_csv, load_json, request_from_dict
+
+
+class TestRequestFromDict:
+    """Test cases for request_from_dict"""
+
+    def test_native_and_string_values(self):
+        """Test conversion of JSON numbers, booleans and XML-form strings"""
+        assert request_from_dict(REQUEST_DICT) == LOADED_REQUEST
+
+    @pytest.mark.parametrize(
+        "path, value, message",
+        [
+            (("osevy", 0, "vymery", 0, "vymera"), "abc", "osevy[0].vymery[0].vymera"),
+            (("sklizne", 0, "merna_jednotka"), "tuny", "invalid value 'tuny'"),
+            (("osevy", 0, "pestovani", 0, "viceleta"), "yes", "viceleta"),
+            (("osevy", 0, "vymery"), "10.5", "expected a list"),
+        ],
+    )
+    def test_invalid_values(self, path, value, message):
+        """Test that invalid values are reported with their path"""
+        data = json.loads(json.dumps(REQUEST_DICT))
+        target = data
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = value
+
+        with pytest.raises(ValueError, match=message.replace("[", r"\[")):
+            request_from_dict(data)
+
+    def test_unknown_and_missing_fields(self):
+        """Test that unknown fields and missing required fields are rejected"""
+        with pytest.raises(ValueError, match="unknown field 'color'"):
+            request_from_dict({**REQUEST_DICT, "color": "red"})
+        with pytest.raises(ValueError, match="incomplete Request"):
+            request_from_dict({"typ": "S"})
+
+
+class TestLoaders:
+    """Test cases for the file loaders"""
+
+    def test_load_json_object_and_list(self, tmp_path):
+        """Test that a JSON file may hold one request or a list"""
+        single = tmp_path / "single.json"
+        single.write_text(json.dumps(REQUEST_DICT), encoding="utf-8")
+        many = tmp_path / "many.json"
+        many.write_text(json.dumps([REQUEST_DICT, REQUEST_DICT]), encoding="utf-8")
+
+        assert load_json(single) == [LOADED_REQUEST]
+        assert load_json(many) == [LOADED_REQUEST, LOADED_REQUEST]
+
+    def test_load_csv(self, tmp_path):
+        """Test that CSV rows are grouped into requests and parcels"""
+        path = tmp_path / "farm.csv"
+        path.write_text(CSV_TEXT + CSV_TEXT.split("\n", 1)[1], encoding="utf-8")
+
+        assert load_csv(path) == [LOADED_REQUEST, LOADED_REQUEST]
+
+    def test_load_csv_structure_errors(self, tmp_path):
+        """Test that misplaced rows are reported with their line"""
+        path = tmp_path / "farm.csv"
+        path.write_text("record,zkod\nOsev,FIELD1\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="line 2: Osev before the first Request"):
+            load_csv(path)
+
+        path.write_text("record,typ\nRequest,S\nVymera,\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="line 3: Vymera outside of an Osev"):
+            load_csv(path)
+
+        path.write_text("record,typ\nRequest,S\nParcel,\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="unknown record type 'Parcel'"):
+            load_csv(path)
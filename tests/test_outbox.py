@@ -0,0 +1,206 @@
+"""
+Test cases for the durable submission outbox
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+from helpers import create_request
+
+from persephone.content_hash import hash_request
+from persephone.outbox import DrainReport, Outbox, OutboxState, payload_hash
+from persephone.stub_server import StubServer
+from persephone.submission import SubmissionClient
+from persephone.xml_builder import XMLBuilder
+
+
+def drain(outbox, server, **client_options):
+    """Drain outbox into server, started for the drain, and return the report"""
+    client_options.setdefault("backoff", 0.001)
+
+    async def main():
+        async with server, SubmissionClient(server.url, **client_options) as client:
+            return await outbox.drain(client, batch_size=3, flush_size=2)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def server():
+    """A stub server, started by each drain"""
+    return StubServer(seed=0)
+
+
+class HoldingServer(StubServer):
+    """Stub server answering two submissions and holding the others
+
+    ``holding`` is set once two submissions are held, and they are answered
+    once ``release`` is set. Create it inside the event loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.holding = asyncio.Event()
+        self.release = asyncio.Event()
+        self.held = 0
+
+    async def _respond(self, request_line, body):
+        if self.requests >= 2:
+            self.held += 1
+            if self.held == 2:
+                self.holding.set()
+            await self.release.wait()
+        return await super()._respond(request_line, body)
+
+
+class TestOutbox:
+    """Test cases for Outbox"""
+
+    def test_wal_mode(self, tmp_path):
+        """Test that the database uses write-ahead logging"""
+        path = str(tmp_path / "outbox.sqlite")
+        with Outbox(path):
+            pass
+        connection = sqlite3.connect(path)
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        connection.close()
+
+    def test_add_deduplicates_by_content(self, tmp_path):
+        """Test that identical documents are stored once"""
+        with Outbox(str(tmp_path / "outbox.sqlite")) as outbox:
+            keys = outbox.add_requests(
+                [
+                    create_request(zkod="A"),
+                    create_request(zkod="B"),
+                    create_request(zkod="A"),
+                ]
+            )
+
+            assert keys[0] == keys[2] != keys[1]
+            assert outbox.counts()[OutboxState.PENDING] == 2
+            assert payload_hash(outbox.payload(keys[0])) == keys[0]
+            assert outbox.get("missing") is None
+
+    def test_known_requests_are_not_rebuilt(self, tmp_path):
+        """Test that requests are matched by content hash before building"""
+        builds = []
+
+        class CountingBuilder(XMLBuilder):
+            def build_request_bytes(self, request):
+                builds.append(request)
+                return super().build_request_bytes(request)
+
+        builder = CountingBuilder(pretty=False)
+        with Outbox(str(tmp_path / "outbox.sqlite")) as outbox:
+            first = outbox.add_requests(
+                [create_request(zkod="A"), create_request(zkod="A")], builder
+            )
+            second = outbox.add_requests(
+                [create_request(zkod="A"), create_request(zkod="B")], builder
+            )
+
+        assert first == [first[0]] * 2
+        assert second[0] == first[0] != second[1]
+        assert [request.osevy[0].zkod for request in builds] == ["A", "B"]
+
+    def test_opens_outbox_without_request_hashes(self, tmp_path):
+        """Test that an outbox created before request hashes is upgraded"""
+        path = str(tmp_path / "outbox.sqlite")
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE submissions (hash TEXT PRIMARY KEY, payload BLOB NOT NULL,"
+            " state TEXT NOT NULL, guid TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT, updated REAL NOT NULL)"
+        )
+        connection.close()
+
+        with Outbox(path) as outbox:
+            (key,) = outbox.add_requests([create_request()])
+
+        connection = sqlite3.connect(path)
+        (request_hash,) = connection.execute(
+            "SELECT request_hash FROM submissions WHERE hash = ?", (key,)
+        ).fetchone()
+        connection.close()
+        assert request_hash == hash_request(create_request())
+
+    def test_drain_records_guids(self, tmp_path, server):
+        """Test that accepted documents get their GUIDs"""
+        with Outbox(str(tmp_path / "outbox.sqlite")) as outbox:
+            keys = outbox.add_requests(create_request(zkod=f"F{i}") for i in range(7))
+
+            report = drain(outbox, server, concurrency=2)
+
+            assert report == DrainReport(accepted=7)
+            entries = [outbox.get(key) for key in keys]
+            assert all(entry.state is OutboxState.ACCEPTED for entry in entries)
+            assert len({entry.guid for entry in entries}) == 7
+            assert all(entry.attempts == 1 for entry in entries)
+
+    def test_resume_after_restart(self, tmp_path, server):
+        """Test that reopening the outbox only submits pending documents"""
+        path = str(tmp_path / "outbox.sqlite")
+        with Outbox(path) as outbox:
+            outbox.add_requests(create_request(zkod=f"F{i}") for i in range(4))
+            drain(outbox, server)
+        with Outbox(path) as outbox:
+            # Regenerating the batch adds one new document
+            outbox.add_requests(create_request(zkod=f"F{i}") for i in range(5))
+            report = drain(outbox, server)
+
+        assert report == DrainReport(accepted=1)
+        assert server.requests == 5
+
+    def test_failures(self, tmp_path, server):
+        """Test that rejections fail and exhausted retries stay pending"""
+        with Outbox(str(tmp_path / "outbox.sqlite")) as outbox:
+            rejected, unavailable = outbox.add_requests(
+                [create_request(zkod="A"), create_request(zkod="B")]
+            )
+            server.fail_next(1, status=400)
+            server.fail_next(2, status=503)
+
+            report = drain(outbox, server, concurrency=1, retries=1)
+
+            assert report == DrainReport(failed=1, pending=1)
+            assert outbox.get(rejected).state is OutboxState.FAILED
+            assert "HTTP 400" in outbox.get(rejected).error
+            entry = outbox.get(unavailable)
+            assert (entry.state, entry.attempts) == (OutboxState.PENDING, 2)
+
+            # The next drain submits the pending document again
+            assert drain(outbox, server) == DrainReport(accepted=1)
+            assert outbox.get(unavailable).attempts == 3
+
+            assert outbox.retry_failed() == 1
+            assert drain(outbox, server) == DrainReport(accepted=1)
+            assert outbox.counts() == {
+                OutboxState.PENDING: 0,
+                OutboxState.ACCEPTED: 2,
+                OutboxState.FAILED: 0,
+            }
+
+    def test_cancelled_drain_keeps_outcomes(self, tmp_path):
+        """Test that outcomes are recorded when a drain is cancelled"""
+        with Outbox(str(tmp_path / "outbox.sqlite")) as outbox:
+            outbox.add_requests(create_request(zkod=f"F{i}") for i in range(6))
+
+            async def main():
+                async with HoldingServer() as server, SubmissionClient(
+                    server.url, concurrency=2
+                ) as client:
+                    task = asyncio.ensure_future(outbox.drain(client, flush_size=100))
+                    # Both workers wait on held submissions, after recording
+                    # the two answered ones
+                    await asyncio.wait_for(server.holding.wait(), 10)
+                    task.cancel()
+                    with pytest.raises(asyncio.CancelledError):
+                        await task
+                    server.release.set()
+
+            asyncio.run(main())
+
+            counts = outbox.counts()
+            assert counts[OutboxState.ACCEPTED] == 2
+            assert counts[OutboxState.PENDING] == 4
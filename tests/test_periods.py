@@ -0,0 +1,177 @@
+"""
+Test cases for the validity period index
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from helpers import create_linked_request, create_osev
+
+from persephone import compact
+from persephone.periods import ValidityIndex
+from persephone.xml_builder import RozsahDat, RozsahKod, TypRequest, Vymera, XMLBuilder
+
+
+def overlaps(record, od, do):
+    end = record.platnost_do
+    return record.platnost_od <= do and (end is None or end >= od)
+
+
+def create_farm(size, seed=0):
+    """Create Osevy with random and open-ended validities"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+
+    def period(record):
+        record.platnost_od = start + timedelta(days=rng.randrange(700))
+        if rng.random() < 0.8:
+            record.platnost_do = record.platnost_od + timedelta(days=rng.randrange(120))
+        return record
+
+    osevy = []
+    for index in range(size):
+        osev = period(create_osev(index))
+        osev.vymery = [period(Vymera(vymera=osev.vymery[0].vymera, platnost_od=start))]
+        osev.vymery.append(
+            period(Vymera(vymera=osev.vymery[0].vymera, platnost_od=start))
+        )
+        period(osev.pestovani[0])
+        osevy.append(osev)
+    return osevy
+
+
+class TestValidityIndex:
+    """Test cases for ValidityIndex"""
+
+    def test_matches_linear_scan(self):
+        """Test that queries find the records a scan of the farm finds"""
+        osevy = create_farm(300)
+        index = ValidityIndex(osevy)
+        vymery = [vymera for osev in osevy for vymera in osev.vymery]
+        pestovani = [record for osev in osevy for record in osev.pestovani]
+        rng = random.Random(1)
+
+        for _ in range(200):
+            od = date(2023, 12, 1) + timedelta(days=rng.randrange(900))
+            do = od + timedelta(days=rng.choice([0, 1, 7, 30, 365]))
+
+            assert index.osevy(od, do) == [o for o in osevy if overlaps(o, od, do)]
+            assert index.vymery(od, do) == [v for v in vymery if overlaps(v, od, do)]
+            assert index.pestovani(od, do) == [
+                p for p in pestovani if overlaps(p, od, do)
+            ]
+
+    def test_inclusive_and_open_ends(self):
+        """Test that both ends are inclusive and a missing end is open"""
+        osev = create_osev(0)
+        osev.platnost_do = date(2025, 1, 31)
+        index = ValidityIndex([osev, create_osev(1)])
+
+        assert index.osevy(date(2024, 12, 1), date(2024, 12, 31)) == []
+        assert index.osevy(date(2024, 12, 1), date(2025, 1, 1)) == [
+            osev,
+            index.osevy(date(2030, 1, 1), date(2030, 1, 1))[0],
+        ]
+        assert index.osevy(date(2025, 1, 31), date(2025, 1, 31))[0] is osev
+        assert len(index.osevy(date(2025, 2, 1), date(2099, 1, 1))) == 1
+        with pytest.raises(ValueError, match="Period ends before it starts"):
+            index.osevy(date(2025, 2, 1), date(2025, 1, 1))
+
+    @pytest.mark.parametrize(
+        "path, find",
+        [
+            ("osevy[1]", lambda osevy: osevy[1]),
+            ("osevy[2].vymery[1]", lambda osevy: osevy[2].vymery[1]),
+            ("osevy[0].pestovani[0]", lambda osevy: osevy[0].pestovani[0]),
+        ],
+    )
+    def test_rejects_inverted_validity(self, path, find):
+        """Test that a record ending before it starts is reported by path"""
+        osevy = create_farm(3)
+        record = find(osevy)
+        record.platnost_do = record.platnost_od - timedelta(days=1)
+
+        with pytest.raises(ValueError) as raised:
+            ValidityIndex(osevy)
+
+        assert str(raised.value) == (
+            f"{path}.platnost_do: {record.platnost_do} "
+            f"is before platnost_od {record.platnost_od}"
+        )
+
+    def test_select_keeps_valid_nested_records(self):
+        """Test that Osevy are copied with only the records valid in the period"""
+        osevy = create_farm(100)
+        index = ValidityIndex(osevy)
+        od, do = date(2024, 6, 1), date(2024, 8, 31)
+
+        selected = index.select(od, do)
+
+        assert [osev.zkod for osev in selected] == [
+            osev.zkod for osev in osevy if overlaps(osev, od, do)
+        ]
+        for osev in selected:
+            original = next(o for o in osevy if o.zkod == osev.zkod)
+            assert osev is not original
+            assert osev.vymery == [v for v in original.vymery if overlaps(v, od, do)]
+            assert osev.pestovani == [
+                p for p in original.pestovani if overlaps(p, od, do)
+            ]
+        # The index is left unchanged
+        assert all(len(osev.vymery) == 2 for osev in osevy)
+
+    def test_requests_for_periods(self):
+        """Test that each period becomes a K request with the template header"""
+        farm = create_linked_request(6)
+        farm.rozsah_dat = [RozsahDat(kod=RozsahKod.OSEVY)]
+        farm.osevy[2].platnost_do = date(2025, 3, 31)
+        index = ValidityIndex(farm.osevy)
+        aplikace = list(farm.aplikace)
+        periods = [
+            (date(2025, 1, 1), date(2025, 3, 31)),
+            (date(2025, 4, 1), date(2025, 6, 30)),
+        ]
+
+        requests = list(index.requests(periods, template=farm))
+
+        first, second = requests
+        assert (first.typ, first.obdobi_od, first.obdobi_do) == (
+            TypRequest.K,
+            date(2025, 1, 1),
+            date(2025, 3, 31),
+        )
+        assert first.rozsah_dat == farm.rozsah_dat
+        assert first.rozsah_dat is not farm.rozsah_dat
+        assert (first.aplikace, first.sklizne, first.pastvy) == ([], [], [])
+        assert len(first.osevy) == 7 and len(second.osevy) == 6
+        assert "FIELD2" not in [osev.zkod for osev in second.osevy]
+        # Pestovani start on March 15th
+        assert all(osev.pestovani for osev in first.osevy)
+        assert farm.typ == TypRequest.S and farm.aplikace == aplikace
+
+        builder = XMLBuilder(pretty=False)
+        assert b"<ObdobiOd>2025-04-01</ObdobiOd>" in builder.build_request_bytes(second)
+        assert index.request(*periods[0]).rozsah_dat == []
+
+    def test_compact_records(self):
+        """Test that slotted Osevy are selected like dataclasses"""
+        osevy = create_farm(20)
+        slotted = [
+            compact.Osev(**{**vars(osev), "vymery": list(osev.vymery)})
+            for osev in osevy
+        ]
+        od, do = date(2024, 3, 1), date(2024, 9, 30)
+
+        expected = ValidityIndex(osevy).select(od, do)
+        selected = ValidityIndex(slotted).select(od, do)
+
+        assert [type(osev) for osev in selected] == [compact.Osev] * len(expected)
+        assert [
+            (osev.zkod, osev.platnost_do, osev.vymery, osev.pestovani)
+            for osev in selected
+        ] == [
+            (osev.zkod, osev.platnost_do, osev.vymery, osev.pestovani)
+            for osev in expected
+        ]
+        assert all(len(osev.vymery) == 2 for osev in slotted)
@@ -2,9 +2,20 @@
 Unit tests for the Persephone application
 """
 
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
 from unittest.mock import Mock
 
+import pytest
+
+import persephone
 from persephone import Persephone
+from persephone import app as app_module
+from persephone.xml_builder import Request, TypRequest
 
 
 class TestPersephone:
@@ -28,6 +39,19 @@ class TestPersephone:
         # The app should still be created successfully
         assert app is not None
 
+    def test_startup_with_toga_backend(self, monkeypatch):
+        """Test that the app starts with the paged views on the dummy backend"""
+        pytest.importorskip("toga_dummy")
+        if not app_module.TOGA_AVAILABLE:
+            pytest.skip("Toga is not installed")
+        monkeypatch.setenv("TOGA_BACKEND", "toga_dummy")
+
+        app = Persephone("Persephone", "org.example.persephone")
+
+        assert sorted(app.page_widgets) == ["aplikace", "osevy", "xml"]
+        assert sorted(app.page_labels) == ["aplikace", "osevy", "xml"]
+        assert app.pagers == {} and app.main_window is not None
+
     def test_generate_xml_with_crop_code(self):
         """Test generate_xml_example method with a crop code provided"""
         app = Persephone()
@@ -41,7 +65,7 @@ class TestPersephone:
         widget = Mock()
 
         # Call the method
-        app.generate_xml_example(widget)
+        asyncio.run(app.generate_xml_example(widget))
 
         # Verify the result contains expected content
         result_text = app.result_label.text
@@ -61,7 +85,7 @@ class TestPersephone:
         widget = Mock()
 
         # Call the method
-        app.generate_xml_example(widget)
+        asyncio.run(app.generate_xml_example(widget))
 
         # Verify the default crop code is used
         result_text = app.result_label.text
@@ -80,8 +104,122 @@ class TestPersephone:
         widget = Mock()
 
         # Call the method
-        app.generate_xml_example(widget)
+        asyncio.run(app.generate_xml_example(widget))
 
         # Verify the default crop code is used (whitespace should be stripped)
         result_text = app.result_label.text
         assert "XML generated successfully for crop: WHEAT01" in result_text
+
+    def test_generate_xml_reports_progress_and_reenables(self):
+        """Test that generation shows progress and restores the buttons"""
+        app = Persephone()
+        app.crop_input = Mock(value="CORN")
+        app.result_label = Mock()
+        app.progress_bar = Mock()
+        app.generate_button = Mock()
+        app.cancel_button = Mock()
+        progress = []
+        app.show_progress = lambda done, total: progress.append((done, total))
+
+        asyncio.run(app.generate_xml_example(None))
+
+        assert progress == [(1, 1)]
+        assert app.generate_button.enabled is True
+        assert app.cancel_button.enabled is False
+        assert app.current_build is None
+        assert "crop: CORN" in app.result_label.text
+
+    def test_generate_xml_fills_paged_views(self):
+        """Test that generation shows the first page of the preview and tables"""
+        app = Persephone()
+        app.crop_input = Mock(value="CORN")
+        app.result_label = Mock()
+        app.page_widgets = {"xml": Mock(), "osevy": Mock(), "aplikace": Mock()}
+        app.page_labels = {"xml": Mock()}
+
+        asyncio.run(app.generate_xml_example(None))
+
+        preview = app.pagers["xml"]
+        assert app.page_widgets["xml"].value.startswith("<?xml")
+        assert app.page_widgets["osevy"].data[0][0] == "CORN"
+        assert app.page_widgets["aplikace"].data == []
+        assert app.page_labels["xml"].text == "Page 1 / 1"
+
+        app.turn_page("xml", 1)
+        assert app.page_numbers["xml"] == 0
+
+        app.close_preview()
+        assert not Path(preview.path).exists()
+
+    def test_cancel_generation(self, monkeypatch):
+        """Test that a cancelled generation reports it was cancelled"""
+        release = threading.Event()
+        example = app_module.create_example_request("CORN")
+
+        def slow_osevy():
+            release.wait(5)
+            yield from example.osevy
+
+        monkeypatch.setattr(
+            app_module,
+            "create_example_request",
+            lambda crop_code: Request(typ=TypRequest.S, osevy=slow_osevy()),
+        )
+        app = Persephone()
+        app.crop_input = Mock(value="CORN")
+        app.result_label = Mock()
+
+        async def generate_and_cancel():
+            task = asyncio.ensure_future(app.generate_xml_example(None))
+            while app.current_build is None:
+                await asyncio.sleep(0)
+            app.cancel_generation()
+            release.set()
+            await task
+
+        asyncio.run(generate_and_cancel())
+
+        assert app.result_label.text == "XML generation cancelled"
+
+    def test_show_progress(self):
+        """Test that progress updates the bar and the label"""
+        app = Persephone()
+        app.progress_bar = Mock()
+        app.result_label = Mock()
+
+        app.show_progress(256, 1000)
+
+        assert (app.progress_bar.value, app.progress_bar.max) == (256, 1000)
+        assert app.result_label.text == "Serialized 256 / 1000 records..."
+
+
+class TestLazyImports:
+    """Test cases for the lazy loading of the GUI"""
+
+    @pytest.mark.parametrize(
+        "module", ["persephone", "persephone.xml_builder", "persephone.cli"]
+    )
+    def test_headless_modules_do_not_load_gui(self, module):
+        """Test that importing headless modules never loads the GUI"""
+        src = Path(__file__).parent.parent / "src"
+        code = (
+            f"import sys, {module}; "
+            "print(sorted(m for m in ('toga', 'persephone.app') if m in sys.modules))"
+        )
+
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONPATH": str(src)},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert completed.stdout.strip() == "[]"
+
+    def test_app_names_resolve_lazily(self):
+        """Test that GUI names are available from the package"""
+        assert persephone.main().__class__ is Persephone
+        assert "Persephone" in dir(persephone)
+        with pytest.raises(AttributeError):
+            persephone.missing_name
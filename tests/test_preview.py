@@ -0,0 +1,134 @@
+"""
+Test cases for the paged XML preview and record tables
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from persephone.columnar import AplikaceTable
+from persephone.preview import RecordPager, XMLPreview, temporary_path
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    Aplikace,
+    Osev,
+    Request,
+    TypAplikace,
+    TypRequest,
+    Vymera,
+    XMLBuilder,
+)
+
+
+def create_osevy(count):
+    """Create count parcels with non-ASCII names"""
+    return [
+        Osev(
+            zkod=f"FIELD{i}",
+            ctverec="A1",
+            id_pozemek=f"POZEMEK{i}",
+            nazev_pozemek="Severní pole – pšenice",
+            platnost_od=date(2025, 1, 1),
+            vymery=[Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))],
+        )
+        for i in range(count)
+    ]
+
+
+def write_document(pretty=True, count=200):
+    """Write a request to a temporary file and return its path and text"""
+    request = Request(typ=TypRequest.S, hosp_rok=2025, osevy=create_osevy(count))
+    path = temporary_path()
+    with open(path, "wb") as fp:
+        XMLBuilder(pretty=pretty).write_request(request, fp)
+    with open(path, encoding="utf-8") as fp:
+        return path, fp.read()
+
+
+class TestXMLPreview:
+    """Test cases for XMLPreview"""
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_pages_cover_document(self, pretty):
+        """Test that the pages join to the document in both layouts"""
+        path, text = write_document(pretty)
+        with XMLPreview(path, page_bytes=1000, delete=True) as preview:
+            pages = [preview.page(n) for n in range(preview.page_count)]
+
+        assert "".join(pages) == text
+        assert preview.page_count > 10
+        if pretty:
+            assert all(page.endswith("\n") for page in pages)
+
+    def test_pages_in_any_order(self):
+        """Test that a page does not depend on the pages before it"""
+        path, _ = write_document()
+        with XMLPreview(path, page_bytes=500, delete=True) as preview:
+            last = preview.page_count - 1
+            assert preview.page(last) == preview.page(last)
+            assert preview.page(last).endswith("</Request>\n")
+            with pytest.raises(IndexError):
+                preview.page(last + 1)
+
+    def test_delete_on_close(self, tmp_path):
+        """Test that only previews opened with delete remove their file"""
+        path, _ = write_document(count=1)
+        XMLPreview(path).close()
+        preview = XMLPreview(path, delete=True)
+        preview.close()
+
+        with pytest.raises(FileNotFoundError):
+            open(path)
+
+    def test_empty_file(self, tmp_path):
+        """Test that an empty file has one empty page"""
+        path = tmp_path / "empty.xml"
+        path.write_bytes(b"")
+        with XMLPreview(str(path)) as preview:
+            assert (preview.page_count, preview.page(0)) == (1, "")
+
+
+class TestRecordPager:
+    """Test cases for RecordPager"""
+
+    def test_pages_of_rows(self):
+        """Test headings, row formatting and the last partial page"""
+        pager = RecordPager(OSEV_SPEC, create_osevy(250), page_size=100)
+
+        assert pager.headings[:3] == ["Zkod", "Ctverec", "IdPozemek"]
+        assert "Vymery" not in pager.headings
+        assert pager.page_count == 3
+        assert len(pager.page(2)) == 50
+        assert pager.page(1)[0][:2] == ("FIELD100", "A1")
+        assert pager.page(0)[0][pager.headings.index("PlatnostDo")] == ""
+
+    def test_only_visible_rows_are_materialized(self):
+        """Test that a columnar table only decodes the rows of the page"""
+
+        class CountingTable(AplikaceTable):
+            decoded = 0
+
+            def __getitem__(self, index):
+                CountingTable.decoded += 1
+                return super().__getitem__(index)
+
+        records = [
+            Aplikace(
+                typ=TypAplikace.H,
+                dat_aplikace_zahajeni=date(2025, 4, 1),
+                id_plodina=i,
+                vymera_plodiny=Decimal("1.50"),
+                vymera_aplikace=Decimal("1.50"),
+            )
+            for i in range(1000)
+        ]
+        table = CountingTable.from_records(records)
+        pager = RecordPager(APLIKACE_SPEC, table, page_size=20)
+
+        rows = pager.page(7)
+
+        assert CountingTable.decoded == 20
+        assert rows[0][:2] == ("H", "2025-04-01")
+        assert pager.page_count == 50
@@ -0,0 +1,120 @@
+"""
+Test cases for the referential integrity index
+"""
+
+from decimal import Decimal
+
+from helpers import create_aplikace, create_linked_request, create_osev
+
+from persephone.columnar import AplikaceTable
+from persephone.request_index import IntegrityIssue, IssueKind, RequestIndex
+from persephone.xml_builder import MernaJednotka, Sklizen
+
+
+def issue_paths(issues):
+    return [(issue.kind, str(issue)) for issue in issues]
+
+
+class TestRequestIndex:
+    """Test cases for RequestIndex"""
+
+    def test_lookups(self):
+        """Test that ids map to their owning Osev and Pestovani"""
+        request = create_linked_request(6)
+        index = RequestIndex.from_request(request)
+
+        assert index.osev_for_crop("PEST3") is request.osevy[3]
+        assert index.crops["PEST3"] is request.osevy[3].pestovani[0]
+        assert index.osev_for_crop("UNKNOWN") is None
+        assert index.osev_for_crop(None) is None
+        # The last Osev shares parcel POZ0 with the first
+        assert index.osevy_for_parcel("POZ0") == [request.osevy[0], request.osevy[6]]
+        assert index.parcels["POZ0"] == [0, 6]
+        assert index.osevy_for_parcel(None) == []
+
+    def test_clean_request(self):
+        """Test that a request whose references resolve has no issues"""
+        request = create_linked_request(6)
+        request.aplikace.pop()  # references UNKNOWN
+
+        assert RequestIndex.from_request(request).check(request) == []
+
+    def test_reports_issues_in_order(self):
+        """Test dangling references, duplicate ids and crop mismatches"""
+        request = create_linked_request(3)
+        request.osevy[2].pestovani[0].id_pestovani = "PEST0"
+        mismatch = create_aplikace(crop="PEST1")
+        mismatch.id_plodina = 999
+        request.aplikace = [
+            create_aplikace(crop="PEST1", parcel="POZ1"),
+            create_aplikace(crop="PEST9", parcel="NOWHERE"),
+            mismatch,
+        ]
+        request.sklizne = [
+            Sklizen(
+                id_pestovani="PEST2",
+                id_produkt=111,
+                hosp_rok=2025,
+                vymera_sklizne=Decimal("1"),
+                merna_jednotka=MernaJednotka.T,
+            )
+        ]
+        request.pastvy[0].id_pozemek = "POZ9"
+
+        issues = RequestIndex.from_request(request).check(request)
+
+        assert issue_paths(issues) == [
+            (
+                IssueKind.DUPLICATE,
+                "osevy[2].pestovani[0].id_pestovani: "
+                "duplicate id 'PEST0', first used in osevy[0]",
+            ),
+            (
+                IssueKind.DANGLING,
+                "aplikace[1].id_pestovani: dangling reference 'PEST9'",
+            ),
+            (
+                IssueKind.DANGLING,
+                "aplikace[1].id_pozemek: dangling reference 'NOWHERE'",
+            ),
+            (
+                IssueKind.CROP_MISMATCH,
+                "aplikace[2].id_plodina: "
+                "crop 999 differs from crop 123 of Pestovani 'PEST1'",
+            ),
+            (
+                IssueKind.DANGLING,
+                "sklizne[0].id_pestovani: dangling reference 'PEST2'",
+            ),
+            (IssueKind.DANGLING, "pastvy[0].id_pozemek: dangling reference 'POZ9'"),
+        ]
+        assert issues[3] == IntegrityIssue(
+            IssueKind.CROP_MISMATCH,
+            "aplikace",
+            2,
+            "id_plodina",
+            999,
+            "crop 999 differs from crop 123 of Pestovani 'PEST1'",
+        )
+
+    def test_columnar_and_generator_sections(self):
+        """Test that tables and generators are checked like lists"""
+        request = create_linked_request(5)
+        request.aplikace[0].id_plodina = 7
+        index = RequestIndex.from_request(request)
+        expected = index.check(request)
+
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+        request.sklizne = iter(request.sklizne)
+
+        assert index.check(request) == expected
+
+    def test_osevy_without_pestovani(self):
+        """Test that an Osev without Pestovani still owns its parcel"""
+        osev = create_osev(1)
+        osev.pestovani = []
+
+        index = RequestIndex([osev])
+
+        assert index.crops == {}
+        assert index.parcels == {"POZ1": [0]}
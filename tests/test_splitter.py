@@ -0,0 +1,144 @@
+"""
+Test cases for size-aware request splitting
+"""
+
+import pytest
+from helpers import create_aplikace, create_linked_request
+
+from persephone.splitter import build_parts, split_request
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    Request,
+    TypRequest,
+    XMLBuilder,
+    compile_record_sizer,
+    compile_record_writer,
+)
+
+
+def assert_linked(part):
+    """Assert that every reference of a part resolves inside it"""
+    crops = {
+        pestovani.id_pestovani for osev in part.osevy for pestovani in osev.pestovani
+    }
+    parcels = {osev.id_pozemek for osev in part.osevy}
+    for record in part.aplikace:
+        if record.id_pestovani != "UNKNOWN":
+            assert record.id_pestovani in crops or record.id_pozemek in parcels
+    assert all(record.id_pestovani in crops for record in part.sklizne)
+    assert all(record.id_pozemek in parcels for record in part.pastvy)
+
+
+class TestCompileRecordSizer:
+    """Test cases for compile_record_sizer"""
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_size_matches_serialization(self, pretty):
+        """Test that sizes equal the encoded length of each record"""
+        step, newline = ("  ", "\n") if pretty else ("", "")
+        request = create_linked_request(6)
+        request.osevy[1].nazev_pozemek = ""
+        request.osevy[2].pestovani = []
+        request.aplikace[0].nazev_hnojivo = "a\r\nb"
+        for spec, records in (
+            (OSEV_SPEC, request.osevy),
+            (APLIKACE_SPEC, request.aplikace),
+        ):
+            size = compile_record_sizer(spec, step * 2, step, newline)
+            write = compile_record_writer(spec, step * 2, step, newline)
+            for record in records:
+                parts = []
+                write(record, parts.append)
+                assert size(record) == len("".join(parts).encode("utf-8"))
+
+
+class TestSplitRequest:
+    """Test cases for split_request"""
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_parts_fit_and_keep_references(self, pretty):
+        """Test that every part is under the limit and self-contained"""
+        request = create_linked_request()
+        builder = XMLBuilder(pretty=pretty)
+        whole = len(builder.build_request_bytes(request))
+
+        parts = split_request(request, max_bytes=whole // 4, pretty=pretty)
+
+        assert 4 <= len(parts) <= 6
+        for part in parts:
+            assert len(builder.build_request_bytes(part)) <= whole // 4
+            assert part.hosp_rok == 2025 and part.rozsah_dat == request.rozsah_dat
+            assert_linked(part)
+        for section in ("osevy", "aplikace", "sklizne", "pastvy"):
+            records = [record for part in parts for record in getattr(part, section)]
+            assert sorted(map(id, records)) == sorted(
+                map(id, getattr(request, section))
+            )
+        # Osevy keep their order, except that the second Osev of parcel POZ0
+        # joins the first
+        osevy = request.osevy
+        assert [osev for part in parts for osev in part.osevy] == [
+            osevy[0],
+            osevy[-1],
+            *osevy[1:-1],
+        ]
+
+    def test_exact_limit(self):
+        """Test that a part may be exactly as large as the limit"""
+        request = create_linked_request(4)
+        size = len(XMLBuilder().build_request_bytes(request))
+
+        (part,) = split_request(request, max_bytes=size)
+        assert len(XMLBuilder().build_request_bytes(part)) == size
+        assert len(split_request(request, max_bytes=size - 1)) == 2
+
+    def test_record_limit(self):
+        """Test that max_records limits the section records of each part"""
+        parts = split_request(create_linked_request(), max_records=10)
+
+        counts = [
+            len(part.osevy) + len(part.aplikace) + len(part.sklizne) + len(part.pastvy)
+            for part in parts
+        ]
+        assert max(counts) <= 10
+        assert sum(counts) == 41 + 42 + 20 + 8
+        for part in parts:
+            assert_linked(part)
+
+    def test_oversized_unit_gets_own_part(self):
+        """Test that linked records over the limit are kept together"""
+        request = create_linked_request(3)
+        request.aplikace = [create_aplikace(crop="PEST1") for _ in range(20)]
+
+        parts = split_request(request, max_records=5)
+
+        (big,) = [part for part in parts if len(part.aplikace) == 20]
+        assert [osev.zkod for osev in big.osevy] == ["FIELD1"]
+
+    def test_empty_and_invalid(self):
+        """Test requests without records and unusable limits"""
+        request = Request(typ=TypRequest.S, hosp_rok=2025, osevy=[])
+
+        assert split_request(request, max_records=1) == [request]
+        with pytest.raises(ValueError):
+            split_request(request)
+        with pytest.raises(ValueError):
+            split_request(create_linked_request(), max_bytes=100)
+
+
+class TestBuildParts:
+    """Test cases for build_parts"""
+
+    def test_builds_parts_in_parallel(self):
+        """Test that parts are built in order by the process pool"""
+        request = create_linked_request()
+
+        results = build_parts(request, max_records=30, workers=2, pretty=False)
+
+        builder = XMLBuilder(pretty=False)
+        assert [result.index for result in results] == list(range(len(results)))
+        assert [result.data for result in results] == [
+            builder.build_request_bytes(part)
+            for part in split_request(request, max_records=30, pretty=False)
+        ]
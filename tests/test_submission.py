@@ -0,0 +1,238 @@
+"""
+Test cases for the submission client and the stub service
+"""
+
+import asyncio
+import time
+
+import pytest
+from helpers import create_request
+
+from persephone.stub_server import StubServer
+from persephone.submission import RateLimiter, SubmissionClient, SubmissionError
+from persephone.xml_builder import Response
+
+
+def run_with_server(scenario, **server_options):
+    """Run scenario(server) against a started stub server"""
+
+    async def main():
+        async with StubServer(**server_options) as server:
+            return await scenario(server)
+
+    return asyncio.run(main())
+
+
+class TestSubmissionClient:
+    """Test cases for SubmissionClient"""
+
+    def test_submit_returns_response(self):
+        """Test that the service's Response is parsed"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url) as client:
+                return await client.submit(create_request())
+
+        response = run_with_server(scenario, validate=True, seed=1)
+
+        assert isinstance(response, Response)
+        assert len(response.guid_podani) == 36
+
+    def test_connections_are_reused(self):
+        """Test that sequential submissions share one keep-alive connection"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url) as client:
+                for _ in range(5):
+                    await client.submit(create_request())
+                return client.connections_opened, server.connections, server.requests
+
+        assert run_with_server(scenario) == (1, 1, 5)
+
+    def test_server_closing_connections(self):
+        """Test that connections closed by the server are replaced"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url, retries=0) as client:
+                for _ in range(5):
+                    await client.submit(create_request())
+                return server.connections
+
+        assert run_with_server(scenario, requests_per_connection=2) == 3
+
+    def test_concurrency_limit(self):
+        """Test that no more than concurrency submissions are in flight"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url, concurrency=3) as client:
+                results = await client.submit_many(
+                    create_request(zkod=f"FIELD{i}") for i in range(12)
+                )
+                return results, server.max_in_flight, client.connections_opened
+
+        results, max_in_flight, opened = run_with_server(scenario, latency=0.02)
+
+        assert [result.index for result in results] == list(range(12))
+        assert all(result.ok for result in results)
+        assert max_in_flight == 3
+        assert opened == 3
+
+    def test_rate_limit(self):
+        """Test that submissions start no faster than the rate"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url, rate=50) as client:
+                started = time.monotonic()
+                await client.submit_many(create_request() for _ in range(6))
+                return time.monotonic() - started
+
+        # The first submission is free, the other five wait 20 ms each
+        assert run_with_server(scenario) >= 0.09
+
+    def test_retries_transient_failures(self):
+        """Test that 503 responses are retried with backoff"""
+
+        async def scenario(server):
+            server.fail_next(2, status=503)
+            async with SubmissionClient(server.url, backoff=0.001) as client:
+                response, attempts = await client.submit_payload(
+                    client.builder.build_request_bytes(create_request())
+                )
+                return response, attempts, server.requests
+
+        response, attempts, requests = run_with_server(scenario)
+
+        assert isinstance(response, Response)
+        assert attempts == 3
+        assert requests == 3
+
+    def test_retry_after_is_honoured(self):
+        """Test that the server's Retry-After replaces the backoff delay"""
+
+        async def scenario(server):
+            server.fail_next(1, status=429, retry_after=0.1)
+            async with SubmissionClient(server.url, backoff=0.001) as client:
+                started = time.monotonic()
+                await client.submit(create_request())
+                return time.monotonic() - started
+
+        assert run_with_server(scenario) >= 0.1
+
+    def test_retries_exhausted(self):
+        """Test that the last error is raised when retries run out"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url, retries=2, backoff=0.001) as client:
+                with pytest.raises(SubmissionError) as excinfo:
+                    await client.submit(create_request())
+                return excinfo.value, server.requests
+
+        error, requests = run_with_server(scenario, error_rate=1.0)
+
+        assert error.status == 503
+        assert error.attempts == 3
+        assert requests == 3
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a rejected document fails without retrying"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url, backoff=0.001) as client:
+                with pytest.raises(SubmissionError) as excinfo:
+                    await client.submit_payload(b"<Request>")
+                return excinfo.value, server.requests
+
+        error, requests = run_with_server(scenario, validate=True)
+
+        assert error.status == 400
+        assert error.attempts == 1
+        assert requests == 1
+
+    def test_connection_refused(self):
+        """Test that an unreachable service is reported as SubmissionError"""
+
+        async def scenario():
+            server = StubServer()
+            await server.start()
+            url = server.url
+            await server.close()
+            async with SubmissionClient(url, retries=1, backoff=0.001) as client:
+                with pytest.raises(SubmissionError) as excinfo:
+                    await client.submit(create_request())
+                return excinfo.value
+
+        error = asyncio.run(scenario())
+
+        assert error.status is None
+        assert error.attempts == 2
+
+    def test_submit_many_reports_failures(self):
+        """Test that a failed submission does not abort the batch"""
+
+        async def scenario(server):
+            server.fail_next(1, status=400)
+            async with SubmissionClient(server.url, concurrency=1) as client:
+                return await client.submit_many(create_request() for _ in range(3))
+
+        results = run_with_server(scenario)
+
+        assert [result.ok for result in results] == [False, True, True]
+        assert "HTTP 400" in results[0].error
+        assert results[1].attempts == 1
+
+    def test_invalid_url(self):
+        """Test that only HTTP(S) URLs are accepted"""
+        with pytest.raises(ValueError):
+            SubmissionClient("ftp://example.com/service")
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter"""
+
+    def test_burst(self):
+        """Test that a burst is allowed before the rate applies"""
+
+        async def scenario():
+            limiter = RateLimiter(rate=20, burst=3)
+            started = time.monotonic()
+            for _ in range(3):
+                await limiter.acquire()
+            burst = time.monotonic() - started
+            await limiter.acquire()
+            return burst, time.monotonic() - started
+
+        burst, total = asyncio.run(scenario())
+
+        assert burst < 0.04
+        assert total >= 0.04
+
+
+class TestStubServer:
+    """Test cases for StubServer"""
+
+    def test_seeded_guids_are_reproducible(self):
+        """Test that the same seed produces the same GUIDs"""
+
+        async def scenario(server):
+            async with SubmissionClient(server.url) as client:
+                return [
+                    (await client.submit(create_request())).guid_podani for _ in "ab"
+                ]
+
+        first = run_with_server(scenario, seed=7)
+        second = run_with_server(scenario, seed=7)
+
+        assert first == second
+        assert first[0] != first[1]
+
+    def test_unknown_path(self):
+        """Test that other paths answer 404"""
+
+        async def scenario(server):
+            url = server.url.replace("/EH_PEH02A", "/other")
+            async with SubmissionClient(url) as client:
+                with pytest.raises(SubmissionError) as excinfo:
+                    await client.submit(create_request())
+                return excinfo.value.status
+
+        assert run_with_server(scenario) == 404
@@ -0,0 +1,291 @@
+"""
+Test cases for request validation
+"""
+
+import multiprocessing
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from helpers import create_aplikace, create_linked_request
+
+from persephone import compact
+from persephone.columnar import AplikaceTable
+from persephone.validation import (
+    ValidationError,
+    Validator,
+    Violation,
+    check_references,
+    compile_record_checker,
+    validate_parallel,
+    validate_request,
+)
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    TypRequest,
+    XMLBuilder,
+)
+
+
+def create_invalid_request():
+    """Create a request breaking one rule of each example"""
+    request = create_linked_request(4)
+    request.typ = TypRequest.K
+    request.osevy[1].platnost_od = None
+    request.osevy[2].vymery[0].platnost_od = None
+    request.aplikace[1].vymera_aplikace = Decimal("12.00")
+    request.pastvy[0].pastva_do = date(2025, 4, 30)
+    return request
+
+
+EXPECTED = [
+    "obdobi_od: obdobi_od is required for typ K",
+    "obdobi_do: obdobi_do is required for typ K",
+    "osevy[1].platnost_od: platnost_od is required",
+    "osevy[2].vymery[0].platnost_od: platnost_od is required",
+    "aplikace[1].vymera_aplikace: 12.00 exceeds vymera_plodiny 10.50",
+    "pastvy[0].pastva_do: 2025-04-30 is before pastva_od 2025-05-01",
+]
+
+
+class TestValidator:
+    """Test cases for Validator"""
+
+    def test_valid_request(self):
+        """Test that a valid request has no violations"""
+        assert validate_request(create_linked_request()) == []
+
+    def test_collects_all_violations(self):
+        """Test the example rules and the record paths of violations"""
+        violations = validate_request(create_invalid_request())
+
+        assert [str(violation) for violation in violations] == EXPECTED
+        assert violations[4] == Violation(
+            "limit",
+            "aplikace[1]",
+            "vymera_aplikace",
+            "12.00 exceeds vymera_plodiny 10.50",
+            Decimal("12.00"),
+        )
+        assert violations[0].rule == "required" and violations[0].path == ""
+
+    def test_fail_fast(self):
+        """Test that fail-fast validation stops at the first invalid record"""
+        request = create_invalid_request()
+        request.typ = TypRequest.S
+
+        violations = validate_request(request, fail_fast=True)
+
+        assert [str(violation) for violation in violations] == EXPECTED[2:3]
+
+    def test_enum_and_date_rules(self):
+        """Test enum types and date order inside nested records"""
+        request = create_linked_request(2)
+        request.aplikace[0].typ = "H"
+        pestovani = request.osevy[1].pestovani[0]
+        pestovani.ukonceni_pestovani = date(2025, 1, 1)
+
+        assert [str(violation) for violation in validate_request(request)] == [
+            "osevy[1].pestovani[0].ukonceni_pestovani: "
+            "2025-01-01 is before zahajeni_pestovani 2025-03-15",
+            "aplikace[0].typ: 'H' is not a TypAplikace",
+        ]
+
+    def test_value_types(self):
+        """Test that dates and numbers of the wrong type are violations"""
+        request = create_linked_request(2)
+        request.obdobi_od = "2025-01-01"
+        request.obdobi_do = date(2025, 3, 31)
+        request.aplikace[0].vymera_aplikace = "12.00"
+        request.aplikace[1].id_plodina = True
+        request.pastvy[0].pastva_do = "2025-09-30"
+
+        assert [str(violation) for violation in validate_request(request)] == [
+            "obdobi_od: '2025-01-01' is not a date",
+            "aplikace[0].vymera_aplikace: '12.00' is not a number",
+            "aplikace[1].id_plodina: True is not a whole number",
+            "pastvy[0].pastva_do: '2025-09-30' is not a date",
+        ]
+        with pytest.raises(ValidationError, match="is not a date"):
+            XMLBuilder(validator=Validator(fail_fast=True)).build_request_bytes(request)
+
+    def test_same_types_different_values(self):
+        """Test that records sharing a checked type signature are each tested"""
+        check = compile_record_checker(APLIKACE_SPEC)
+        valid = create_aplikace()
+        invalid = create_aplikace()
+        invalid.vymera_aplikace = Decimal("20")
+
+        assert check.check(check.get(valid)) == ()
+        assert [v.field for v in check.check(check.get(invalid))] == ["vymera_aplikace"]
+        assert check.check(check.get(valid)) == ()
+
+    def test_columnar_and_compact_records(self):
+        """Test that tables and slotted records are checked like dataclasses"""
+        request = create_invalid_request()
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+        request.pastvy = [compact.Pastva(**vars(record)) for record in request.pastvy]
+
+        assert [str(v) for v in validate_request(request)] == EXPECTED
+
+
+class TestBuilderValidation:
+    """Test cases for validation while building"""
+
+    def test_valid_request_builds_unchanged(self):
+        """Test that validation does not change the output"""
+        request = create_linked_request()
+        request.aplikace = iter(request.aplikace)
+        validator = Validator()
+
+        data = XMLBuilder(validator=validator).build_request_bytes(request)
+
+        assert validator.violations == []
+        request = create_linked_request()
+        assert data == XMLBuilder().build_request_bytes(request)
+
+    def test_collect_all_raises_after_traversal(self):
+        """Test that all violations are raised once every record is seen"""
+        request = create_invalid_request()
+        consumed = []
+        sklizne = request.sklizne
+        request.sklizne = (consumed.append(record) or record for record in sklizne)
+        builder = XMLBuilder(validator=Validator())
+
+        with pytest.raises(ValidationError) as raised:
+            builder.build_request_bytes(request)
+
+        assert [str(v) for v in raised.value.violations] == EXPECTED
+        assert str(raised.value) == f"{EXPECTED[0]} (and 5 more)"
+        assert consumed == sklizne
+
+    def test_fail_fast_stops_build(self):
+        """Test that a fail-fast build stops at the first invalid record"""
+        request = create_invalid_request()
+        request.typ = TypRequest.S
+        request.osevy = iter(request.osevy)
+        builder = XMLBuilder(pretty=False, validator=Validator(fail_fast=True))
+
+        with pytest.raises(ValidationError, match=r"^osevy\[1\]\.platnost_od"):
+            builder.build_request_bytes(request)
+
+        # The invalid Osev and the records after it were never pulled
+        assert len(list(request.osevy)) == 3
+
+    def test_with_progress_and_stats(self):
+        """Test validation alongside progress reports and build statistics"""
+        request = create_linked_request()
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+        reports = []
+        stats = []
+        builder = XMLBuilder(
+            validator=Validator(),
+            on_progress=lambda done, total: reports.append((done, total)),
+            on_build=stats.append,
+        )
+
+        data = builder.build_request_bytes(request)
+
+        assert data == XMLBuilder().build_request_bytes(request)
+        assert reports[-1] == (111, 111)
+        assert [section.records for section in stats[0].sections[1:]] == [
+            41,
+            42,
+            20,
+            8,
+        ]
+
+
+class TestValidateParallel:
+    """Test cases for validate_parallel"""
+
+    def create_request(self):
+        request = create_invalid_request()
+        request.aplikace[0].id_plodina = 999
+        request.aplikace[-1].vymera_aplikace = Decimal("99.00")
+        request.osevy[4].pestovani[0].id_pestovani = "PEST1"
+        return request
+
+    def test_cross_record_checks(self):
+        """Test that ids and references are reported as violations"""
+        assert [
+            (violation.rule, str(violation))
+            for violation in check_references(self.create_request())
+        ] == [
+            (
+                "duplicate",
+                "osevy[4].pestovani[0].id_pestovani: "
+                "duplicate id 'PEST1', first used in osevy[1]",
+            ),
+            (
+                "crop_mismatch",
+                "aplikace[0].id_plodina: "
+                "crop 999 differs from crop 123 of Pestovani 'PEST3'",
+            ),
+            ("dangling", "aplikace[4].id_pozemek: dangling reference 'POZ5'"),
+            ("dangling", "aplikace[5].id_pestovani: dangling reference 'UNKNOWN'"),
+        ]
+
+    @pytest.mark.parametrize("workers", [1, 2, 3])
+    def test_same_order_for_any_worker_count(self, workers):
+        """Test that violations match sequential validation in order"""
+        request = self.create_request()
+        expected = validate_request(request) + check_references(request)
+        request.sklizne = iter(request.sklizne)
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+
+        violations = validate_parallel(request, workers=workers, shard_size=2)
+
+        assert violations == expected
+        assert [str(v) for v in violations[:6]] == EXPECTED[:4] + [
+            EXPECTED[4],
+            "aplikace[5].vymera_aplikace: 99.00 exceeds vymera_plodiny 10.50",
+        ]
+
+    @pytest.mark.parametrize(
+        "method",
+        [
+            pytest.param(
+                method,
+                marks=pytest.mark.skipif(
+                    method not in multiprocessing.get_all_start_methods(),
+                    reason=f"no {method} start method",
+                ),
+            )
+            for method in ("fork", "spawn")
+        ],
+    )
+    def test_start_methods(self, method):
+        """Test that workers shared or sent the request report alike"""
+        request = self.create_request()
+        expected = validate_parallel(request, workers=1)
+
+        violations = validate_parallel(
+            request,
+            workers=2,
+            shard_size=2,
+            mp_context=multiprocessing.get_context(method),
+        )
+
+        assert violations == expected
+
+    def test_fail_fast(self):
+        """Test that the first invalid record in request order is reported"""
+        request = self.create_request()
+        request.typ = TypRequest.S
+
+        violations = validate_parallel(request, workers=2, fail_fast=True, shard_size=1)
+
+        assert [str(v) for v in violations] == EXPECTED[2:3]
+
+    def test_fail_fast_references(self):
+        """Test that the first cross-record violation is reported alone"""
+        request = create_linked_request(4)
+        request.aplikace[0].id_pestovani = "PEST9"
+        request.aplikace[1].id_pestovani = "PEST8"
+
+        violations = validate_parallel(request, workers=2, fail_fast=True)
+
+        assert [str(v) for v in violations] == [
+            "aplikace[0].id_pestovani: dangling reference 'PEST9'"
+        ]
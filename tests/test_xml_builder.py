@@ -2,15 +2,29 @@
 Test cases for the XML Builder module
 """
 
+from dataclasses import MISSING, fields, replace
 from datetime import date
 from decimal import Decimal
 from xml.etree.ElementTree import fromstring
 
 import pytest
+from helpers import create_request
 
+from persephone.columnar import AplikaceTable
 from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    OSEV_SPEC,
+    PASTVA_SPEC,
+    PESTOVANI_SPEC,
+    REQUEST_SPEC,
+    RESPONSE_SPEC,
+    ROZSAH_DAT_SPEC,
+    SIZE_CHUNK,
+    SKLIZEN_SPEC,
+    VYMERA_SPEC,
     Aplikace,
     DobaZapraveni,
+    FieldKind,
     MernaJednotka,
     MetodaZivin,
     Osev,
@@ -28,6 +42,7 @@ from persephone.xml_builder import (
     TypRequest,
     Vymera,
     XMLBuilder,
+    compile_record_writer,
 )
 
 
@@ -457,3 +472,369 @@ class TestXMLBuilder:
             assert root.find("GuidPodani").text == "test-guid-123"
         except Exception as e:
             pytest.fail(f"Generated response XML is not well-formed: {e}")
+
+    def test_pretty_output_layout(self):
+        """Test the exact indented layout, escaping and empty elements"""
+        osev = Osev(
+            zkod='A&B <c> "q"',
+            ctverec="",
+            id_pozemek="POZEMEK001",
+            nazev_pozemek="Severní pole",
+            platnost_od=date(2025, 1, 1),
+            vymery=[],
+        )
+        request = Request(
+            typ=TypRequest.B,
+            hosp_rok=2025,
+            rozsah_dat=[RozsahDat(kod=RozsahKod.OSEVY)],
+            osevy=[osev],
+        )
+
+        xml = self.builder.build_request_xml(request)
+
+        assert xml == (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            "<Request>\n"
+            "  <Typ>B</Typ>\n"
+            "  <HospRok>2025</HospRok>\n"
+            "  <RozsahDat>\n"
+            "    <Kod>O</Kod>\n"
+            "  </RozsahDat>\n"
+            "  <Osevy>\n"
+            "    <Osev>\n"
+            "      <Zkod>A&amp;B &lt;c&gt; &quot;q&quot;</Zkod>\n"
+            "      <Ctverec/>\n"
+            "      <IdPozemek>POZEMEK001</IdPozemek>\n"
+            "      <NazevPozemek>Severní pole</NazevPozemek>\n"
+            "      <PlatnostOd>2025-01-01</PlatnostOd>\n"
+            "      <Vymery/>\n"
+            "    </Osev>\n"
+            "  </Osevy>\n"
+            "</Request>\n"
+        )
+
+    def test_write_request_matches_build_request_xml(self):
+        """Test that streamed output equals the in-memory XML"""
+        import io
+
+        osev = Osev(
+            zkod="TEST01",
+            ctverec="A1",
+            id_pozemek="POZEMEK001",
+            nazev_pozemek="Severní pole",
+            platnost_od=date(2025, 1, 1),
+            vymery=[Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))],
+        )
+        sklizen = Sklizen(
+            id_pestovani="PEST001",
+            id_produkt=111,
+            hosp_rok=2025,
+            vymera_sklizne=Decimal("15.750"),
+            merna_jednotka=MernaJednotka.T,
+        )
+        request = Request(typ=TypRequest.S, hosp_rok=2025, osevy=[osev])
+        request.sklizne = [sklizen]
+
+        buffer = io.BytesIO()
+        self.builder.write_request(request, buffer)
+
+        expected = self.builder.build_request_xml(request)
+        assert buffer.getvalue() == expected.encode("utf-8")
+
+    def test_write_request_accepts_generators(self):
+        """Test that section generators are consumed lazily and only once"""
+        import gzip
+        import io
+
+        def generate_aplikace(count):
+            for i in range(count):
+                yield Aplikace(
+                    typ=TypAplikace.H,
+                    dat_aplikace_zahajeni=date(2025, 4, 1),
+                    id_plodina=i,
+                    vymera_plodiny=Decimal("1.00"),
+                    vymera_aplikace=Decimal("1.00"),
+                )
+
+        request = Request(
+            typ=TypRequest.S,
+            osevy=iter([]),
+            aplikace=generate_aplikace(3),
+            sklizne=(s for s in []),
+        )
+
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as stream:
+            self.builder.write_request(request, stream)
+
+        xml = gzip.decompress(buffer.getvalue()).decode("utf-8")
+        root = fromstring(xml.encode("utf-8"))
+        assert "<Osevy/>" in xml
+        assert "<Sklizne" not in xml
+        assert [e.text for e in root.iter("IdPlodina")] == ["0", "1", "2"]
+
+    def test_compact_bytes_output(self):
+        """Test that compact mode emits bytes without whitespace text nodes"""
+        osev = Osev(
+            zkod="TEST01",
+            ctverec="A1",
+            id_pozemek="POZEMEK001",
+            nazev_pozemek="Severní pole",
+            platnost_od=date(2025, 1, 1),
+            vymery=[],
+        )
+        request = Request(typ=TypRequest.K, osevy=[osev])
+
+        payload = XMLBuilder(pretty=False).build_request_bytes(request)
+
+        assert isinstance(payload, bytes)
+        assert payload == (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            "<Request><Typ>K</Typ><Osevy><Osev><Zkod>TEST01</Zkod>"
+            "<Ctverec>A1</Ctverec><IdPozemek>POZEMEK001</IdPozemek>"
+            "<NazevPozemek>Severní pole</NazevPozemek>"
+            "<PlatnostOd>2025-01-01</PlatnostOd><Vymery/></Osev></Osevy>"
+            "</Request>"
+        ).encode("utf-8")
+
+    def test_compact_and_pretty_parse_to_same_content(self):
+        """Test that compact output carries the same data as pretty output"""
+        from xml.etree.ElementTree import tostring
+
+        osev = Osev(
+            zkod="TEST01",
+            ctverec="A1",
+            id_pozemek="POZEMEK001",
+            platnost_od=date(2025, 1, 1),
+            vymery=[Vymera(vymera=Decimal("10.50"), platnost_od=date(2025, 1, 1))],
+        )
+        request = Request(typ=TypRequest.S, hosp_rok=2025, osevy=[osev])
+
+        compact = fromstring(XMLBuilder(pretty=False).build_request_bytes(request))
+        pretty = fromstring(self.builder.build_request_bytes(request))
+        for elem in pretty.iter():
+            if len(elem):
+                elem.text = None
+            elem.tail = None
+
+        assert tostring(compact) == tostring(pretty)
+
+
+class TestFieldSchema:
+    """Test cases for the declarative field schema"""
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            VYMERA_SPEC,
+            PESTOVANI_SPEC,
+            OSEV_SPEC,
+            APLIKACE_SPEC,
+            SKLIZEN_SPEC,
+            PASTVA_SPEC,
+            ROZSAH_DAT_SPEC,
+            REQUEST_SPEC,
+            RESPONSE_SPEC,
+        ],
+    )
+    def test_schema_covers_every_dataclass_field(self, spec):
+        """Test that each dataclass field is mapped exactly once"""
+        names = [field_spec.name for field_spec in spec.fields]
+        assert sorted(names) == sorted(f.name for f in fields(spec.cls))
+
+    @pytest.mark.parametrize(
+        "spec", [VYMERA_SPEC, APLIKACE_SPEC, SKLIZEN_SPEC, PASTVA_SPEC]
+    )
+    def test_decimal_places_match_dataclass_rounding(self, spec):
+        """Test that schema precision agrees with __post_init__ rounding"""
+        decimals = [f for f in spec.fields if f.kind is FieldKind.DECIMAL]
+        values = {}
+        for record_field in fields(spec.cls):
+            if record_field.default is MISSING:
+                values[record_field.name] = None
+        for field_spec in decimals:
+            values[field_spec.name] = Decimal("1.23456789")
+
+        record = spec.cls(**values)
+
+        for field_spec in decimals:
+            value = getattr(record, field_spec.name)
+            assert value.as_tuple().exponent == -field_spec.places
+
+    def test_record_writers_are_compiled_once(self):
+        """Test that serializers are generated once per record type and layout"""
+        first = compile_record_writer(APLIKACE_SPEC, "    ", "  ", "\n")
+        second = compile_record_writer(APLIKACE_SPEC, "    ", "  ", "\n")
+        assert first is second
+
+    def test_record_writer_output(self):
+        """Test a generated serializer on a single record"""
+        write = compile_record_writer(VYMERA_SPEC, "", "  ", "\n")
+        parts = []
+        write(Vymera(vymera=Decimal("1.5"), platnost_od=date(2025, 1, 1)), parts.append)
+        assert "".join(parts) == (
+            "<Vymera>\n"
+            "  <Vymera>1.50</Vymera>\n"
+            "  <PlatnostOd>2025-01-01</PlatnostOd>\n"
+            "</Vymera>\n"
+        )
+
+    @pytest.mark.parametrize(
+        "changes, message",
+        [
+            (
+                {"platnost_od": "2025-01-01"},
+                "PlatnostOd: cannot write '2025-01-01' as a date",
+            ),
+            ({"typ_plodiny": "HLA"}, "TypPlodiny: cannot write 'HLA' as a TypPlodiny"),
+            ({"viceleta": "ano"}, "Viceleta: cannot write 'ano' as a bool"),
+        ],
+    )
+    def test_invalid_values_are_rejected(self, changes, message):
+        """Test that values a field cannot be written from raise ValueError"""
+        pestovani = Pestovani(
+            id_pestovani="PEST1",
+            id_plodina=123,
+            viceleta=False,
+            zahajeni_pestovani=date(2025, 3, 15),
+            platnost_od=date(2025, 3, 15),
+        )
+        write = compile_record_writer(PESTOVANI_SPEC, "", "  ", "\n")
+
+        with pytest.raises(ValueError) as raised:
+            write(replace(pestovani, **changes), [].append)
+
+        assert str(raised.value) == message
+
+
+class TestProgress:
+    """Test cases for the on_progress hook"""
+
+    def test_progress_reported_at_interval(self):
+        """Test that progress is reported every PROGRESS_INTERVAL records"""
+        calls = []
+        builder = XMLBuilder(
+            on_progress=lambda done, total: calls.append((done, total))
+        )
+
+        xml = builder.build_request_xml(create_request(600))
+
+        assert calls == [(256, 600), (512, 600), (600, 600)]
+        assert xml == XMLBuilder().build_request_xml(create_request(600))
+
+    def test_progress_total_unknown_for_generators(self):
+        """Test that the total is None when a section is a generator"""
+        calls = []
+        builder = XMLBuilder(
+            on_progress=lambda done, total: calls.append((done, total))
+        )
+
+        builder.build_request_bytes(create_request(osevy=iter(create_request(3).osevy)))
+
+        assert calls == [(3, None)]
+
+    def test_hook_exception_aborts_build(self):
+        """Test that an exception raised by the hook stops the build"""
+
+        def cancel(done, total):
+            raise KeyboardInterrupt
+
+        consumed = []
+        request = create_request(1000)
+        request.osevy = (consumed.append(osev) or osev for osev in request.osevy)
+
+        with pytest.raises(KeyboardInterrupt):
+            XMLBuilder(on_progress=cancel).build_request_xml(request)
+        assert len(consumed) == 256
+
+
+class TestEstimateSize:
+    """Test cases for XMLBuilder.estimate_size"""
+
+    def create_request(self, count=5):
+        osevy = [
+            Osev(
+                zkod=f"FIELD{i}",
+                ctverec="A1",
+                id_pozemek=f"POZ{i}",
+                nazev_pozemek=["Pole", "", 'Louka <"dolní"> & les', "a\r\nb\rc"][i % 4],
+                platnost_od=date(2025, 1, 1),
+                vymery=[Vymera(vymera=Decimal("1.50"), platnost_od=date(2025, 1, 1))],
+                pestovani=(
+                    []
+                    if i % 2
+                    else [
+                        Pestovani(
+                            id_pestovani=f"PEST{i}",
+                            id_plodina=i,
+                            viceleta=bool(i % 3),
+                            zahajeni_pestovani=date(2025, 3, 1),
+                            platnost_od=date(2025, 3, 1),
+                            typ_plodiny=TypPlodiny.HLA,
+                        )
+                    ]
+                ),
+            )
+            for i in range(count)
+        ]
+        aplikace = [
+            Aplikace(
+                typ=TypAplikace.H,
+                dat_aplikace_zahajeni=date(2025, 4, 1),
+                id_plodina=0,
+                vymera_plodiny=Decimal("10"),
+                vymera_aplikace=Decimal("-0.5"),
+                doba_zapraveni=[None, DobaZapraveni.H48_PLUS][i % 2],
+                nazev_hnojivo="Hnůj\r",
+                rozklad_slamy=[None, True, False][i % 3],
+            )
+            for i in range(count)
+        ]
+        return Request(
+            typ=TypRequest.K,
+            obdobi_od=date(2025, 1, 1),
+            obdobi_do=date(2025, 12, 31),
+            rezim_volani=RezimVolani.T,
+            rozsah_dat=[RozsahDat(RozsahKod.OSEVY), RozsahDat(None)],
+            osevy=osevy,
+            aplikace=aplikace,
+        )
+
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_size_is_exact(self, pretty):
+        """Test that the estimate equals the size of the built document"""
+        request = self.create_request()
+        builder = XMLBuilder(pretty=pretty)
+
+        assert builder.estimate_size(request) == len(
+            builder.build_request_bytes(request)
+        )
+        assert XMLBuilder(pretty=not pretty).estimate_size(
+            request, pretty=pretty
+        ) == len(builder.build_request_bytes(request))
+
+    def test_empty_sections(self):
+        """Test requests without records, including the empty Osevy element"""
+        request = Request(typ=TypRequest.S, osevy=[])
+
+        assert XMLBuilder().estimate_size(request) == len(
+            XMLBuilder().build_request_bytes(request)
+        )
+
+    def test_chunks_and_containers(self):
+        """Test sections longer than a chunk and columnar tables"""
+        request = self.create_request(SIZE_CHUNK + 7)
+        expected = len(XMLBuilder().build_request_bytes(request))
+        assert XMLBuilder().estimate_size(request) == expected
+
+        request.aplikace = AplikaceTable.from_records(request.aplikace)
+        assert XMLBuilder().estimate_size(request) == expected
+
+    def test_generators_are_not_consumed(self):
+        """Test that a generator section raises instead of being consumed"""
+        request = self.create_request()
+        request.osevy = iter(request.osevy)
+
+        with pytest.raises(TypeError):
+            XMLBuilder().estimate_size(request)
+        assert len(list(request.osevy)) == 5
@@ -0,0 +1,118 @@
+"""
+Test cases for the XML Parser module
+"""
+
+import io
+from decimal import Decimal
+
+import pytest
+from helpers import create_osev, create_request
+
+from persephone.xml_builder import (
+    APLIKACE_SPEC,
+    DobaZapraveni,
+    MernaJednotka,
+    Response,
+    RezimVolani,
+    RozsahDat,
+    RozsahKod,
+    TypAplikace,
+    XMLBuilder,
+)
+from persephone.xml_parser import (
+    enum_members,
+    iter_request_records,
+    parse_request_xml,
+    parse_response_xml,
+    value_parser,
+)
+
+
+class TestXMLParser:
+    """Test cases for parsing XML back into dataclasses"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.builder = XMLBuilder()
+        # Every record type, an empty text and an Osev without Pestovani
+        self.request = create_request(
+            2,
+            sections=("aplikace", "sklizne", "pastvy"),
+            rezim_volani=RezimVolani.T,
+            rozsah_dat=[RozsahDat(RozsahKod.OSEVY), RozsahDat(RozsahKod.PASTVY)],
+            osevy=[create_osev(0, ctverec="", pestovani=[]), create_osev(1)],
+        )
+
+    def test_request_round_trip(self):
+        """Test that a parsed request equals the one that was built"""
+        xml = self.builder.build_request_bytes(self.request)
+
+        parsed = parse_request_xml(io.BytesIO(xml))
+
+        assert parsed == self.request
+        assert self.builder.build_request_bytes(parsed) == xml
+
+    def test_compact_round_trip(self):
+        """Test parsing of compact output"""
+        xml = XMLBuilder(pretty=False).build_request_bytes(self.request)
+
+        assert parse_request_xml(io.BytesIO(xml)) == self.request
+
+    def test_enum_codes_map_back_to_members(self):
+        """Test that enum codes are converted back to enum members"""
+        xml = self.builder.build_request_bytes(self.request)
+
+        parsed = parse_request_xml(io.BytesIO(xml))
+
+        assert parsed.aplikace[0].typ is TypAplikace.H
+        assert parsed.aplikace[0].doba_zapraveni is DobaZapraveni.H48_PLUS
+        assert parsed.sklizne[0].merna_jednotka is MernaJednotka.T
+        assert parsed.rozsah_dat[1].kod is RozsahKod.PASTVY
+
+    def test_value_parsers(self):
+        """Test the public parsers of field texts"""
+        fields = {spec.name: spec for spec in APLIKACE_SPEC.fields}
+
+        assert enum_members(TypAplikace)["H"] is TypAplikace.H
+        assert value_parser(fields["typ"])("H") is TypAplikace.H
+        assert value_parser(fields["vymera_plodiny"])("1.50") == Decimal("1.50")
+        assert value_parser(fields["rozklad_slamy"])("false") is False
+        with pytest.raises(KeyError):
+            value_parser(fields["typ"])("X")
+
+    def test_iter_request_records_in_document_order(self, tmp_path):
+        """Test that records are streamed in order from a file"""
+        path = tmp_path / "request.xml"
+        with open(path, "wb") as fp:
+            self.builder.write_request(self.request, fp)
+
+        records = list(iter_request_records(str(path)))
+
+        expected = (
+            list(self.request.osevy)
+            + list(self.request.aplikace)
+            + list(self.request.sklizne)
+            + list(self.request.pastvy)
+        )
+        assert records == expected
+
+    def test_response_round_trip(self):
+        """Test response parsing"""
+        response = Response(guid_podani="12345678-1234-1234-1234-123456789012")
+        xml = self.builder.build_response_xml(response).encode("utf-8")
+
+        assert parse_response_xml(io.BytesIO(xml)) == response
+
+    @pytest.mark.parametrize(
+        "xml, message",
+        [
+            (b"<Response/>", "Expected <Request>"),
+            (b"<Request><Typ>X</Typ><Osevy/></Request>", "Invalid value 'X'"),
+            (b"<Request><Foo>1</Foo><Osevy/></Request>", "Unexpected element"),
+            (b"<Request><Osevy/></Request>", "Incomplete <Request>"),
+        ],
+    )
+    def test_invalid_documents(self, xml, message):
+        """Test that malformed documents raise ValueError"""
+        with pytest.raises(ValueError, match=message):
+            parse_request_xml(io.BytesIO(xml))